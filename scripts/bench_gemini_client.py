@@ -0,0 +1,73 @@
+# scripts/bench_gemini_client.py
+"""
+Comprueba el cliente Gemini compartido contra un backend falso que limita
+(429) por encima de una cuota. El objetivo: throughput cercano a la cuota
+y cero fallos pese a configurar el cliente por encima de ella.
+
+Uso:
+    python scripts/bench_gemini_client.py --quota 20 --requests 400
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.infrastructure.llm.gemini_client import GeminiClient
+from src.infrastructure.llm.fake_gemini import FakeGeminiBackend
+
+MODEL = 'models/text-embedding-004'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del cliente Gemini con cuota simulada")
+    parser.add_argument("--quota", type=float, default=20, help="Peticiones/segundo que acepta el fake")
+    parser.add_argument("--client-rps", type=float, default=40, help="Ritmo configurado en el cliente")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    # Ventana de 1s para que la prueba dure segundos y no minutos
+    backend = FakeGeminiBackend(rpm_quota={MODEL: args.quota}, latency_s=args.latency, dim=8, window_s=1.0)
+    client = GeminiClient(
+        backend=backend,
+        limits={MODEL: {"rpm": args.client_rps * 60, "concurrency": args.concurrency}},
+        max_retries=10,
+        base_delay=0.05,
+        max_delay=2.0
+    )
+
+    failures = 0
+
+    def call(i):
+        nonlocal failures
+        try:
+            client.embed_content(MODEL, f"chunk {i}", "retrieval_document")
+        except Exception:
+            failures += 1
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=args.concurrency * 2) as pool:
+        list(pool.map(call, range(args.requests)))
+    elapsed = time.time() - start
+
+    throughput = (args.requests - failures) / elapsed
+    report = {
+        "requests": args.requests,
+        "failures": failures,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(throughput, 2),
+        "quota_rps": args.quota,
+        "quota_utilization": round(throughput / args.quota, 3),
+        "backend": backend.stats,
+        "client": client.metrics()[MODEL]
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# scripts/benchmark_query.py
+"""
+Benchmark de RAGServiceV2.query con backends falsos (Gemini y vector store).
+
+Inyecta latencias lentas ocasionales y compara la latencia de cola por
+escenario (p.ej. sin hedging vs. con hedging). Sin red ni cuota.
+
+Uso:
+    python scripts/benchmark_query.py --queries 400 --slow-probability 0.02
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Caché aislada: cada consulta del benchmark debe llegar a los backends
+os.environ['CACHE_DIR'] = tempfile.mkdtemp(prefix='rag_bench_cache_')
+
+from src.application.rag_service_v2 import RAGServiceV2
+from src.infrastructure.llm.gemini_client import GeminiClient
+from src.infrastructure.llm.fake_gemini import FakeGeminiBackend
+from src.infrastructure.vector_store.fake_store import FakeVectorStore
+
+SCENARIOS = {
+    "baseline": {"HEDGE_PERCENTILE": "0", "HEDGE_GENERATION_PERCENTILE": "0"},
+    "hedged": {"HEDGE_PERCENTILE": "95", "HEDGE_GENERATION_PERCENTILE": "0"},
+    "hedged_generation": {"HEDGE_PERCENTILE": "95", "HEDGE_GENERATION_PERCENTILE": "95"},
+}
+
+QUESTIONS = [
+    "¿Quiénes son los autores del documento?",
+    "¿Qué es Competiscan y qué resultados obtuvo?",
+    "Muestra el diagrama de arquitectura de la solución",
+    "¿Cuáles son los patrones de procesamiento disponibles?",
+]
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def build_service(args) -> RAGServiceV2:
+    backend = FakeGeminiBackend(
+        latency_s=args.gemini_latency,
+        latency_jitter_s=args.gemini_latency / 2,
+        slow_probability=args.slow_probability,
+        slow_latency_s=args.slow_latency
+    )
+    limits = {model: {"rpm": 10 ** 6, "concurrency": 256} for model in
+              ("models/text-embedding-004", "gemini-2.0-flash-exp")}
+    gemini = GeminiClient(backend=backend, limits=limits)
+    store = FakeVectorStore.from_chunks_file(
+        latency_s=args.search_latency,
+        slow_probability=args.slow_probability,
+        slow_latency_s=args.slow_latency
+    )
+    service = RAGServiceV2(vector_store=store, gemini=gemini)
+    service.warmup()
+    return service
+
+
+def run_scenario(name: str, env: dict, args) -> dict:
+    os.environ.update(env)
+    service = build_service(args)
+
+    latencies, errors = [], 0
+
+    def one(i):
+        nonlocal errors
+        question = f"{QUESTIONS[i % len(QUESTIONS)]} #{name}-{i}"
+        start = time.perf_counter()
+        try:
+            service.query(question, top_k=3)
+        except Exception:
+            errors += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one, range(args.queries)))
+
+    return {
+        "scenario": name,
+        "queries": args.queries,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "max_ms": round(max(latencies), 1),
+        "stages": {name: guard.stats() for name, guard in service.guards.items()}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de latencia de RAGServiceV2.query")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--gemini-latency", type=float, default=0.03)
+    parser.add_argument("--search-latency", type=float, default=0.005)
+    parser.add_argument("--slow-probability", type=float, default=0.02)
+    parser.add_argument("--slow-latency", type=float, default=1.0)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--output", default=None, help="Guardar el reporte JSON")
+    args = parser.parse_args()
+
+    report = []
+    for name in args.scenarios:
+        result = run_scenario(name, SCENARIOS[name], args)
+        report.append(result)
+        print(f"📊 {name:18s} p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+              f"p99={result['p99_ms']}ms errores={result['errors']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📁 Reporte: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
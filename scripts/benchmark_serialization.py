@@ -0,0 +1,135 @@
+# scripts/benchmark_serialization.py
+"""
+Benchmark de serialización y bytes en la red de una respuesta de /query.
+
+Compara el JSONResponse por defecto con FastJSONResponse (orjson si está
+instalado) y el tamaño sin comprimir / gzip / brotli, con y sin imágenes
+en base64. Usa las imágenes de output/images_with_context.json si existen;
+si no, PNGs sintéticos.
+
+Uso:
+    python scripts/benchmark_serialization.py --images 2 --repeat 200
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import base64
+import json
+import time
+import zlib
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from src.api.compression import brotli, compress
+from src.api.responses import FastJSONResponse, orjson
+from src.domain.models import QueryResponse
+
+
+def synthetic_png(size_kb: int) -> bytes:
+    # PNG mínimo con datos aleatorios (incompresibles, como una imagen real)
+    raw = os.urandom(size_kb * 1024)
+    return b"\x89PNG\r\n\x1a\n" + zlib.compress(raw, 0)
+
+
+def load_images(count: int, size_kb: int):
+    try:
+        with open('output/images_with_context.json', 'r') as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        metadata = []
+
+    images = []
+    for img in metadata[:count]:
+        if os.path.exists(img.get('path', '')):
+            with open(img['path'], 'rb') as f:
+                images.append((img.get('filename', ''), img.get('description', ''), img.get('page', 0), f.read()))
+    while len(images) < count:
+        i = len(images)
+        images.append((f"synthetic_{i}.png", "Diagrama de arquitectura de la solución", i + 1, synthetic_png(size_kb)))
+    return images
+
+
+def build_response(images, with_data: bool) -> dict:
+    chunks = [{"chunk_id": i, "page": i // 3 + 1, "doc_id": "rag-challenge", "score": 0.8 - i * 0.05} for i in range(3)]
+    return {
+        "question": "Muestra el diagrama de arquitectura de la solución",
+        "answer": "La arquitectura se compone de... " * 40,
+        "sources": [f"Chunk {c['chunk_id']}" for c in chunks],
+        "source_details": chunks,
+        "images": [
+            {
+                "filename": filename,
+                "description": description,
+                "page": page,
+                "data": base64.b64encode(data).decode('utf-8') if with_data else None,
+                "url": f"/images/{filename}",
+                "thumbnail_url": f"/images/{filename}/thumbnail"
+            }
+            for filename, description, page, data in images
+        ],
+        "confidence": 0.81
+    }
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run_case(name: str, payload: dict, repeat: int) -> dict:
+    model = QueryResponse(**payload)
+    content = jsonable_encoder(model)
+
+    baseline_ms = timed(lambda: JSONResponse(content), repeat)
+    fast_ms = timed(lambda: FastJSONResponse(content), repeat)
+    body = FastJSONResponse(content).body
+
+    result = {
+        "case": name,
+        "encoder": "orjson" if orjson is not None else "json",
+        "encode_default_ms": round(baseline_ms, 3),
+        "encode_fast_ms": round(fast_ms, 3),
+        "bytes_identity": len(body),
+        "bytes_gzip": len(compress(body, "gzip")),
+        "gzip_ms": round(timed(lambda: compress(body, "gzip"), max(1, repeat // 10)), 3)
+    }
+    if brotli is not None:
+        result["bytes_br"] = len(compress(body, "br"))
+        result["br_ms"] = round(timed(lambda: compress(body, "br"), max(1, repeat // 10)), 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialización y compresión de /query")
+    parser.add_argument("--images", type=int, default=2)
+    parser.add_argument("--image-kb", type=int, default=300, help="Tamaño de las imágenes sintéticas")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", default=None, help="Guardar el reporte JSON")
+    args = parser.parse_args()
+
+    images = load_images(args.images, args.image_kb)
+    report = [
+        run_case("inline_base64", build_response(images, with_data=True), args.repeat),
+        run_case("image_urls", build_response(images, with_data=False), args.repeat),
+    ]
+
+    for r in report:
+        line = (f"📊 {r['case']:14s} encode {r['encode_default_ms']}ms → {r['encode_fast_ms']}ms ({r['encoder']}) | "
+                f"bytes {r['bytes_identity']} · gzip {r['bytes_gzip']}")
+        if "bytes_br" in r:
+            line += f" · br {r['bytes_br']}"
+        print(line)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📁 Reporte: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# scripts/benchmark_two_stage.py
+"""
+Benchmark de la recuperación en dos etapas (perfil "two_stage").
+
+Carga nuestros embeddings en una colección temporal de una etapa (768d)
+y en variantes con HNSW sobre un vector coarse de coarse_dim componentes
++ rescoring con el vector completo. Para cada coarse_dim y
+candidates_factor mide recall@k contra la búsqueda exacta de 768d,
+latencia y RAM estimada, y elige la variante con menos RAM que cumple el
+recall objetivo (--save la escribe en output/index_profile.json).
+
+Uso:
+    python scripts/benchmark_two_stage.py --scale 20 --target-recall 0.95
+    python scripts/benchmark_two_stage.py --coarse-dims 128 256 --save
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import copy
+import json
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from qdrant_client.models import OptimizersConfigDiff
+
+from scripts.tune_index import load_vectors, load_queries, wait_until_indexed, percentile, recall_at_k
+from src.infrastructure.vector_store.qdrant_store_optimized import QdrantOptimizedStore
+from src.infrastructure.vector_store.chunk_store import ChunkStore
+from src.infrastructure.vector_store.index_profile import (
+    PROFILE_PATH, build_search_params, estimate_memory_bytes, load_index_profile, save_index_profile
+)
+
+BENCH_COLLECTION = "indra_rag_two_stage_bench"
+
+
+def build_collection(args, profile: Dict, vectors: List[List[float]], chunk_store: ChunkStore) -> QdrantOptimizedStore:
+    store = QdrantOptimizedStore(host=args.host, port=args.port, profile=profile, chunk_store=chunk_store)
+    store.collection_name = BENCH_COLLECTION
+    store.initialize_collection_pro(vector_size=len(vectors[0]), replace=True)
+
+    # Forzar construcción de HNSW aunque el corpus sea pequeño
+    store.client.update_collection(
+        collection_name=BENCH_COLLECTION,
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=1)
+    )
+    texts = [f"two-stage-{i}" for i in range(len(vectors))]
+    metadata = [{"chunk_id": i, "source": "benchmark"} for i in range(len(vectors))]
+    store.add_documents_batch(texts, vectors, metadata, batch_size=256)
+    wait_until_indexed(store)
+    return store
+
+
+def run_queries(store: QdrantOptimizedStore, queries, top_k: int, search_params=None) -> (List[List[str]], List[float]):
+    ids, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        points = store.vector_search(q, limit=top_k, search_params=search_params, with_payload=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append([str(p.id) for p in points])
+    return ids, latencies
+
+
+def summarize(results, latencies, truth, memory: Dict) -> Dict:
+    return {
+        "recall": round(recall_at_k(results, truth), 4),
+        "latency_p50_ms": round(percentile(latencies, 50), 3),
+        "latency_p95_ms": round(percentile(latencies, 95), 3),
+        "ram_bytes": memory["ram_total"],
+        "disk_vector_bytes": memory["full_vectors"]
+    }
+
+
+def benchmark(args) -> Dict:
+    # Los chunks de la colección de prueba no van al ChunkStore de producción
+    scratch_dir = tempfile.mkdtemp(prefix='rag_bench_')
+    try:
+        return _benchmark(args, ChunkStore(os.path.join(scratch_dir, 'chunk_store.sqlite')))
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+def _benchmark(args, chunk_store: ChunkStore) -> Dict:
+    vectors = load_vectors(args.embeddings, args.scale, args.noise)
+    queries = load_queries(args.queries, vectors, args.num_queries, args.noise)
+    vector_size = len(vectors[0])
+    base_profile = load_index_profile()
+
+    print(f"🔬 Dos etapas: {len(vectors)} vectores ({vector_size}d), {len(queries)} consultas, top_k={args.top_k}")
+
+    # Referencia: una etapa con el perfil actual; verdad = búsqueda exacta 768d
+    single = copy.deepcopy(base_profile)
+    single["two_stage"]["enabled"] = False
+    store = build_collection(args, single, vectors, chunk_store)
+    truth, _ = run_queries(store, queries, args.top_k, build_search_params(None, exact=True))
+    results, latencies = run_queries(store, queries, args.top_k)
+    baseline = summarize(results, latencies, truth, estimate_memory_bytes(single, len(vectors), vector_size))
+    print(f"   una etapa {vector_size}d → recall={baseline['recall']:.3f} "
+          f"p95={baseline['latency_p95_ms']:.2f}ms ram={baseline['ram_bytes'] / 1e6:.2f}MB")
+
+    candidates = []
+    for coarse_dim in args.coarse_dims:
+        profile = copy.deepcopy(base_profile)
+        profile["two_stage"].update({"enabled": True, "coarse_dim": coarse_dim})
+        store = build_collection(args, profile, vectors, chunk_store)
+        memory = estimate_memory_bytes(profile, len(vectors), vector_size)
+
+        for factor in args.candidates_factor:
+            # La búsqueda lee el perfil en cada consulta: no hace falta recrear la colección
+            store.profile["two_stage"]["candidates_factor"] = factor
+            results, latencies = run_queries(store, queries, args.top_k)
+            candidate = {
+                "coarse_dim": coarse_dim,
+                "candidates_factor": factor,
+                **summarize(results, latencies, truth, memory)
+            }
+            candidate["ram_saving"] = round(1 - candidate["ram_bytes"] / baseline["ram_bytes"], 4)
+            candidate["recall_loss"] = round(baseline["recall"] - candidate["recall"], 4)
+            candidates.append(candidate)
+            print(f"   coarse={coarse_dim}d ×{factor} → recall={candidate['recall']:.3f} "
+                  f"p95={candidate['latency_p95_ms']:.2f}ms ram={candidate['ram_bytes'] / 1e6:.2f}MB "
+                  f"(-{candidate['ram_saving']:.0%})")
+
+    store.client.delete_collection(BENCH_COLLECTION)
+    return {
+        "num_vectors": len(vectors),
+        "vector_size": vector_size,
+        "top_k": args.top_k,
+        "baseline": baseline,
+        "candidates": candidates
+    }
+
+
+def choose(candidates: List[Dict], target_recall: float) -> Optional[Dict]:
+    """La de menos RAM (luego menor latencia) que alcanza el recall objetivo"""
+    eligible = [c for c in candidates if c["recall"] >= target_recall]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda c: (c["ram_bytes"], c["latency_p95_ms"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de recuperación en dos etapas (coarse + rescoring)")
+    parser.add_argument("--embeddings", default="output/chunks_with_embeddings.json")
+    parser.add_argument("--queries", default="output/query_embeddings.json",
+                        help="JSON con embeddings de consultas reales (opcional)")
+    parser.add_argument("--num-queries", type=int, default=100)
+    parser.add_argument("--scale", type=int, default=1, help="Multiplicador sintético del corpus")
+    parser.add_argument("--noise", type=float, default=0.01)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--coarse-dims", type=int, nargs="+", default=[64, 128, 256, 384])
+    parser.add_argument("--candidates-factor", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6333)
+    parser.add_argument("--save", action="store_true", help="Guardar la variante elegida en el perfil")
+    parser.add_argument("--output", default=PROFILE_PATH)
+    parser.add_argument("--report", default="output/two_stage_report.json")
+    args = parser.parse_args()
+
+    report = benchmark(args)
+    best = choose(report["candidates"], args.target_recall)
+    report["target_recall"] = args.target_recall
+    report["recommended"] = best
+
+    os.makedirs(os.path.dirname(args.report) or '.', exist_ok=True)
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if best is None:
+        print(f"\n⚠️ Ninguna variante alcanza recall {args.target_recall}; se mantiene una etapa")
+    else:
+        print(f"\n🏆 coarse={best['coarse_dim']}d ×{best['candidates_factor']}: "
+              f"recall={best['recall']:.3f} (-{best['recall_loss']:.3f}), "
+              f"RAM -{best['ram_saving']:.0%}, p95 {best['latency_p95_ms']:.2f}ms "
+              f"(una etapa: {report['baseline']['latency_p95_ms']:.2f}ms)")
+        if args.save:
+            profile = load_index_profile(args.output)
+            profile["two_stage"].update({
+                "enabled": True,
+                "coarse_dim": best["coarse_dim"],
+                "candidates_factor": best["candidates_factor"]
+            })
+            save_index_profile(profile, args.output)
+            print(f"📁 Perfil: {args.output} (aplica en la próxima carga: scripts/load_to_qdrant.py)")
+    print(f"📁 Reporte: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+# scripts/eval_retrieval.py
+"""
+Evaluación offline de la recuperación (sin LLM).
+
+Para cada configuración (solo vectorial / híbrida, búsqueda exacta /
+HNSW+quantización con y sin rescoring) y cada top_k, ejecuta las preguntas
+de scripts/gold_set.json contra la colección servida y calcula recall@k,
+MRR y nDCG@k junto a la latencia de búsqueda. Recomienda la configuración
+más barata que cumple los objetivos de calidad.
+
+Los chunks se identifican por (doc_id, chunk_id): chunk_id solo es único
+dentro de un documento. Un id suelto del gold set es del doc_id de la
+pregunta o, si no lo tiene, del documento de --chunks (el que carga
+load_to_qdrant.py).
+
+La relevancia sale de relevant_chunk_ids, revisados a mano con --curate;
+los términos de evidence solo se usan en las preguntas que aún no los tienen.
+
+Uso:
+    python scripts/eval_retrieval.py --top-k 1 3 5 10 --target-recall 0.8
+    python scripts/eval_retrieval.py --fake     # backends falsos, sin Qdrant ni Gemini
+    python scripts/eval_retrieval.py --curate   # revisar y guardar los chunks relevantes
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+from src.infrastructure.cache.shared_cache import SharedCache, make_key
+
+# text_weight: peso del score de texto en hybrid_search; search: parámetros de Qdrant
+CONFIGS = {
+    "vector_exact": {"text_weight": 0.0, "search": "exact"},
+    "vector": {"text_weight": 0.0, "search": "profile"},
+    "vector_no_rescore": {"text_weight": 0.0, "search": "no_rescore"},
+    "hybrid_exact": {"text_weight": 0.2, "search": "exact"},
+    "hybrid": {"text_weight": 0.2, "search": "profile"},
+    "hybrid_no_rescore": {"text_weight": 0.2, "search": "no_rescore"},
+}
+
+
+def default_doc_id() -> str:
+    """doc_id con el que load_to_qdrant.py carga output/chunks_with_embeddings.json"""
+    from src.infrastructure.vector_store.qdrant_store_optimized import make_doc_id
+    try:
+        with open('output/extracted_text.json', 'r') as f:
+            source = json.load(f).get('source_file', 'unknown')
+    except (OSError, ValueError):
+        source = 'unknown'
+    return make_doc_id(source)
+
+
+def load_chunks(path: str, doc_id: str) -> List[Dict]:
+    """Chunks del corpus con su doc_id (los del fichero de embeddings no lo llevan)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    return [{**chunk, "doc_id": chunk.get("doc_id") or doc_id} for chunk in chunks]
+
+
+def chunk_key(doc_id: Optional[str], chunk_id) -> Tuple[Optional[str], int]:
+    return doc_id, int(chunk_id)
+
+
+def evidence_gains(item: Dict, chunks: List[Dict]) -> Dict:
+    """Chunks que contienen términos de evidence → nº de términos (candidatos, no curados)"""
+    evidence = [term.lower() for term in item.get("evidence", [])]
+    gains = {}
+    for chunk in chunks:
+        # Con doc_id en la pregunta solo cuentan los chunks de ese documento
+        if item.get("doc_id") and chunk["doc_id"] != item["doc_id"]:
+            continue
+        content = chunk["content"].lower()
+        matched = sum(1 for term in evidence if term in content)
+        if matched:
+            gains[chunk_key(chunk["doc_id"], chunk.get("id", chunk.get("chunk_id")))] = matched
+    return gains
+
+
+def load_gold(path: str, chunks: List[Dict], doc_id: str) -> List[Dict]:
+    """Preguntas con sus chunks relevantes: (doc_id, chunk_id) → ganancia
+
+    relevant_chunk_ids admite ids sueltos o {"doc_id", "chunk_id", "gain"}
+    (gain por defecto 1). Sin relevant_chunk_ids se recurre a evidence.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        gold = json.load(f)
+
+    questions = []
+    for item in gold["questions"]:
+        gains = {}
+        for ref in item.get("relevant_chunk_ids", []):
+            if isinstance(ref, dict):
+                key = chunk_key(ref.get("doc_id") or item.get("doc_id") or doc_id, ref["chunk_id"])
+                gain = ref.get("gain", 1)
+            else:
+                key = chunk_key(item.get("doc_id") or doc_id, ref)
+                gain = 1
+            gains[key] = max(gains.get(key, 0), gain)
+        curated = bool(gains)
+        if not curated:
+            gains = evidence_gains(item, chunks)
+        questions.append({**item, "gains": gains, "curated": curated})
+    return questions
+
+
+def recall_at_k(retrieved: List, gains: Dict, k: int) -> float:
+    """Relevantes recuperados entre los que caben en k (1.0 = top_k lleno de relevantes)"""
+    return len(set(retrieved[:k]) & set(gains)) / min(k, len(gains))
+
+
+def reciprocal_rank(retrieved: List, gains: Dict) -> float:
+    for rank, chunk_id in enumerate(retrieved, 1):
+        if chunk_id in gains:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at_k(retrieved: List, gains: Dict, k: int) -> float:
+    dcg = sum(gains.get(chunk_id, 0) / math.log2(rank + 1) for rank, chunk_id in enumerate(retrieved[:k], 1))
+    ideal = sorted(gains.values(), reverse=True)[:k]
+    idcg = sum(gain / math.log2(rank + 1) for rank, gain in enumerate(ideal, 1))
+    return dcg / idcg if idcg else 0.0
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def embed_questions(questions: List[Dict], fake: bool) -> Dict[str, List[float]]:
+    """Embeddings de las preguntas (misma caché que el API: no se repiten llamadas)"""
+    if fake:
+        from src.infrastructure.llm.fake_gemini import fake_embedding
+        return {q["question"]: fake_embedding(q["question"]) for q in questions}
+
+    from src.infrastructure.embeddings.providers import get_embedding_provider
+    embedder = get_embedding_provider()
+    cache = SharedCache('query_embeddings')
+    embeddings = {}
+    for q in questions:
+        key = make_key(embedder.name, 'retrieval_query', q["question"])
+        embedding = cache.get(key)
+        if embedding is None:
+            embedding = embedder.embed_query(q["question"])
+            cache.set(key, embedding)
+        embeddings[q["question"]] = embedding
+    return embeddings
+
+
+def search_params_for(store, mode: str):
+    if mode == "profile" or not hasattr(store, "profile"):
+        return None
+    from src.infrastructure.vector_store.index_profile import build_search_params
+    if mode == "exact":
+        return build_search_params(store.profile["search"], exact=True)
+    # Quantización sin rescoring con los vectores originales
+    return build_search_params({**store.profile["search"], "rescore": False})
+
+
+def evaluate(store, questions: List[Dict], embeddings: Dict, config: Dict, top_k: int, repeat: int) -> Dict:
+    search_params = search_params_for(store, config["search"])
+    recalls, rrs, ndcgs, latencies = [], [], [], []
+
+    for q in questions:
+        filters = {"doc_id": q["doc_id"]} if q.get("doc_id") else None
+
+        def search():
+            return store.hybrid_search(
+                query_embedding=embeddings[q["question"]],
+                query_text=q["question"],
+                top_k=top_k,
+                filters=filters,
+                text_weight=config["text_weight"],
+                search_params=search_params
+            )
+
+        search()  # calentamiento
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = search()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        retrieved = [chunk_key(r["metadata"].get("doc_id"), r["metadata"]["chunk_id"]) for r in results]
+        recalls.append(recall_at_k(retrieved, q["gains"], top_k))
+        rrs.append(reciprocal_rank(retrieved, q["gains"]))
+        ndcgs.append(ndcg_at_k(retrieved, q["gains"], top_k))
+
+    return {
+        "recall@k": round(sum(recalls) / len(recalls), 4),
+        "mrr": round(sum(rrs) / len(rrs), 4),
+        "ndcg@k": round(sum(ndcgs) / len(ndcgs), 4),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+    }
+
+
+def recommend(report: List[Dict], target_recall: float, target_ndcg: Optional[float]) -> Optional[Dict]:
+    """La configuración más rápida (y con menor top_k) que cumple los objetivos"""
+    candidates = [
+        r for r in report
+        if r["recall@k"] >= target_recall and (target_ndcg is None or r["ndcg@k"] >= target_ndcg)
+    ]
+    return min(candidates, key=lambda r: (r["p50_ms"], r["top_k"])) if candidates else None
+
+
+def curate(path: str, chunks: List[Dict], store, fake: bool, candidates: int = 10):
+    """Revisión a mano de los chunks relevantes de las preguntas sin relevant_chunk_ids
+
+    Propone los chunks con términos de evidence y los primeros de una búsqueda
+    exacta; lo elegido se guarda en el gold set como {"doc_id", "chunk_id", "gain"}.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        gold = json.load(f)
+    by_key = {chunk_key(c["doc_id"], c.get("id", c.get("chunk_id"))): c for c in chunks}
+    pending = [item for item in gold["questions"] if not item.get("relevant_chunk_ids")]
+    if not pending:
+        print("✅ Todas las preguntas tienen relevant_chunk_ids")
+        return
+    embeddings = embed_questions(pending, fake)
+    search_params = search_params_for(store, "exact")
+
+    for item in pending:
+        evidence = evidence_gains(item, chunks)
+        proposed = sorted(evidence, key=lambda key: -evidence[key])[:candidates]
+        results = store.hybrid_search(
+            query_embedding=embeddings[item["question"]],
+            query_text=item["question"],
+            top_k=candidates,
+            filters={"doc_id": item["doc_id"]} if item.get("doc_id") else None,
+            search_params=search_params
+        )
+        for r in results:
+            key = chunk_key(r["metadata"].get("doc_id"), r["metadata"]["chunk_id"])
+            if key not in proposed:
+                proposed.append(key)
+
+        print(f"\n❓ {item['question']}")
+        for n, key in enumerate(proposed, 1):
+            text = by_key.get(key, {}).get("content", "").replace("\n", " ")
+            tag = f"evidence={evidence[key]}" if key in evidence else "búsqueda"
+            print(f"  [{n:2d}] {key[0]}:{key[1]} ({tag}) {text[:160]}")
+        answer = input("Relevantes (números, 'n:ganancia' para graduar; vacío = saltar): ").split()
+        refs = []
+        for token in answer:
+            number, _, gain = token.partition(":")
+            doc, chunk_id = proposed[int(number) - 1]
+            refs.append({"doc_id": doc, "chunk_id": chunk_id, "gain": int(gain or 1)})
+        if refs:
+            item["relevant_chunk_ids"] = refs
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(gold, f, indent=2, ensure_ascii=False)
+    print(f"\n📁 Gold set actualizado: {path}")
+
+
+def build_store(args, chunks: List[Dict]):
+    if args.fake:
+        from src.infrastructure.vector_store.fake_store import FakeVectorStore
+        return FakeVectorStore(chunks=chunks, latency_s=0)
+    from src.infrastructure.vector_store.qdrant_store_optimized import QdrantOptimizedStore
+    return QdrantOptimizedStore(host=args.host, port=args.port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluación de recuperación: recall@k, MRR, nDCG y latencia")
+    parser.add_argument("--gold", default="scripts/gold_set.json")
+    parser.add_argument("--chunks", default="output/chunks_with_embeddings.json")
+    parser.add_argument("--doc-id", default=None,
+                        help="doc_id de los chunks de --chunks (por defecto, el de load_to_qdrant.py)")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por pregunta para la latencia")
+    parser.add_argument("--target-recall", type=float, default=0.8)
+    parser.add_argument("--target-ndcg", type=float, default=None)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6333)
+    parser.add_argument("--fake", action="store_true", help="FakeVectorStore + embeddings falsos")
+    parser.add_argument("--curate", action="store_true",
+                        help="Revisar y guardar relevant_chunk_ids de las preguntas que no los tienen")
+    parser.add_argument("--output", default="output/retrieval_eval.json")
+    args = parser.parse_args()
+
+    doc_id = args.doc_id or default_doc_id()
+    chunks = load_chunks(args.chunks, doc_id)
+
+    if args.curate:
+        curate(args.gold, chunks, build_store(args, chunks), args.fake)
+        return
+
+    questions = load_gold(args.gold, chunks, doc_id)
+    skipped = [q["question"] for q in questions if not q["gains"]]
+    questions = [q for q in questions if q["gains"]]
+    if skipped:
+        print(f"⚠️ Sin chunks relevantes en el corpus (se omiten): {skipped}")
+    if not questions:
+        print("❌ Ninguna pregunta del gold set tiene chunks relevantes")
+        return
+    uncurated = [q["question"] for q in questions if not q["curated"]]
+    if uncurated:
+        print(f"⚠️ {len(uncurated)} preguntas sin relevant_chunk_ids usan evidence (revisar con --curate)")
+
+    store = build_store(args, chunks)
+    embeddings = embed_questions(questions, args.fake)
+
+    print(f"📋 {len(questions)} preguntas · configuraciones: {', '.join(args.configs)} · top_k: {args.top_k}\n")
+    print(f"{'config':20s} {'k':>3s} {'recall':>7s} {'mrr':>6s} {'ndcg':>6s} {'p50ms':>7s} {'p95ms':>7s}")
+
+    report = []
+    for name in args.configs:
+        for top_k in args.top_k:
+            metrics = evaluate(store, questions, embeddings, CONFIGS[name], top_k, args.repeat)
+            row = {"config": name, "top_k": top_k, **CONFIGS[name], **metrics}
+            report.append(row)
+            print(f"{name:20s} {top_k:3d} {row['recall@k']:7.3f} {row['mrr']:6.3f} {row['ndcg@k']:6.3f} "
+                  f"{row['p50_ms']:7.2f} {row['p95_ms']:7.2f}")
+
+    best = recommend(report, args.target_recall, args.target_ndcg)
+    if best:
+        print(f"\n🏆 Más barata que cumple recall@k ≥ {args.target_recall}: "
+              f"{best['config']} con top_k={best['top_k']} (p50 {best['p50_ms']}ms)")
+    else:
+        print(f"\n⚠️ Ninguna configuración alcanza recall@k ≥ {args.target_recall}")
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({
+            "questions": len(questions),
+            "skipped": skipped,
+            "uncurated": uncurated,
+            "target_recall": args.target_recall,
+            "target_ndcg": args.target_ndcg,
+            "recommended": best,
+            "results": report
+        }, f, indent=2, ensure_ascii=False)
+    print(f"📁 Reporte: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
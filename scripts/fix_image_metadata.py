@@ -7,12 +7,13 @@ Conecta chunks con imágenes por número de página
 import json
 import sys
 import os
-from qdrant_client import QdrantClient
 from qdrant_client.models import Filter, FieldCondition, MatchValue
 
 # Path fix
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.infrastructure.vector_store.qdrant_store_optimized import QdrantOptimizedStore
+
 
 def fix_metadata():
     """Arregla metadata de chunks para conectar con imágenes"""
@@ -20,9 +21,10 @@ def fix_metadata():
     print("🔧 INICIANDO CORRECCIÓN DE METADATA")
     print("=" * 50)
 
-    # 1. Conectar a Qdrant
-    client = QdrantClient(host="localhost", port=6333)
-    collection_name = "indra_rag_optimized"
+    # 1. Conectar a Qdrant (versión servida tras el alias) y al ChunkStore
+    store = QdrantOptimizedStore()
+    client = store.client
+    collection_name = store.resolve_collection()
 
     # 2. Cargar datos necesarios
     print("\n📁 Cargando archivos...")
@@ -113,7 +115,7 @@ def fix_metadata():
             collection_name=collection_name,
             limit=100,
             offset=offset,
-            with_payload=True,
+            with_payload=["chunk_id"],
             with_vectors=False
         )
 
@@ -145,20 +147,20 @@ def fix_metadata():
         # Determinar si tiene imagen
         has_image = page in pages_with_images
 
-        # Preparar payload actualizado
+        # En Qdrant solo los campos filtrables (set_payload conserva el resto)
         updated_payload = {
-            **payload,  # Mantener todo lo existente
             'page': page,
-            'has_image': has_image,
-            'pages_with_images': list(pages_with_images) if has_image else []
+            'has_image': has_image
         }
 
-        # Si tiene imagen, agregar paths
+        # Rutas y descripciones de imágenes: al ChunkStore, no al payload
         if has_image:
             images_in_page = image_by_page.get(page, [])
             if images_in_page:
-                updated_payload['image_paths'] = [img['path'] for img in images_in_page]
-                updated_payload['image_descriptions'] = [img.get('description', '') for img in images_in_page]
+                store.chunk_store.update_extra(collection_name, str(point_id), {
+                    'image_paths': [img['path'] for img in images_in_page],
+                    'image_descriptions': [img.get('description', '') for img in images_in_page]
+                })
                 image_chunks_count += 1
 
         # Actualizar en Qdrant
@@ -191,7 +193,8 @@ def fix_metadata():
                 )
             ]
         ),
-        limit=100
+        limit=100,
+        with_payload=["chunk_id", "page"]
     )
 
     points_with_images, _ = results
@@ -202,9 +205,10 @@ def fix_metadata():
         print("\n📸 Ejemplos de chunks con imágenes:")
         for point in points_with_images[:3]:
             print(f"   - Chunk {point.payload.get('chunk_id')} en página {point.payload.get('page')}")
-            print(f"     Texto: {point.payload.get('text', '')[:100]}...")
-            if point.payload.get('image_paths'):
-                print(f"     Imágenes: {point.payload.get('image_paths')}")
+            stored = store.chunk_store.get_many(collection_name, [str(point.id)]).get(str(point.id), {})
+            print(f"     Texto: {stored.get('content', '')[:100]}...")
+            if stored.get('image_paths'):
+                print(f"     Imágenes: {stored.get('image_paths')}")
 
     print("\n✨ ¡Metadata corregida! Ahora las búsquedas de imágenes funcionarán.")
     print("🚀 Ejecuta 'python scripts/test_full_system.py' para verificar")
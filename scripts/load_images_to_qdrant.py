@@ -0,0 +1,35 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+from src.infrastructure.vector_store.qdrant_store_optimized import QdrantOptimizedStore
+from src.infrastructure.embeddings.embeddings_generator import EmbeddingsGenerator
+
+# Imágenes analizadas por ImageAnalyzer
+with open('output/images_with_context.json', 'r') as f:
+    images = json.load(f)
+
+# Solo imágenes con descripción válida (las fallidas quedan con analyzed=False)
+images = [
+    img for img in images
+    if img.get('analyzed') and img.get('description')
+    and not img['description'].startswith('Error al analizar')
+]
+
+print(f"📊 Generando embeddings para {len(images)} descripciones de imágenes...")
+
+generator = EmbeddingsGenerator()
+embeddings = [generator.embed_document(img['description']) for img in images]
+
+# Cargar en una versión nueva de la colección de imágenes y cambiar el alias
+store = QdrantOptimizedStore()
+alias = store.images_collection_name
+new_collection = store.new_version_name(alias)
+store.initialize_images_collection(vector_size=generator.provider.dim, collection_name=new_collection)
+# Identidad del modelo con la versión: el import de bundles la comprueba
+store.record_embedding_model(generator.provider.identity(), new_collection)
+store.add_images_batch(images, embeddings, collection_name=new_collection)
+store.swap_alias(new_collection, alias=alias)
+store.garbage_collect_versions(alias=alias, keep=2)
+print("✅ Imágenes cargadas en Qdrant")
@@ -0,0 +1,276 @@
+# scripts/load_test.py
+"""
+Prueba de carga en lazo abierto contra el API (/query).
+
+Las peticiones salen a ritmo fijo (o Poisson) independientemente de las
+que sigan en vuelo, y la latencia se mide desde el instante en que cada
+petición debía salir: si el API se atasca, la cola se ve en la latencia
+en lugar de frenar al generador (coordinated omission).
+
+Por cada escalón de ritmo reporta throughput, percentiles de latencia y
+tasa de errores por código, y estima el punto de saturación. Por defecto
+arranca el API con Gemini y vector store falsos (RAG_FAKE_BACKENDS=1).
+
+Uso:
+    python scripts/load_test.py --rates 5 10 20 40 80 --duration 20
+    python scripts/load_test.py --url http://localhost:8000 --rates 2 4 8   # API ya arrancado
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+
+DEFAULT_QUESTIONS = [
+    "¿Quiénes son los autores del documento?",
+    "¿Qué es Competiscan y qué resultados obtuvo?",
+    "Muestra el diagrama de arquitectura de la solución",
+    "¿Cuáles son los patrones de procesamiento disponibles?",
+]
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def load_questions(path: Optional[str]) -> List[str]:
+    """Mezcla de preguntas: fichero JSON (lista o gold set) o la lista por defecto"""
+    path = path or 'scripts/gold_set.json'
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return DEFAULT_QUESTIONS
+    items = data.get("questions", []) if isinstance(data, dict) else data
+    questions = [q["question"] if isinstance(q, dict) else q for q in items]
+    return questions or DEFAULT_QUESTIONS
+
+
+def start_api(port: int, workers: int, env: Dict[str, str]) -> subprocess.Popen:
+    """API local con backends falsos y caché aislada (compartida por sus workers)"""
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env={
+            **os.environ,
+            "RAG_FAKE_BACKENDS": "1",
+            "CACHE_DIR": tempfile.mkdtemp(prefix='rag_load_cache_'),
+            # Sin calentamiento ni registro de consultas: no se mezclan con la medida
+            "WARMUP_ENABLED": "0",
+            "QUERY_LOG": "0",
+            **env
+        },
+        stdout=subprocess.DEVNULL
+    )
+
+
+def wait_ready(base_url: str, timeout: float) -> bool:
+    start = time.time()
+    while time.time() - start < timeout:
+        try:
+            if httpx.get(f"{base_url}/readyz", timeout=1).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    return False
+
+
+async def run_step(client: httpx.AsyncClient, base_url: str, rate: float, args, questions: List[str]) -> Dict:
+    """Un escalón: rate peticiones/s durante args.duration segundos"""
+    results = []
+    tasks = []
+    # Retraso del propio generador respecto al calendario (debe ser ~0)
+    max_lag = 0.0
+    # Generadores separados: cambiar la mezcla de preguntas (--sequential) no
+    # cambia el calendario de llegadas, y viceversa
+    seed = args.seed + int(rate * 1000)
+    arrivals_rng = random.Random(f"arrivals-{seed}")
+    mix_rng = random.Random(f"mix-{seed}")
+
+    async def one(i: int, scheduled: float, question: str):
+        if args.unique:
+            # Cada petición llega a los backends (sin caché de respuestas)
+            question = f"{question} #{rate}-{i}"
+        payload = {"question": question, "top_k": args.top_k, "include_image_data": False}
+        status = None
+        try:
+            response = await client.post(f"{base_url}{args.endpoint}", json=payload, timeout=args.timeout)
+            status = response.status_code
+        except httpx.TimeoutException:
+            status = "timeout"
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        # Desde el instante programado, no desde el envío real
+        results.append({"status": status, "latency_ms": (time.perf_counter() - scheduled) * 1000})
+
+    loop_start = time.perf_counter()
+    next_at = loop_start
+    i = 0
+    while next_at - loop_start < args.duration:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        max_lag = max(max_lag, time.perf_counter() - next_at)
+        # La pregunta se elige al programarla: el orden no depende de cuándo arranque la tarea
+        question = questions[i % len(questions)] if args.sequential else mix_rng.choice(questions)
+        tasks.append(asyncio.create_task(one(i, next_at, question)))
+        i += 1
+        next_at += arrivals_rng.expovariate(rate) if args.arrivals == "poisson" else 1.0 / rate
+
+    sent_s = time.perf_counter() - loop_start
+    # Esperar a las que siguen en vuelo (como mucho el timeout de una petición)
+    pending = set()
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=args.timeout + 5)
+    elapsed = max(time.perf_counter() - loop_start, args.duration)
+    for task in pending:
+        task.cancel()
+
+    ok = [r["latency_ms"] for r in results if r["status"] == 200]
+    latencies = [r["latency_ms"] for r in results]
+    by_status: Dict[str, int] = {}
+    for r in results:
+        by_status[str(r["status"])] = by_status.get(str(r["status"]), 0) + 1
+    if pending:
+        by_status["unfinished"] = len(pending)
+    errors = i - len(ok)
+
+    return {
+        "target_rps": rate,
+        "sent": i,
+        "completed": len(results),
+        "offered_rps": round(i / sent_s, 2) if sent_s else None,
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else None,
+        "error_rate": round(errors / i, 4) if i else None,
+        "status": by_status,
+        "latency_ms": {
+            "p50": _round(percentile(ok, 50)),
+            "p90": _round(percentile(ok, 90)),
+            "p99": _round(percentile(ok, 99)),
+            "max": _round(max(ok) if ok else None)
+        },
+        # Incluye errores y timeouts: lo que percibe un cliente cualquiera
+        "latency_all_ms": {
+            "p50": _round(percentile(latencies, 50)),
+            "p99": _round(percentile(latencies, 99))
+        },
+        "generator_max_lag_ms": round(max_lag * 1000, 1)
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
+def saturation(steps: List[Dict], slo_ms: float, max_error_rate: float) -> Optional[float]:
+    """Mayor ritmo que cumple el SLO de p99, la tasa de errores y sirve lo ofrecido"""
+    best = None
+    for step in steps:
+        p99 = step["latency_ms"]["p99"]
+        healthy = (
+            p99 is not None and p99 <= slo_ms
+            and (step["error_rate"] or 0) <= max_error_rate
+            and (step["throughput_rps"] or 0) >= 0.9 * (step["offered_rps"] or step["target_rps"])
+        )
+        if not healthy:
+            break
+        best = step["target_rps"]
+    return best
+
+
+async def run(args, base_url: str) -> List[Dict]:
+    questions = load_questions(args.questions)
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    steps = []
+    async with httpx.AsyncClient(limits=limits) as client:
+        for rate in args.rates:
+            step = await run_step(client, base_url, rate, args, questions)
+            steps.append(step)
+            lat = step["latency_ms"]
+            print(f"📊 {rate:>7.1f} rps → {step['throughput_rps']} rps servidas, "
+                  f"p50={lat['p50']}ms p90={lat['p90']}ms p99={lat['p99']}ms, "
+                  f"errores={step['error_rate'] or 0:.1%} {step['status']}")
+            if args.cooldown:
+                await asyncio.sleep(args.cooldown)
+    return steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga en lazo abierto del API")
+    parser.add_argument("--url", default=None, help="API ya arrancado (por defecto se arranca uno con backends falsos)")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--endpoint", default="/query")
+    parser.add_argument("--rates", type=float, nargs="+", default=[5, 10, 20, 40, 80])
+    parser.add_argument("--duration", type=float, default=20, help="Segundos por escalón")
+    parser.add_argument("--cooldown", type=float, default=2, help="Pausa entre escalones")
+    parser.add_argument("--arrivals", choices=["constant", "poisson"], default="poisson")
+    parser.add_argument("--questions", default=None, help="JSON con la mezcla de preguntas (por defecto el gold set)")
+    parser.add_argument("--sequential", action="store_true", help="Recorrer las preguntas en orden")
+    parser.add_argument("--unique", action="store_true", help="Pregunta distinta cada vez (sin caché de respuestas)")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--max-connections", type=int, default=1000)
+    parser.add_argument("--slo-p99-ms", type=float, default=2000)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--gemini-latency", type=float, default=0.05, help="Latencia del Gemini falso (s)")
+    parser.add_argument("--slow-probability", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=1, help="Workers de uvicorn del API arrancado")
+    parser.add_argument("--output", default="output/load_test.json")
+    args = parser.parse_args()
+
+    proc = None
+    base_url = args.url
+    if base_url is None:
+        env = {
+            "FAKE_GEMINI_LATENCY_S": str(args.gemini_latency),
+            "FAKE_SLOW_PROBABILITY": str(args.slow_probability),
+        }
+        proc = start_api(args.port, args.workers, env)
+        base_url = f"http://127.0.0.1:{args.port}"
+        print(f"🚀 API con backends falsos en {base_url}")
+
+    try:
+        if not wait_ready(base_url, 120):
+            print(f"❌ {base_url}/readyz no respondió 200")
+            sys.exit(1)
+        steps = asyncio.run(run(args, base_url))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "url": base_url,
+        "endpoint": args.endpoint,
+        "arrivals": args.arrivals,
+        "duration_s": args.duration,
+        "fake_backends": args.url is None,
+        "slo_p99_ms": args.slo_p99_ms,
+        "saturation_rps": saturation(steps, args.slo_p99_ms, args.max_error_rate),
+        "steps": steps
+    }
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"🎯 Punto de saturación (p99 ≤ {args.slo_p99_ms:.0f}ms): {report['saturation_rps']} rps")
+    print(f"📁 Reporte: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,21 +3,34 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import json
-from src.infrastructure.vector_store.qdrant_store_optimized import QdrantOptimizedStore
+from src.infrastructure.vector_store.qdrant_store_optimized import QdrantOptimizedStore, make_doc_id
+from src.infrastructure.embeddings.embeddings_generator import load_embedding_model
 
-# Inicializar Qdrant
 store = QdrantOptimizedStore()
-store.initialize_collection_pro(vector_size=768)
 
 # Cargar chunks con embeddings
 with open('output/chunks_with_embeddings.json', 'r') as f:
     chunks = json.load(f)
 
+# Documento de origen (para filtros por documento/fuente)
+try:
+    with open('output/extracted_text.json', 'r') as f:
+        source = json.load(f).get('source_file', 'unknown')
+except (OSError, ValueError):
+    source = 'unknown'
+
 # Preparar datos
 texts = [c['content'] for c in chunks]
 embeddings = [c['embedding'] for c in chunks]
-metadata = [{'chunk_id': c['id'], 'page': i//3 + 1, 'has_image': False} for i, c in enumerate(chunks)]
+metadata = [
+    # Página estimada por id original (la deduplicación deja huecos en la lista)
+    {'chunk_id': c['id'], 'page': c['id']//3 + 1, 'has_image': False, 'source': source, 'doc_id': make_doc_id(source),
+     'duplicates': c.get('duplicates')}
+    for c in chunks
+]
 
-# Cargar
-store.add_documents_batch(texts, embeddings, metadata)
+# Cargar en una versión nueva y cambiar el alias al terminar (sin caída);
+# la versión registra el modelo de embeddings para que el API lo verifique
+store.rebuild_collection(texts, embeddings, metadata, vector_size=len(embeddings[0]),
+                         embedding_model=load_embedding_model())
 print("✅ Datos cargados en Qdrant")
\ No newline at end of file
@@ -0,0 +1,67 @@
+# scripts/manage_documents.py
+"""
+Gestión por documento de la colección servida (sin reconstruir el resto).
+
+Uso:
+    python scripts/manage_documents.py list
+    python scripts/manage_documents.py delete <doc_id>
+    python scripts/manage_documents.py reload [--chunks output/chunks_with_embeddings.json]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+
+from src.infrastructure.vector_store.qdrant_store_optimized import QdrantOptimizedStore, make_doc_id
+from src.infrastructure.embeddings.embeddings_generator import load_embedding_model
+
+
+def load_document(chunks_path: str, extracted_path: str):
+    with open(chunks_path, 'r') as f:
+        chunks = json.load(f)
+    try:
+        with open(extracted_path, 'r') as f:
+            source = json.load(f).get('source_file', 'unknown')
+    except (OSError, ValueError):
+        source = 'unknown'
+
+    texts = [c['content'] for c in chunks]
+    embeddings = [c['embedding'] for c in chunks]
+    metadata = [
+        {'chunk_id': c['id'], 'page': c['id']//3 + 1, 'has_image': False, 'source': source,
+         'duplicates': c.get('duplicates')}
+        for c in chunks
+    ]
+    return make_doc_id(source), texts, embeddings, metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gestión de documentos en Qdrant")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Documentos y número de chunks")
+    delete = sub.add_parser("delete", help="Eliminar un documento")
+    delete.add_argument("doc_id")
+    reload = sub.add_parser("reload", help="Recargar un documento procesado")
+    reload.add_argument("--chunks", default="output/chunks_with_embeddings.json")
+    reload.add_argument("--extracted", default="output/extracted_text.json")
+    args = parser.parse_args()
+
+    store = QdrantOptimizedStore()
+    print(f"📚 Colección: {store.resolve_collection()} "
+          f"({'shard keys' if store.uses_shard_keys() else 'índice tenant'})")
+
+    if args.command == "list":
+        for doc_id, count in store.list_documents().items():
+            print(f"   {doc_id}: {count} chunks")
+    elif args.command == "delete":
+        store.delete_document(args.doc_id)
+    elif args.command == "reload":
+        doc_id, texts, embeddings, metadata = load_document(args.chunks, args.extracted)
+        store.replace_document(doc_id, texts, embeddings, metadata, embedding_model=load_embedding_model())
+        print(f"✅ Documento '{doc_id}' recargado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# scripts/measure_startup.py
+"""
+Mide el arranque en frío del API: tiempo hasta liveness (/healthz) y hasta
+readiness (/readyz), con el desglose import/warmup que reporta el servicio.
+
+Uso:
+    python scripts/measure_startup.py --runs 3
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import subprocess
+import time
+
+import requests
+
+
+def wait_for(url: str, start: float, timeout: float) -> float:
+    while time.time() - start < timeout:
+        try:
+            if requests.get(url, timeout=0.5).status_code == 200:
+                return time.time() - start
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    return float("nan")
+
+
+def measure_once(port: int, timeout: float) -> dict:
+    start = time.time()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.main:app", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        live = wait_for(f"{base}/healthz", start, timeout)
+        ready = wait_for(f"{base}/readyz", start, timeout)
+        breakdown = requests.get(f"{base}/readyz", timeout=2).json()
+        return {"time_to_live_s": round(live, 3), "time_to_ready_s": round(ready, 3), "service": breakdown}
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Medición del arranque en frío del API")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    results = []
+    for i in range(args.runs):
+        result = measure_once(args.port, args.timeout)
+        results.append(result)
+        print(f"🚀 Run {i + 1}: live={result['time_to_live_s']}s ready={result['time_to_ready_s']}s "
+              f"(import={result['service'].get('import_s')}s, warmup={result['service'].get('warmup_s')}s)")
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
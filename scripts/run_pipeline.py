@@ -0,0 +1,78 @@
+# scripts/run_pipeline.py
+"""
+Ingesta incremental: extract → chunk → embed → load por documento.
+
+Solo repite las etapas cuya entrada o configuración cambió (ver
+src/application/ingest_pipeline.py). Los artefactos y el manifest de
+cada documento quedan en output/pipeline/<doc_id>/.
+
+Uso:
+    python scripts/run_pipeline.py                      # todos los PDFs de data/
+    python scripts/run_pipeline.py data/otro.pdf --chunk-size 800
+    python scripts/run_pipeline.py --force embed        # p.ej. tras cambiar de modelo
+    python scripts/run_pipeline.py --status
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import glob
+import time
+
+from src.application.ingest_pipeline import IngestPipeline, STAGES
+
+
+def find_pdfs(paths):
+    pdfs = []
+    for path in paths:
+        if os.path.isdir(path):
+            pdfs.extend(sorted(glob.glob(os.path.join(path, '*.pdf'))))
+        else:
+            pdfs.append(path)
+    return pdfs
+
+
+def print_status(pipeline: IngestPipeline):
+    documents = pipeline.documents()
+    if not documents:
+        print("📭 Ningún documento procesado todavía")
+        return
+    for doc_id, manifest in documents.items():
+        stages = manifest.get("stages", {})
+        done = [f"{stage} {stages[stage]['duration_s']}s" for stage in STAGES if stage in stages]
+        print(f"   {doc_id} ({manifest.get('source')}): {', '.join(done) or 'sin etapas'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline de ingesta incremental")
+    parser.add_argument("paths", nargs="*", default=["data"], help="PDFs o directorios")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--overlap", type=int, default=200)
+    parser.add_argument("--force", nargs="+", default=[], choices=STAGES, help="Repetir estas etapas")
+    parser.add_argument("--until", choices=STAGES, default=STAGES[-1], help="Última etapa a ejecutar")
+    parser.add_argument("--status", action="store_true", help="Mostrar el manifest y salir")
+    args = parser.parse_args()
+
+    pipeline = IngestPipeline(chunk_size=args.chunk_size, overlap=args.overlap)
+    if args.status:
+        print_status(pipeline)
+        return
+
+    pdfs = find_pdfs(args.paths)
+    if not pdfs:
+        print(f"❌ No hay PDFs en {args.paths}")
+        return
+
+    stages = STAGES[:STAGES.index(args.until) + 1]
+    start = time.time()
+    for pdf in pdfs:
+        print(f"\n📄 {pdf}")
+        pipeline.run_document(pdf, force=args.force, stages=stages)
+
+    print(f"\n✅ {len(pdfs)} documentos al día en {time.time() - start:.1f}s")
+    print_status(pipeline)
+
+
+if __name__ == "__main__":
+    main()
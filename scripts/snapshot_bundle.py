@@ -0,0 +1,63 @@
+# scripts/snapshot_bundle.py
+"""
+Exporta / importa el índice servido como un bundle portable (ver
+src/application/snapshot_bundle.py).
+
+Uso:
+    python scripts/snapshot_bundle.py export [--out output/bundles/<versión>]
+    python scripts/snapshot_bundle.py verify <bundle>
+    python scripts/snapshot_bundle.py import <bundle> [--no-swap] [--force]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+
+from src.application.snapshot_bundle import BundleError, SnapshotBundler
+from src.infrastructure.vector_store.qdrant_store_optimized import QdrantOptimizedStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bundles de snapshot del índice")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Empaquetar la versión servida")
+    export.add_argument("--out", help="Directorio del bundle (por defecto output/bundles/<versión>)")
+    verify = sub.add_parser("verify", help="Comprobar checksums sin restaurar")
+    verify.add_argument("bundle")
+    restore = sub.add_parser("import", help="Restaurar un bundle y servirlo")
+    restore.add_argument("bundle")
+    restore.add_argument("--no-swap", action="store_true", help="Restaurar sin cambiar el alias")
+    restore.add_argument("--force", action="store_true", help="Subir los snapshots aunque la colección exista")
+    restore.add_argument("--keep-versions", type=int, default=2)
+    restore.add_argument("--skip-model-check", action="store_true",
+                         help="No comprobar que EMBEDDING_PROVIDER coincide con el bundle")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6333)
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    bundler = SnapshotBundler(QdrantOptimizedStore(host=args.host, port=args.port), timeout=args.timeout)
+
+    try:
+        if args.command == "export":
+            bundler.export(args.out)
+        elif args.command == "verify":
+            manifest = bundler.verify(args.bundle)
+            print(f"✅ {len(manifest['files'])} ficheros correctos "
+                  f"({manifest['collections']['chunks']['name']}, {manifest['created_at']})")
+        else:
+            bundler.import_bundle(
+                args.bundle,
+                swap=not args.no_swap,
+                force=args.force,
+                keep_versions=args.keep_versions,
+                check_model=not args.skip_model_check
+            )
+    except (BundleError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
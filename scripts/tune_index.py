@@ -0,0 +1,258 @@
+# scripts/tune_index.py
+"""
+Afinado automático de HNSW + quantización + parámetros de búsqueda.
+
+Para cada configuración de índice crea una colección temporal con nuestros
+embeddings, mide recall@k contra búsqueda exacta, latencia y memoria
+estimada, y guarda el perfil más barato que cumple el recall objetivo en
+output/index_profile.json (lo usan initialize_collection_pro y hybrid_search).
+
+Uso:
+    python scripts/tune_index.py --target-recall 0.95 --top-k 5
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import copy
+import json
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from qdrant_client.models import CollectionStatus, OptimizersConfigDiff
+
+from src.infrastructure.vector_store.qdrant_store_optimized import QdrantOptimizedStore
+from src.infrastructure.vector_store.chunk_store import ChunkStore
+from src.infrastructure.vector_store.index_profile import (
+    DEFAULT_PROFILE, PROFILE_PATH, build_search_params,
+    estimate_memory_bytes, load_index_profile, save_index_profile
+)
+
+TUNING_COLLECTION = "indra_rag_tuning"
+
+QUANTIZATIONS = {
+    "none": None,
+    "scalar": {"type": "scalar", "quantile": 0.99, "always_ram": True},
+    "binary": {"type": "binary", "always_ram": True},
+    "product": {"type": "product", "compression": "x16", "always_ram": True},
+}
+
+
+def load_vectors(path: str, scale: int, noise: float) -> List[List[float]]:
+    """Embeddings del corpus; scale > 1 añade copias con ruido para simular un corpus mayor"""
+    with open(path, 'r') as f:
+        chunks = json.load(f)
+    vectors = [c['embedding'] for c in chunks]
+
+    rng = random.Random(42)
+    augmented = list(vectors)
+    for _ in range(scale - 1):
+        for v in vectors:
+            augmented.append([x + rng.gauss(0, noise) for x in v])
+    return augmented
+
+
+def load_queries(path: str, vectors: List[List[float]], count: int, noise: float) -> List[List[float]]:
+    """Embeddings de consultas reales si existen; si no, vectores del corpus perturbados"""
+    if path and os.path.exists(path):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return [q['embedding'] if isinstance(q, dict) else q for q in data][:count]
+
+    rng = random.Random(7)
+    sample = [rng.choice(vectors) for _ in range(count)]
+    return [[x + rng.gauss(0, noise) for x in v] for v in sample]
+
+
+def wait_until_indexed(store: QdrantOptimizedStore, timeout: float = 300):
+    """Espera a que HNSW cubra todos los puntos (indexing_threshold=1)
+
+    Verde no basta: el optimizador tarda en arrancar tras el upsert y la
+    colección sigue verde sin índice. Se exige indexed_vectors_count >=
+    points_count en dos lecturas seguidas.
+    """
+    start = time.time()
+    ready_reads = 0
+    while time.time() - start < timeout:
+        info = store.client.get_collection(store.collection_name)
+        indexed = (info.status == CollectionStatus.GREEN
+                   and (info.indexed_vectors_count or 0) >= (info.points_count or 0))
+        ready_reads = ready_reads + 1 if indexed else 0
+        if ready_reads >= 2:
+            return
+        time.sleep(0.5)
+    print("   ⚠️ Timeout esperando la optimización del índice")
+
+
+def run_queries(store: QdrantOptimizedStore, queries, top_k: int, search_params) -> (List[List[str]], List[float]):
+    ids, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        response = store.client.query_points(
+            collection_name=store.collection_name,
+            query=q,
+            limit=top_k,
+            search_params=search_params,
+            with_payload=False
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append([str(p.id) for p in response.points])
+    return ids, latencies
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def recall_at_k(results: List[List[str]], truth: List[List[str]]) -> float:
+    hits = sum(len(set(r) & set(t)) for r, t in zip(results, truth))
+    total = sum(len(t) for t in truth)
+    return hits / total if total else 0.0
+
+
+def search_grid(quantization, ef_values: List[int], oversampling_values: List[float]) -> List[Dict]:
+    grid = []
+    for ef in ef_values:
+        if quantization:
+            for oversampling in oversampling_values:
+                grid.append({"hnsw_ef": ef, "rescore": True, "oversampling": oversampling})
+        else:
+            grid.append({"hnsw_ef": ef, "rescore": None, "oversampling": None})
+    return grid
+
+
+def tune(args) -> Dict:
+    vectors = load_vectors(args.embeddings, args.scale, args.noise)
+    queries = load_queries(args.queries, vectors, args.num_queries, args.noise)
+    vector_size = len(vectors[0])
+    texts = [f"tuning-{i}" for i in range(len(vectors))]
+    metadata = [{"chunk_id": i} for i in range(len(vectors))]
+
+    print(f"🔧 Afinando índice: {len(vectors)} vectores ({vector_size}d), {len(queries)} consultas")
+
+    candidates = []
+    # Los chunks de las colecciones temporales no van al ChunkStore de producción
+    scratch_dir = tempfile.mkdtemp(prefix='rag_tuning_')
+    chunk_store = ChunkStore(os.path.join(scratch_dir, 'chunk_store.sqlite'))
+    try:
+        _tune_grid(args, vectors, queries, texts, metadata, chunk_store, candidates)
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    return {"candidates": candidates, "num_vectors": len(vectors), "vector_size": vector_size}
+
+
+def _tune_grid(args, vectors, queries, texts, metadata, chunk_store: ChunkStore, candidates: List[Dict]):
+    vector_size = len(vectors[0])
+    for m in args.m:
+        for ef_construct in args.ef_construct:
+            for q_name in args.quantization:
+                profile = copy.deepcopy(DEFAULT_PROFILE)
+                profile["hnsw"].update({"m": m, "ef_construct": ef_construct})
+                profile["quantization"] = copy.deepcopy(QUANTIZATIONS[q_name])
+
+                store = QdrantOptimizedStore(profile=profile, chunk_store=chunk_store)
+                store.collection_name = TUNING_COLLECTION
+                store.initialize_collection_pro(vector_size=vector_size, replace=True)
+
+                # Forzar construcción de HNSW aunque el corpus sea pequeño
+                store.client.update_collection(
+                    collection_name=TUNING_COLLECTION,
+                    optimizers_config=OptimizersConfigDiff(indexing_threshold=1)
+                )
+                store.add_documents_batch(texts, vectors, metadata, batch_size=256)
+                wait_until_indexed(store)
+
+                # Verdad de referencia: búsqueda exacta sin quantización
+                truth, exact_latencies = run_queries(store, queries, args.top_k, build_search_params(None, exact=True))
+                memory = estimate_memory_bytes(profile, len(vectors), vector_size)
+
+                for search in search_grid(profile["quantization"], args.hnsw_ef, args.oversampling):
+                    results, latencies = run_queries(store, queries, args.top_k, build_search_params(search))
+                    candidate = {
+                        "hnsw": {"m": m, "ef_construct": ef_construct},
+                        "quantization": profile["quantization"],
+                        "search": search,
+                        "recall": round(recall_at_k(results, truth), 4),
+                        "latency_p50_ms": round(percentile(latencies, 50), 3),
+                        "latency_p95_ms": round(percentile(latencies, 95), 3),
+                        "exact_latency_p50_ms": round(percentile(exact_latencies, 50), 3),
+                        "memory_bytes": memory["ram_total"]
+                    }
+                    candidates.append(candidate)
+                    print(f"   m={m} ef_c={ef_construct} q={q_name} ef={search['hnsw_ef']} "
+                          f"os={search['oversampling']} → recall={candidate['recall']:.3f} "
+                          f"p95={candidate['latency_p95_ms']:.2f}ms mem={memory['ram_total'] / 1e6:.1f}MB")
+
+                store.client.delete_collection(TUNING_COLLECTION)
+                chunk_store.delete_collection(TUNING_COLLECTION)
+
+
+def choose_profile(candidates: List[Dict], target_recall: float) -> Dict:
+    """El más barato (latencia p95, luego memoria) que alcanza el recall objetivo"""
+    eligible = [c for c in candidates if c["recall"] >= target_recall]
+    if not eligible:
+        print(f"⚠️ Ninguna configuración alcanza recall {target_recall}; se elige la de mayor recall")
+        return max(candidates, key=lambda c: (c["recall"], -c["latency_p95_ms"]))
+    return min(eligible, key=lambda c: (c["latency_p95_ms"], c["memory_bytes"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Afinado de HNSW/quantización para Qdrant")
+    parser.add_argument("--embeddings", default="output/chunks_with_embeddings.json")
+    parser.add_argument("--queries", default="output/query_embeddings.json",
+                        help="JSON con embeddings de consultas reales (opcional)")
+    parser.add_argument("--num-queries", type=int, default=100)
+    parser.add_argument("--scale", type=int, default=1, help="Multiplicador sintético del corpus")
+    parser.add_argument("--noise", type=float, default=0.01)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--m", type=int, nargs="+", default=[16, 32])
+    parser.add_argument("--ef-construct", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--quantization", nargs="+", default=list(QUANTIZATIONS),
+                        choices=list(QUANTIZATIONS))
+    parser.add_argument("--hnsw-ef", type=int, nargs="+", default=[32, 64, 128, 256])
+    parser.add_argument("--oversampling", type=float, nargs="+", default=[1.0, 2.0, 4.0])
+    parser.add_argument("--output", default=PROFILE_PATH)
+    parser.add_argument("--report", default="output/index_tuning_report.json")
+    args = parser.parse_args()
+
+    report = tune(args)
+    best = choose_profile(report["candidates"], args.target_recall)
+
+    # Solo cambian hnsw / quantization / search / tuning: la partición, los
+    # optimizadores y las dos etapas (benchmark_two_stage.py) se conservan
+    profile = load_index_profile(args.output)
+    profile["hnsw"].update(best["hnsw"])
+    profile["quantization"] = best["quantization"]
+    profile["search"] = best["search"]
+    profile["tuning"] = {
+        "tuned_at": datetime.now().isoformat(timespec="seconds"),
+        "target_recall": args.target_recall,
+        "top_k": args.top_k,
+        "recall": best["recall"],
+        "latency_p95_ms": best["latency_p95_ms"],
+        "memory_bytes": best["memory_bytes"],
+        "num_vectors": report["num_vectors"]
+    }
+    save_index_profile(profile, args.output)
+
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n✅ Perfil elegido: m={best['hnsw']['m']} ef_construct={best['hnsw']['ef_construct']} "
+          f"quantización={(best['quantization'] or {}).get('type', 'ninguna')} "
+          f"hnsw_ef={best['search']['hnsw_ef']}")
+    print(f"   recall@{args.top_k}={best['recall']:.3f}, p95={best['latency_p95_ms']:.2f}ms")
+    print(f"📁 Perfil: {args.output}")
+    print(f"📁 Reporte: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
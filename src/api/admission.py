@@ -0,0 +1,92 @@
+# src/api/admission.py
+"""
+Control de admisión de consultas (por worker del API).
+
+Como mucho `max_in_flight` consultas en curso; las siguientes esperan en
+una cola corta (`max_queue`, como mucho `queue_timeout_s` o lo que quede
+de su plazo). Con la cola llena, o si la espera se agota, la consulta se
+rechaza enseguida (503 + Retry-After) en lugar de acumularse sobre Gemini
+y hacer lentas todas las demás.
+
+Se crea dentro del event loop (lifespan del API).
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+
+class OverloadedError(Exception):
+    """Sin hueco para la consulta: el cliente debe reintentar más tarde"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Servicio saturado ({reason})")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, max_in_flight: int = 16, max_queue: int = 16, queue_timeout_s: float = 1.0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+        # Duración media de una consulta admitida, para el Retry-After
+        self._avg_service_s = 1.0
+        self.counters = {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_wait": 0}
+
+    def retry_after(self) -> float:
+        return self._avg_service_s * (self.waiting + 1) / self.max_in_flight
+
+    async def acquire(self, max_wait_s: Optional[float] = None) -> float:
+        """Reserva un hueco (OverloadedError si no lo hay); devuelve el instante de entrada
+
+        max_wait_s: lo que queda del plazo del cliente
+        """
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.counters["rejected_queue_full"] += 1
+                raise OverloadedError("cola llena", self.retry_after())
+
+            wait_s = self.queue_timeout_s if max_wait_s is None else min(self.queue_timeout_s, max_wait_s)
+            self.waiting += 1
+            self.counters["queued"] += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=wait_s)
+            except asyncio.TimeoutError:
+                self.counters["rejected_wait"] += 1
+                raise OverloadedError(f"sin hueco en {wait_s:.1f}s", self.retry_after())
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.in_flight += 1
+        self.counters["admitted"] += 1
+        return time.monotonic()
+
+    def release(self, admitted_at: float):
+        self.in_flight -= 1
+        self._semaphore.release()
+        # Media exponencial de la duración
+        self._avg_service_s = 0.9 * self._avg_service_s + 0.1 * (time.monotonic() - admitted_at)
+
+    @asynccontextmanager
+    async def admit(self, max_wait_s: Optional[float] = None):
+        admitted_at = await self.acquire(max_wait_s)
+        try:
+            yield
+        finally:
+            self.release(admitted_at)
+
+    def stats(self) -> Dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "queue_timeout_s": self.queue_timeout_s,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "avg_service_s": round(self._avg_service_s, 3),
+            **self.counters
+        }
@@ -0,0 +1,124 @@
+# src/api/compression.py
+"""
+Compresión negociada por Accept-Encoding: brotli (si el paquete `brotli`
+está instalado) o gzip.
+
+Solo comprime respuestas completas de tipos comprimibles y con un tamaño
+mínimo. Los streams NDJSON pasan sin tocar (comprimirlos retrasaría los
+tokens hasta llenar el buffer del compresor) y las imágenes ya vienen
+comprimidas.
+"""
+import gzip
+from typing import Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+# Tipos que nunca se comprimen aunque encajen arriba
+EXCLUDED_TYPES = ("application/x-ndjson", "text/event-stream")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Codificación preferida que acepta el cliente (br > gzip)"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level)
+
+
+class CompressionMiddleware:
+    """Middleware ASGI (sin dependencias de BaseHTTPMiddleware)"""
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        body_parts = []
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                passthrough = not self._compressible(message)
+                if passthrough:
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            # Respuesta completa en memoria (JSON de /query, /stats...)
+            body_parts.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(body_parts)
+            response_headers = [(k, v) for k, v in start_message["headers"] if k.lower() != b"content-length"]
+            if len(body) >= self.minimum_size:
+                body = compress(body, encoding, self.gzip_level, self.brotli_quality)
+                response_headers.append((b"content-encoding", encoding.encode()))
+                response_headers.append((b"vary", b"Accept-Encoding"))
+            response_headers.append((b"content-length", str(len(body)).encode()))
+
+            await send({**start_message, "headers": response_headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _compressible(start_message) -> bool:
+        content_type, content_encoding = _content_headers(start_message)
+        if content_encoding:
+            return False
+        if content_type.startswith(EXCLUDED_TYPES):
+            return False
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _content_headers(start_message) -> Tuple[str, str]:
+    content_type, content_encoding = "", ""
+    for key, value in start_message.get("headers", []):
+        key = key.lower()
+        if key == b"content-type":
+            content_type = value.decode("latin-1").lower()
+        elif key == b"content-encoding":
+            content_encoding = value.decode("latin-1")
+    return content_type, content_encoding
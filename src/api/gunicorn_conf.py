@@ -0,0 +1,18 @@
+# src/api/gunicorn_conf.py
+# Despliegue multi-proceso:
+#   gunicorn -c src/api/gunicorn_conf.py src.api.main:app
+import multiprocessing
+import os
+
+bind = f"{os.getenv('API_HOST', '0.0.0.0')}:{os.getenv('API_PORT', '8000')}"
+workers = int(os.getenv("API_WORKERS", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Sin preload: los clientes gRPC/HTTP de Gemini y Qdrant no son fork-safe,
+# así que cada worker importa y calienta el servicio después del fork
+preload_app = False
+
+# El warmup corre en segundo plano; /readyz indica cuándo hay tráfico
+timeout = int(os.getenv("API_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
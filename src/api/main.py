@@ -1,29 +1,211 @@
 # src/api/main.py - ACTUALIZADO PARA QDRANT
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from contextlib import asynccontextmanager
+import asyncio
+import json
 import sys
 import os
+import time
+import uuid
+from typing import Optional
+from urllib.parse import quote
+
+PROCESS_START = time.time()
 
 # Arreglar el path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from src.domain.models import QueryRequest, QueryResponse, DocumentInfo, HealthResponse
-# CAMBIO 1: Importar la versión V2
-from src.application.rag_service_v2 import RAGServiceV2  # <-- CAMBIO AQUÍ
+from src.domain.models import QueryRequest, QueryResponse, DocumentInfo, HealthResponse, IngestJob
+from src.application.ingest_jobs import IngestJobQueue, QueueFullError
+from src.infrastructure.resilience import CircuitOpenError, Deadline, RequestCancelledError, StageTimeoutError
+from src.api.admission import AdmissionController, OverloadedError
+from src.application.cache_warmup import CANNED_QUERIES, CacheWarmer
+from src.infrastructure.cache.query_log import QueryLog
+from src.api.compression import CompressionMiddleware
+from src.api.responses import FastJSONResponse
+# RAGServiceV2 (google.generativeai, qdrant_client...) se importa en segundo plano
+# dentro de _init_service() para que el API responda health checks cuanto antes
 
 # Variable global para el servicio
 rag_service = None
 
+# Cola de ingesta de PDFs subidos (independiente de rag_service)
+ingest_queue: Optional[IngestJobQueue] = None
+
+# Control de admisión de consultas (se crea en el lifespan, dentro del event loop)
+admission: Optional[AdmissionController] = None
+
+# Registro de consultas (alimenta el calentamiento de cachés; QUERY_LOG=0 lo desactiva)
+query_log: Optional[QueryLog] = QueryLog() if os.getenv("QUERY_LOG", "1") == "1" else None
+
+# Calentamiento de cachés tras el arranque, un cambio de alias o una ingesta
+warmer: Optional[CacheWarmer] = None
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+WARMUP_CHECK_S = float(os.getenv("WARMUP_CHECK_S", "30"))
+warmup_pending: Optional[str] = None
+
+# Plazo por defecto de una consulta si el cliente no envía el suyo (0 = sin plazo)
+QUERY_DEADLINE_S = float(os.getenv("QUERY_DEADLINE_S", "0"))
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "data/uploads")
+MAX_UPLOAD_BYTES = int(float(os.getenv("MAX_UPLOAD_MB", "50")) * 1024 * 1024)
+
+# Estado del arranque (expuesto en /readyz)
+startup_state = {
+    "ready": False,
+    "attempts": 0,
+    "last_error": None,
+    "app_started_s": None,
+    "import_s": None,
+    "warmup_s": None,
+    "time_to_ready_s": None
+}
+
+WARMUP_MAX_BACKOFF = float(os.getenv("WARMUP_MAX_BACKOFF", "30"))
+
+
+def _init_service():
+    """Importa y calienta el servicio (bloqueante: corre en un thread)"""
+    t0 = time.time()
+    from src.application.rag_service_v2 import RAGServiceV2
+    if startup_state["import_s"] is None:
+        startup_state["import_s"] = round(time.time() - t0, 3)
+
+    t1 = time.time()
+    service = RAGServiceV2(**_fake_backends()) if os.getenv("RAG_FAKE_BACKENDS") == "1" else RAGServiceV2()
+    service.warmup()
+    startup_state["warmup_s"] = round(time.time() - t1, 3)
+    return service
+
+
+def _fake_backends() -> dict:
+    """Gemini y vector store falsos (pruebas de carga sin red ni cuota, ver scripts/load_test.py)"""
+    from src.infrastructure.llm.gemini_client import GeminiClient
+    from src.infrastructure.llm.fake_gemini import FakeGeminiBackend
+    from src.infrastructure.vector_store.fake_store import FakeVectorStore
+
+    latency = float(os.getenv("FAKE_GEMINI_LATENCY_S", "0.05"))
+    backend = FakeGeminiBackend(
+        latency_s=latency,
+        latency_jitter_s=latency / 2,
+        slow_probability=float(os.getenv("FAKE_SLOW_PROBABILITY", "0")),
+        slow_latency_s=float(os.getenv("FAKE_SLOW_LATENCY_S", "1.0"))
+    )
+    # Sin cuota por defecto; GEMINI_LIMITS permite simular la real
+    limits = {model: {"rpm": 10 ** 6, "concurrency": 64} for model in
+              ("models/text-embedding-004", "gemini-2.0-flash-exp")}
+    limits.update(json.loads(os.getenv("GEMINI_LIMITS", "{}")))
+    store = FakeVectorStore.from_chunks_file(latency_s=float(os.getenv("FAKE_SEARCH_LATENCY_S", "0.005")))
+    return {"vector_store": store, "gemini": GeminiClient(backend=backend, limits=limits)}
+
+
+async def _warmup_in_background():
+    """Reintenta con backoff: un fallo de Qdrant al arrancar no tumba el proceso"""
+    global rag_service
+    backoff = 1.0
+    while rag_service is None:
+        startup_state["attempts"] += 1
+        try:
+            rag_service = await asyncio.to_thread(_init_service)
+        except Exception as e:
+            startup_state["last_error"] = str(e)
+            print(f"⚠️ Warmup fallido (intento {startup_state['attempts']}): {e}. Reintento en {backoff:.0f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, WARMUP_MAX_BACKOFF)
+
+    startup_state["ready"] = True
+    startup_state["last_error"] = None
+    startup_state["time_to_ready_s"] = round(time.time() - PROCESS_START, 3)
+    print(f"✅ RAG Service V2 con Qdrant listo ({startup_state['time_to_ready_s']}s desde el arranque)")
+
+    if WARMUP_ENABLED:
+        await _cache_warmup_loop()
+
+
+def _has_traffic() -> bool:
+    """Consultas reales en curso: el calentamiento les cede el paso"""
+    return admission is not None and (
+        admission.waiting > 0 or admission.in_flight >= max(1, admission.max_in_flight // 2)
+    )
+
+
+async def _cache_warmup_loop():
+    """Calienta al estar listo y de nuevo si cambia la versión servida o se ingesta un documento"""
+    global warmer, warmup_pending
+    warmer = CacheWarmer.from_env(rag_service, query_log=query_log or QueryLog(), busy=_has_traffic)
+    reason = "startup"
+    version = None
+    while True:
+        if reason:
+            try:
+                version = await asyncio.to_thread(rag_service.collection_version)
+                await asyncio.to_thread(_run_warmup, reason)
+            except Exception as e:
+                print(f"⚠️ Calentamiento de cachés fallido: {e}")
+            reason = None
+
+        await asyncio.sleep(WARMUP_CHECK_S)
+        try:
+            current = await asyncio.to_thread(rag_service.collection_version)
+        except Exception:
+            # Qdrant no disponible: se vuelve a mirar en el siguiente ciclo
+            continue
+        if current != version:
+            reason = "alias_swap"
+        elif warmup_pending:
+            reason = warmup_pending
+        warmup_pending = None
+
+
+def _run_warmup(reason: str) -> dict:
+    """warmer.run; si ya había una pasada en curso (con la caché de antes), se repite en el siguiente ciclo"""
+    global warmup_pending
+    report = warmer.run(reason)
+    if report.get("status") == "already_running":
+        warmup_pending = warmup_pending or reason
+    return report
+
+
+def _on_document_ingested(job: dict):
+    """Un documento nuevo o recargado cambia las respuestas posibles"""
+    global warmup_pending
+    if rag_service is not None:
+        rag_service.answer_cache.clear()
+        if warmer is not None:
+            warmer.invalidate()
+        # El bucle de calentamiento lo recoge en su siguiente ciclo
+        warmup_pending = "ingest"
+    print(f"📥 Documento '{job['doc_id']}' ingestado en {job['duration_s']}s")
+
+
 # Lifespan para inicialización
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global rag_service
-    print("🚀 Iniciando RAG Service V2 con Qdrant...")
-    rag_service = RAGServiceV2()  # <-- CAMBIO 2: Usar V2
-    print("✅ RAG Service V2 con Qdrant listo")
+    global ingest_queue, admission
+    print("🚀 Iniciando RAG Service V2 con Qdrant (warmup en segundo plano)...")
+    startup_state["app_started_s"] = round(time.time() - PROCESS_START, 3)
+    warmup_task = asyncio.create_task(_warmup_in_background())
+    # Ingesta en threads propios: el event loop sigue libre para las consultas
+    ingest_queue = IngestJobQueue(
+        workers=int(os.getenv("INGEST_WORKERS", "1")),
+        max_pending=int(os.getenv("INGEST_QUEUE_SIZE", "8")),
+        on_complete=_on_document_ingested,
+        max_finished=int(os.getenv("INGEST_JOBS_KEEP", "200"))
+    )
+    ingest_queue.start()
+    admission = AdmissionController(
+        max_in_flight=int(os.getenv("MAX_INFLIGHT_QUERIES", "16")),
+        max_queue=int(os.getenv("QUERY_QUEUE_SIZE", "16")),
+        queue_timeout_s=float(os.getenv("QUERY_QUEUE_TIMEOUT_S", "1.0"))
+    )
     yield
+    warmup_task.cancel()
+    if warmer is not None:
+        warmer.stop()
+    ingest_queue.stop()
     print("👋 Cerrando RAG Service...")
 
 # Inicializar FastAPI con lifespan
@@ -31,9 +213,14 @@ app = FastAPI(
     title="RAG Multimodal API - Reto Indra",
     description="API para procesamiento inteligente de documentos con RAG multimodal + Qdrant",
     version="2.0.0",  # <-- CAMBIO 3: Nueva versión
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson si está instalado
+    default_response_class=FastJSONResponse
 )
 
+# gzip / brotli según Accept-Encoding (respuestas JSON de más de 1 KB)
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("COMPRESSION_MIN_BYTES", "1024")))
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -43,6 +230,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.get("/healthz")
+async def liveness():
+    """Liveness: el proceso responde (no depende de Qdrant ni de Gemini)"""
+    return {"status": "alive", "uptime_s": round(time.time() - PROCESS_START, 3)}
+
+@app.get("/readyz")
+async def readiness():
+    """Readiness: servicio calentado y listo para recibir tráfico"""
+    status_code = 200 if startup_state["ready"] else 503
+    return JSONResponse(status_code=status_code, content=startup_state)
+
 @app.get("/", response_model=HealthResponse)
 async def health_check():
     """Verifica el estado del servicio"""
@@ -62,21 +260,283 @@ async def get_stats():
     """Obtiene estadísticas del sistema con Qdrant"""
     if not rag_service:
         raise HTTPException(status_code=503, detail="Service not ready")
-    return rag_service.get_stats()
+    return {
+        **rag_service.get_stats(),
+        "admission": admission.stats() if admission else None,
+        "warmup": warmer.stats() if warmer else None
+    }
 
 # Los demás endpoints siguen igual...
 
+def _with_image_urls(event: dict) -> dict:
+    """Añade URL y miniatura a cada imagen; el cliente puede cargarlas bajo demanda"""
+    if event.get("images"):
+        event["images"] = [
+            {
+                **img,
+                "url": f"/images/{quote(img['filename'])}",
+                "thumbnail_url": f"/images/{quote(img['filename'])}/thumbnail"
+            }
+            for img in event["images"]
+        ]
+    return event
+
+
+def _deadline(request: QueryRequest, http_request: Request) -> Deadline:
+    """Plazo del cliente: campo timeout_ms, cabecera X-Request-Timeout-Ms o QUERY_DEADLINE_S"""
+    timeout_ms = request.timeout_ms or http_request.headers.get("x-request-timeout-ms")
+    try:
+        timeout_s = float(timeout_ms) / 1000 if timeout_ms else QUERY_DEADLINE_S
+    except ValueError:
+        raise HTTPException(status_code=400, detail="X-Request-Timeout-Ms debe ser un número")
+    return Deadline(timeout_s if timeout_s > 0 else None)
+
+
+def _query_error(e: Exception) -> HTTPException:
+    """Código HTTP de un fallo de consulta"""
+    if isinstance(e, (CircuitOpenError, OverloadedError)):
+        return HTTPException(status_code=503, detail=str(e),
+                             headers={"Retry-After": str(max(1, int(e.retry_after + 0.999)))})
+    if isinstance(e, StageTimeoutError):
+        # Incluye DeadlineExceededError (plazo del cliente agotado)
+        return HTTPException(status_code=504, detail=str(e))
+    if isinstance(e, RequestCancelledError):
+        # Nadie lee ya la respuesta (código de nginx para "cliente cerró la conexión")
+        return HTTPException(status_code=499, detail=str(e))
+    return HTTPException(status_code=500, detail=str(e))
+
+
+async def _run_in_thread(fn, deadline: Deadline, http_request: Request):
+    """fn en un thread; si el cliente se desconecta, el plazo se cancela y las
+    etapas pendientes no llegan a ejecutarse"""
+    work = asyncio.ensure_future(asyncio.to_thread(fn))
+    while True:
+        done, _ = await asyncio.wait({work}, timeout=0.25)
+        if done:
+            return work.result()
+        if not deadline.cancelled and await http_request.is_disconnected():
+            deadline.cancel()
+
+
 @app.post("/query", response_model=QueryResponse)
-async def query_document(request: QueryRequest):
+async def query_document(request: QueryRequest, http_request: Request):
     """Realiza una consulta al documento usando RAG + Qdrant"""
     if not rag_service:
         raise HTTPException(status_code=503, detail="Service not ready")
 
+    deadline = _deadline(request, http_request)
     try:
-        result = rag_service.query(request.question, request.top_k or 3)
-        return QueryResponse(**result)
+        # Admisión: hueco libre o espera corta; si no, 503 inmediato
+        async with admission.admit(deadline.remaining()):
+            result = await _run_in_thread(
+                lambda: rag_service.query(
+                    request.question, request.top_k or 3, request.filters(),
+                    request.include_image_data is not False, deadline=deadline,
+                    mode=request.mode or "generative"
+                ),
+                deadline, http_request
+            )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _query_error(e)
+    _log_query(request)
+    return QueryResponse(**_with_image_urls(result))
+
+
+def _log_query(request: QueryRequest):
+    # Escritura a disco fuera del event loop, sin esperarla (record() nunca falla)
+    if query_log is not None:
+        asyncio.get_running_loop().run_in_executor(
+            None, query_log.record,
+            request.question, request.top_k or 3, request.filters(), request.mode or "generative"
+        )
+
+def _ndjson(event: dict) -> bytes:
+    return (json.dumps(_with_image_urls(event), ensure_ascii=False) + "\n").encode("utf-8")
+
+
+@app.post("/query/stream")
+async def query_document_stream(request: QueryRequest, http_request: Request):
+    """Como /query, pero en NDJSON: meta (fuentes + URLs de imágenes), tokens y done"""
+    if not rag_service:
+        raise HTTPException(status_code=503, detail="Service not ready")
+
+    deadline = _deadline(request, http_request)
+    try:
+        # El hueco se conserva hasta terminar el stream
+        admitted_at = await admission.acquire(deadline.remaining())
+    except OverloadedError as e:
+        raise _query_error(e)
+
+    released = False
+
+    def release():
+        # Un solo dueño del hueco, se llame desde donde se llame
+        nonlocal released
+        if not released:
+            released = True
+            deadline.cancel()
+            admission.release(admitted_at)
+
+    handed_off = False
+    try:
+        events = rag_service.query_stream(request.question, request.top_k or 3, request.filters(),
+                                          deadline=deadline, mode=request.mode or "generative")
+
+        # El primer evento (embedding + búsqueda) fuera del stream: sus errores
+        # todavía pueden responderse con el código HTTP adecuado
+        try:
+            first = await _run_in_thread(lambda: next(events), deadline, http_request)
+        except Exception as e:
+            raise _query_error(e)
+        _log_query(request)
+
+        async def body():
+            try:
+                yield _ndjson(first)
+                while True:
+                    event = await asyncio.to_thread(next, events, None)
+                    if event is None:
+                        break
+                    yield _ndjson(event)
+            except Exception as e:
+                yield _ndjson({"type": "error", "detail": str(e)})
+            finally:
+                # Stream terminado o cancelado (cliente desconectado)
+                release()
+
+        response = _AdmittedStreamingResponse(body(), release, media_type="application/x-ndjson")
+        handed_off = True
+        return response
+    finally:
+        # Error, 504 o CancelledError antes de devolver la respuesta
+        if not handed_off:
+            release()
+
+
+class _AdmittedStreamingResponse(StreamingResponse):
+    """Libera el hueco de admisión al terminar de enviarse, pase lo que pase
+
+    Un generador async que nunca llega a arrancar no ejecuta su finally.
+    """
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release()
+
+
+@app.get("/images/{filename}")
+async def get_image(filename: str):
+    """Imagen original del documento"""
+    if not rag_service:
+        raise HTTPException(status_code=503, detail="Service not ready")
+    path = rag_service.image_path(filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Imagen no encontrada")
+    return FileResponse(path, headers={"Cache-Control": "public, max-age=86400"})
+
+@app.get("/images/{filename}/thumbnail")
+async def get_image_thumbnail(filename: str, size: int = 256):
+    """Miniatura JPEG (cacheada en disco) para galerías"""
+    if not rag_service:
+        raise HTTPException(status_code=503, detail="Service not ready")
+    size = min(max(size, 32), 1024)
+    path = await asyncio.to_thread(rag_service.image_thumbnail, filename, size)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Imagen no encontrada")
+    return FileResponse(path, media_type="image/jpeg", headers={"Cache-Control": "public, max-age=86400"})
+
+def _queue_full(retry_after: float):
+    return HTTPException(status_code=429, detail="Cola de ingesta llena, reintenta más tarde",
+                         headers={"Retry-After": str(max(1, int(retry_after)))})
+
+
+@app.post("/documents", status_code=202, response_model=IngestJob)
+async def upload_document(request: Request, response: Response, filename: str, doc_id: Optional[str] = None):
+    """Sube un PDF (cuerpo application/pdf) y lo encola para ingesta
+
+    curl -X POST "localhost:8000/documents?filename=informe.pdf" \
+         -H "Content-Type: application/pdf" --data-binary @informe.pdf
+    """
+    if ingest_queue is None:
+        raise HTTPException(status_code=503, detail="Ingesta no disponible")
+    if not filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=415, detail="Solo se admiten PDFs")
+    # Backpressure antes de leer el cuerpo
+    if ingest_queue.is_full():
+        raise _queue_full(ingest_queue.retry_after())
+
+    from src.infrastructure.vector_store.qdrant_store_optimized import make_doc_id
+    doc_id = make_doc_id(doc_id or filename)
+
+    # Un fichero por subida: una recarga no pisa el PDF que otro trabajo está procesando
+    path = os.path.join(UPLOAD_DIR, doc_id, f"{uuid.uuid4().hex}.pdf")
+    # Disco fuera del event loop: una subida lenta no frena las consultas
+    await asyncio.to_thread(os.makedirs, os.path.dirname(path), exist_ok=True)
+    size = 0
+    try:
+        f = await asyncio.to_thread(open, path, "wb")
+        try:
+            async for block in request.stream():
+                size += len(block)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail=f"PDF de más de {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+                await asyncio.to_thread(f.write, block)
+        finally:
+            await asyncio.to_thread(f.close)
+        if await asyncio.to_thread(_read_head, path, 5) != b"%PDF-":
+            raise HTTPException(status_code=415, detail="El cuerpo no es un PDF")
+        job = await asyncio.to_thread(ingest_queue.submit, path, doc_id, filename)
+    except BaseException as e:
+        # 413/415, cola llena, cliente desconectado (CancelledError)...: sin ficheros a medias
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        if isinstance(e, QueueFullError):
+            raise _queue_full(e.retry_after)
+        raise
+
+    response.headers["Location"] = f"/documents/jobs/{job['job_id']}"
+    return job
+
+def _read_head(path: str, size: int) -> bytes:
+    with open(path, "rb") as f:
+        return f.read(size)
+
+@app.get("/documents/jobs/{job_id}", response_model=IngestJob)
+async def get_ingest_job(job_id: str):
+    """Estado y progreso de un trabajo de ingesta"""
+    job = ingest_queue.get(job_id) if ingest_queue else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job
+
+@app.get("/documents/jobs")
+async def list_ingest_jobs(limit: int = 50):
+    """Trabajos recientes de este worker y estado de la cola"""
+    if ingest_queue is None:
+        raise HTTPException(status_code=503, detail="Ingesta no disponible")
+    return {"queue": ingest_queue.stats(), "jobs": ingest_queue.list(limit)}
+
+@app.get("/documents")
+async def list_documents():
+    """Documentos procesados por el pipeline con sus etapas (output/pipeline)"""
+    if ingest_queue is None:
+        raise HTTPException(status_code=503, detail="Ingesta no disponible")
+    documents = await asyncio.to_thread(ingest_queue.pipeline.documents)
+    return {
+        doc_id: {
+            "source": manifest.get("source"),
+            "stages": {stage: info.get("duration_s") for stage, info in manifest.get("stages", {}).items()}
+        }
+        for doc_id, manifest in documents.items()
+    }
 
 @app.get("/document-info", response_model=DocumentInfo)
 async def get_document_info():
@@ -96,16 +556,34 @@ async def get_document_info():
 @app.get("/test-queries")
 async def get_test_queries():
     """Devuelve queries de ejemplo para testing"""
-    return {
-        "queries": [
-            "¿Quiénes son los autores del documento?",
-            "Muestra el diagrama de arquitectura de la solución",
-            "¿Qué es Competiscan y qué resultados obtuvo?",
-            "¿Cuáles son los patrones de procesamiento disponibles?",
-            "Explica el flujo de procesamiento con su diagrama"
-        ]
-    }
+    return {"queries": CANNED_QUERIES}
+
+
+@app.post("/cache/warmup", status_code=202)
+async def trigger_cache_warmup():
+    """Calienta las cachés ya (p.ej. tras un reindexado externo); el resultado sale en /stats"""
+    global warmup_pending
+    if not rag_service or warmer is None:
+        raise HTTPException(status_code=503, detail="Service not ready or warmup disabled")
+    if warmer.running:
+        # Se repite al terminar la pasada en curso (bucle de calentamiento)
+        warmup_pending = warmup_pending or "manual"
+        return {"status": "already_running", "queued": True, **warmer.stats()}
+    asyncio.get_running_loop().run_in_executor(None, _run_warmup, "manual")
+    return {"status": "started"}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("src.api.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+
+    # API_WORKERS>1: varios procesos; cada worker crea su propio servicio en el
+    # lifespan (después del fork) y comparten las cachés en disco.
+    # API_RELOAD=1 solo para desarrollo (incompatible con varios workers).
+    workers = int(os.getenv("API_WORKERS", "1"))
+    reload = os.getenv("API_RELOAD", "0") == "1" and workers == 1
+    uvicorn.run(
+        "src.api.main:app",
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8000")),
+        workers=workers,
+        reload=reload
+    )
\ No newline at end of file
@@ -0,0 +1,21 @@
+# src/api/responses.py
+"""
+Respuesta JSON rápida: orjson si está instalado (opcional), si no json
+compacto de la librería estándar (mismo resultado que JSONResponse).
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,201 @@
+# src/application/cache_warmup.py
+"""
+Calentamiento de las cachés de consultas (embeddings y respuestas).
+
+Tras un despliegue o un cambio de alias (reindexado) las claves de la
+caché de respuestas cambian y los primeros usuarios pagarían la latencia
+completa. CacheWarmer repite, en segundo plano, las preguntas fijas
+(CANNED_QUERIES, las de /test-queries) y las más frecuentes del registro
+de consultas (QueryLog), para que ya estén en caché cuando lleguen:
+
+- ritmo limitado (WARMUP_QPS) y prioridad baja: mientras el API tenga
+  tráfico real (`busy()`), el calentamiento espera
+- reparto entre workers: cada consulta se reclama en la caché compartida
+  (SharedCache.add), así que cada una se calienta una sola vez por máquina
+- el reporte dice cuántas entradas ha rellenado y qué parte del tráfico
+  reciente queda ya cubierta por la caché
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from src.infrastructure.cache.query_log import QueryLog
+from src.infrastructure.cache.shared_cache import SharedCache, make_key
+from src.infrastructure.resilience import CircuitOpenError
+
+# Preguntas de ejemplo (GET /test-queries); se calientan siempre
+CANNED_QUERIES = [
+    "¿Quiénes son los autores del documento?",
+    "Muestra el diagrama de arquitectura de la solución",
+    "¿Qué es Competiscan y qué resultados obtuvo?",
+    "¿Cuáles son los patrones de procesamiento disponibles?",
+    "Explica el flujo de procesamiento con su diagrama"
+]
+
+
+class CacheWarmer:
+    def __init__(self,
+                 service,
+                 query_log: Optional[QueryLog] = None,
+                 canned: Optional[List[str]] = None,
+                 top_n: int = 50,
+                 window_s: float = 72 * 3600,
+                 qps: float = 1.0,
+                 busy: Optional[Callable[[], bool]] = None):
+        """
+        service: RAGServiceV2 ya calentado
+        top_n / window_s: preguntas más frecuentes del registro en la ventana
+        qps: consultas de calentamiento por segundo como máximo
+        busy(): True mientras haya tráfico real; el calentamiento cede el paso
+        """
+        self.service = service
+        self.query_log = query_log or QueryLog()
+        self.canned = CANNED_QUERIES if canned is None else canned
+        self.top_n = top_n
+        self.window_s = window_s
+        self.qps = qps
+        self.busy = busy or (lambda: False)
+        # Reclamaciones compartidas por los workers de la máquina; solo tienen
+        # que durar lo que tarda una consulta (después ya está en la caché)
+        self.claims = SharedCache('warmup_claims', ttl_seconds=120)
+        self._stop = threading.Event()
+        self._run_lock = threading.Lock()
+        self.last_report: Optional[Dict] = None
+        self.running = False
+
+    @classmethod
+    def from_env(cls, service, **kwargs) -> 'CacheWarmer':
+        return cls(
+            service,
+            top_n=int(os.getenv('WARMUP_TOP_N', '50')),
+            window_s=float(os.getenv('WARMUP_WINDOW_H', '72')) * 3600,
+            qps=float(os.getenv('WARMUP_QPS', '1')),
+            **kwargs
+        )
+
+    def invalidate(self):
+        """Tras vaciar la caché de respuestas: lo ya reclamado se vuelve a calentar"""
+        self.claims.clear()
+
+    def stop(self):
+        self._stop.set()
+
+    def candidates(self) -> Dict:
+        """Consultas a calentar: fijas primero, luego las frecuentes (sin repetir)"""
+        frequent, logged = self.query_log.frequent(self.top_n, self.window_s)
+        canned = [{"question": q, "top_k": 3, "filters": {}, "mode": "generative", "count": 0} for q in self.canned]
+        merged: Dict[str, Dict] = {}
+        for item in canned + frequent:
+            group = make_key(item["question"].lower(), item["top_k"], item["filters"], item["mode"])
+            if group in merged:
+                # La fija también aparece en el registro: suma su frecuencia
+                merged[group]["count"] += item["count"]
+            else:
+                merged[group] = dict(item)
+        items = list(merged.values())
+        return {"items": items, "logged": logged, "from_log": len(frequent)}
+
+    def _wait_turn(self, next_at: float) -> bool:
+        """Espera al hueco del rate limit y a que no haya tráfico real; False si hay que parar"""
+        while not self._stop.is_set():
+            if self.busy():
+                self._stop.wait(0.5)
+                continue
+            delay = next_at - time.monotonic()
+            if delay <= 0:
+                return True
+            self._stop.wait(min(delay, 0.5))
+        return False
+
+    def run(self, reason: str = "manual") -> Dict:
+        """Calienta las cachés (bloqueante: en el API corre en un thread)"""
+        if not self._run_lock.acquire(blocking=False):
+            return {"reason": reason, "status": "already_running"}
+        self.running = True
+        try:
+            return self._run(reason)
+        finally:
+            self.running = False
+            self._run_lock.release()
+
+    def _run(self, reason: str) -> Dict:
+        started = time.time()
+        collection = self.service.collection_version()
+        plan = self.candidates()
+        items = plan["items"]
+        caches = {"answers": self.service.answer_cache, "query_embeddings": self.service.embedding_cache}
+        entries_before = {name: cache.stats().get("entries") for name, cache in caches.items()}
+        counters = {"warmed": 0, "already_cached": 0, "claimed_elsewhere": 0, "failed": 0, "skipped": 0}
+        covered = 0
+        status = "done"
+        print(f"🔥 Calentando cachés ({reason}, {collection}): {len(items)} consultas a ≤{self.qps} qps")
+
+        next_at = time.monotonic()
+        for index, item in enumerate(items):
+            key = self.service.answer_key(item["question"], item["top_k"], item["filters"], item["mode"])
+            if self.service.answer_cache.contains(key):
+                counters["already_cached"] += 1
+                covered += item["count"]
+                continue
+            if not self._wait_turn(next_at):
+                status = "stopped"
+                counters["skipped"] = len(items) - index
+                break
+            # Otro worker ya la está calentando (o la calentó) para esta versión
+            if not self.claims.add(make_key(collection, key), {"pid": os.getpid()}):
+                counters["claimed_elsewhere"] += 1
+                covered += item["count"]
+                continue
+            next_at = time.monotonic() + 1.0 / self.qps if self.qps > 0 else 0.0
+
+            try:
+                self.service.query(item["question"], item["top_k"], item["filters"],
+                                   include_image_data=False, mode=item["mode"])
+                counters["warmed"] += 1
+                covered += item["count"]
+            except CircuitOpenError as e:
+                # El backend no está sano: seguir solo le añadiría carga
+                print(f"⚠️ Calentamiento interrumpido: {e}")
+                status = "aborted"
+                counters["failed"] += 1
+                counters["skipped"] = len(items) - index - 1
+                break
+            except Exception as e:
+                print(f"⚠️ Calentamiento de '{item['question'][:60]}' falló: {e}")
+                counters["failed"] += 1
+
+        report = {
+            "reason": reason,
+            "status": status,
+            "collection": collection,
+            "started_at": datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+            "duration_s": round(time.time() - started, 2),
+            "candidates": len(items),
+            "canned": len(self.canned),
+            "from_log": plan["from_log"],
+            **counters,
+            # Entradas de cada caché antes y después
+            "entries": {
+                name: {"before": entries_before[name], "after": cache.stats().get("entries")}
+                for name, cache in caches.items()
+            },
+            # Parte de las consultas registradas en la ventana que ya sale de caché
+            "logged_queries": plan["logged"],
+            "log_coverage": round(covered / plan["logged"], 3) if plan["logged"] else None
+        }
+        self.last_report = report
+        print(f"🔥 Calentamiento {status}: {counters['warmed']} nuevas, {counters['already_cached']} ya en caché, "
+              f"{counters['failed']} fallidas en {report['duration_s']}s "
+              f"(cobertura del tráfico reciente: {report['log_coverage']})")
+        return report
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "qps": self.qps,
+            "top_n": self.top_n,
+            "window_h": round(self.window_s / 3600, 1),
+            "last_run": self.last_report
+        }
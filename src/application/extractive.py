@@ -0,0 +1,155 @@
+# src/application/extractive.py
+"""
+Respuesta extractiva: las frases de los chunks recuperados que mejor casan
+con la pregunta, con su cita (chunk y página), sin llamar al LLM.
+
+Se usa como modo explícito (mode="extractive") y como plan B cuando la
+generación no cabe en el plazo del cliente (ver RAGServiceV2.answer).
+
+Puntuación vectorizada con numpy: matriz frases × términos de la pregunta
+(prefijos de 6 letras como stemming barato), BM25 con idf calculado sobre
+las propias frases + cobertura de términos, y el score híbrido del chunk
+como prior. Las frases repetidas por el solape entre chunks se descartan.
+"""
+import re
+from typing import Dict, List, Set
+
+import numpy as np
+
+STOPWORDS = {
+    # es
+    'el', 'la', 'los', 'las', 'un', 'una', 'unos', 'unas', 'de', 'del', 'al', 'que', 'qué', 'en', 'por',
+    'para', 'con', 'sin', 'sus', 'son', 'ser', 'como', 'cómo', 'cual', 'cuál', 'cuáles', 'cuales', 'quién',
+    'quiénes', 'quien', 'quienes', 'donde', 'dónde', 'cuando', 'cuándo', 'este', 'esta', 'estos', 'estas',
+    'ese', 'esa', 'eso', 'esto', 'hay', 'más', 'muy', 'también', 'pero', 'sobre', 'entre', 'todo', 'todos',
+    'tiene', 'tienen', 'fue', 'han', 'hace', 'explica', 'muestra', 'dime', 'documento',
+    # en
+    'the', 'and', 'for', 'are', 'was', 'were', 'with', 'what', 'which', 'who', 'how', 'this', 'that',
+    'from', 'has', 'have', 'its', 'can', 'into', 'about',
+}
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?;:])\s+|\n+')
+_WORD = re.compile(r'\w+')
+
+
+def _stems(text: str) -> List[str]:
+    return [w[:6] for w in _WORD.findall(text.lower()) if len(w) > 2 and w not in STOPWORDS]
+
+
+def split_sentences(text: str, min_chars: int = 25) -> List[str]:
+    """Frases de un chunk (sin viñetas ni marcas de markdown al principio)"""
+    sentences = []
+    for raw in _SENTENCE_SPLIT.split(text or ''):
+        sentence = raw.strip().lstrip('#*->•· \t').strip()
+        if len(sentence) >= min_chars:
+            sentences.append(sentence)
+    return sentences
+
+
+def chunk_sentences(chunk: Dict) -> List[str]:
+    """Frases del contenido completo del chunk
+
+    'text' es una vista previa de 500 caracteres: el contenido completo
+    está en metadata['content'] (ChunkStore). El solape de TextChunker
+    empieza en un carácter cualquiera, así que un primer fragmento que
+    empieza en minúscula es el final cortado de una frase anterior.
+    """
+    content = chunk.get('metadata', {}).get('content') or chunk.get('text', '')
+    sentences = split_sentences(content)
+    if sentences and chunk.get('metadata', {}).get('chunk_id') and sentences[0][:1].islower():
+        sentences = sentences[1:]
+    return sentences
+
+
+class ExtractiveAnswerer:
+    def __init__(self,
+                 max_sentences: int = 3,
+                 k1: float = 1.2,
+                 b: float = 0.75,
+                 chunk_weight: float = 0.3,
+                 max_overlap: float = 0.8):
+        """
+        max_sentences: frases de la respuesta
+        chunk_weight: peso del score híbrido del chunk frente al léxico de la frase
+        max_overlap: Jaccard de términos a partir del cual una frase se considera repetida
+        """
+        self.max_sentences = max_sentences
+        self.k1 = k1
+        self.b = b
+        self.chunk_weight = chunk_weight
+        self.max_overlap = max_overlap
+
+    def score(self, question: str, sentences: List[str], chunk_scores: np.ndarray) -> np.ndarray:
+        """Score de cada frase (mismo orden que sentences)"""
+        terms = list(dict.fromkeys(_stems(question)))
+        lexical = np.zeros(len(sentences))
+        if terms:
+            column = {term: j for j, term in enumerate(terms)}
+            rows, cols = [], []
+            lengths = np.empty(len(sentences))
+            for i, sentence in enumerate(sentences):
+                stems = _stems(sentence)
+                lengths[i] = len(stems)
+                for stem in stems:
+                    j = column.get(stem)
+                    if j is not None:
+                        rows.append(i)
+                        cols.append(j)
+            tf = np.zeros((len(sentences), len(terms)))
+            np.add.at(tf, (np.array(rows, dtype=int), np.array(cols, dtype=int)), 1)
+
+            present = tf > 0
+            df = present.sum(axis=0)
+            idf = np.log1p((len(sentences) - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * lengths / max(lengths.mean(), 1.0))
+            bm25 = (tf * (self.k1 + 1) / (tf + norm[:, None])) @ idf
+            coverage = present @ idf / idf.sum() if idf.sum() else np.zeros(len(sentences))
+            top = bm25.max()
+            lexical = 0.5 * (bm25 / top if top > 0 else bm25) + 0.5 * coverage
+
+        return (1 - self.chunk_weight) * lexical + self.chunk_weight * chunk_scores
+
+    def extract(self, question: str, chunks: List[Dict]) -> List[Dict]:
+        """Pasajes elegidos, de mejor a peor: text, chunk_id, page, doc_id, score"""
+        sentences, owners = [], []
+        for index, chunk in enumerate(chunks):
+            for sentence in chunk_sentences(chunk):
+                sentences.append(sentence)
+                owners.append(index)
+        if not sentences:
+            return []
+
+        owners = np.array(owners)
+        chunk_scores = np.array([float(chunk.get('score', 0.0)) for chunk in chunks])[owners]
+        scores = self.score(question, sentences, chunk_scores)
+
+        passages = []
+        chosen: List[Set[str]] = []
+        # Orden estable: a igual score, la frase que aparece antes
+        for i in np.argsort(-scores, kind='stable'):
+            terms = set(_stems(sentences[i]))
+            if any(len(terms & other) / max(len(terms | other), 1) >= self.max_overlap for other in chosen):
+                continue
+            chosen.append(terms)
+            metadata = chunks[owners[i]].get('metadata', {})
+            passages.append({
+                'text': sentences[i],
+                'chunk_id': metadata.get('chunk_id'),
+                'page': metadata.get('page'),
+                'doc_id': metadata.get('doc_id'),
+                'score': round(float(scores[i]), 4)
+            })
+            if len(passages) >= self.max_sentences:
+                break
+        return passages
+
+    @staticmethod
+    def format_answer(passages: List[Dict]) -> str:
+        """Una línea por pasaje con su cita"""
+        lines = []
+        for passage in passages:
+            cite = f"Chunk {passage['chunk_id']}"
+            if passage.get('page') is not None:
+                cite += f", pág. {passage['page']}"
+            lines.append(f"- {passage['text']} [{cite}]")
+        return "\n".join(lines)
@@ -0,0 +1,213 @@
+# src/application/ingest_jobs.py
+"""
+Cola de ingesta en segundo plano para los PDFs subidos por el API.
+
+- Cola acotada (INGEST_QUEUE_SIZE): si está llena, submit() lanza
+  QueueFullError y el API responde 429 con Retry-After
+- Pool de threads (INGEST_WORKERS) que ejecuta IngestPipeline por
+  documento; las consultas nunca esperan a la ingesta
+- Estado y progreso por trabajo, también en output/jobs/<job_id>.json
+  para que cualquier worker del API pueda consultarlo
+- En memoria solo los últimos `max_finished` trabajos terminados; los
+  más antiguos siguen en output/jobs (get() los lee de ahí)
+- Un solo trabajo a la vez por doc_id, también entre workers del API
+  (lock de fichero en IngestPipeline.run_document)
+"""
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from src.application.ingest_pipeline import IngestPipeline, STAGES
+
+JOBS_DIR = os.getenv('INGEST_JOBS_DIR', 'output/jobs')
+FINISHED = ("done", "failed", "rejected")
+
+
+class QueueFullError(Exception):
+    """La cola de ingesta está llena (backpressure)"""
+
+    def __init__(self, capacity: int, retry_after: float):
+        super().__init__(f"Cola de ingesta llena ({capacity} trabajos pendientes)")
+        self.retry_after = retry_after
+
+
+class IngestJobQueue:
+    def __init__(self,
+                 pipeline: Optional[IngestPipeline] = None,
+                 workers: int = 1,
+                 max_pending: int = 8,
+                 jobs_dir: Optional[str] = None,
+                 on_complete: Optional[Callable[[Dict], None]] = None,
+                 max_finished: int = 200):
+        """
+        on_complete(job): se llama tras cada carga terminada (p.ej. invalidar
+        la caché de respuestas)
+        max_finished: trabajos terminados que se conservan en memoria
+        """
+        self.pipeline = pipeline or IngestPipeline()
+        self.workers = workers
+        self.max_pending = max_pending
+        self.jobs_dir = jobs_dir or JOBS_DIR
+        self.on_complete = on_complete
+        self.max_finished = max_finished
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=max_pending)
+        self._jobs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        # Duración media de un trabajo, para el Retry-After
+        self._avg_job_s = 30.0
+
+    def start(self):
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"ingest-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        self._threads = []
+
+    def is_full(self) -> bool:
+        return self._queue.full()
+
+    def retry_after(self) -> float:
+        return self._avg_job_s * (self._queue.qsize() + 1) / max(self.workers, 1)
+
+    # ------------------------------------------------------------------
+    # Trabajos
+    # ------------------------------------------------------------------
+
+    def submit(self, pdf_path: str, doc_id: str, filename: str) -> Dict:
+        """Encola un PDF ya guardado en disco; QueueFullError si no hay hueco"""
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "doc_id": doc_id,
+            "filename": filename,
+            "path": pdf_path,
+            "status": "queued",
+            "stage": None,
+            "stages": {stage: "pending" for stage in STAGES},
+            "progress": 0.0,
+            "error": None,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "started_at": None,
+            "finished_at": None,
+            "duration_s": None
+        }
+        with self._lock:
+            self._jobs[job["job_id"]] = job
+        self._save(job)
+        try:
+            self._queue.put_nowait(job["job_id"])
+        except queue.Full:
+            self._update(job, status="rejected", error="Cola llena")
+            raise QueueFullError(self.max_pending, self.retry_after())
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        # Trabajo de otro worker del API
+        try:
+            with open(os.path.join(self.jobs_dir, f"{os.path.basename(job_id)}.json"), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def list(self, limit: int = 50) -> List[Dict]:
+        with self._lock:
+            jobs = [dict(job) for job in self._jobs.values()]
+        return sorted(jobs, key=lambda j: j["created_at"], reverse=True)[:limit]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            by_status = {}
+            for job in self._jobs.values():
+                by_status[job["status"]] = by_status.get(job["status"], 0) + 1
+        return {
+            "workers": self.workers,
+            "pending": self._queue.qsize(),
+            "capacity": self.max_pending,
+            "jobs": by_status,
+            "avg_job_s": round(self._avg_job_s, 2)
+        }
+
+    def _save(self, job: Dict):
+        path = os.path.join(self.jobs_dir, f"{job['job_id']}.json")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        with open(tmp_path, 'w') as f:
+            json.dump(job, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _update(self, job: Dict, **changes):
+        with self._lock:
+            job.update(changes)
+            snapshot = dict(job)
+            if snapshot["status"] in FINISHED:
+                self._prune()
+        self._save(snapshot)
+
+    def _prune(self):
+        """Olvida los trabajos terminados más antiguos (con el lock tomado)"""
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in FINISHED]
+        # dict conserva el orden de inserción: los primeros son los más antiguos
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _worker(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            with self._lock:
+                job = self._jobs.get(job_id)
+            if job is not None:
+                self._run(job)
+            self._queue.task_done()
+
+    def _run(self, job: Dict):
+        start = time.perf_counter()
+        self._update(job, status="running", started_at=datetime.now().isoformat(timespec="seconds"))
+
+        def on_stage(stage: str, state: str):
+            stages = {**job["stages"], stage: state}
+            finished = sum(1 for s in stages.values() if s in ("done", "skipped"))
+            self._update(job, stage=stage, stages=stages, progress=round(finished / len(STAGES), 2))
+
+        try:
+            self.pipeline.run_document(job["path"], doc_id=job["doc_id"], on_stage=on_stage)
+            status, error = "done", None
+        except Exception as e:
+            print(f"❌ Ingesta de '{job['doc_id']}' fallida: {e}")
+            status, error = "failed", str(e)
+
+        duration = time.perf_counter() - start
+        self._update(
+            job,
+            status=status,
+            error=error,
+            finished_at=datetime.now().isoformat(timespec="seconds"),
+            duration_s=round(duration, 3)
+        )
+        # Media exponencial de la duración para estimar la espera
+        self._avg_job_s = 0.8 * self._avg_job_s + 0.2 * duration
+
+        if status == "done" and self.on_complete:
+            try:
+                self.on_complete(dict(job))
+            except Exception as e:
+                print(f"⚠️ on_complete falló (no crítico): {e}")
@@ -0,0 +1,306 @@
+# src/application/ingest_pipeline.py
+"""
+Pipeline de ingesta por documento, al estilo make.
+
+Etapas: extract (PDF → texto y estructura en una sola pasada) → chunk →
+embed → load (Qdrant). Cada documento tiene su directorio output/pipeline/<doc_id>/ con los
+artefactos de cada etapa y un manifest.json que guarda, por etapa, el
+hash de la entrada, el hash de la configuración, el hash de la salida y
+la duración.
+
+Una etapa se salta si su entrada y su configuración no han cambiado y su
+salida sigue intacta. Cambiar el chunker no vuelve a extraer los PDFs, y
+añadir un PDF no reprocesa los demás: la carga es replace_document sobre
+la colección servida.
+
+Las ejecuciones de un mismo documento se serializan con un lock de fichero
+(output/pipeline/<doc_id>.lock), también entre workers del API y el CLI;
+la creación de la primera versión de la colección, con otro
+(output/pipeline/.collection.lock).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from src.infrastructure.file_lock import FileLock
+
+PIPELINE_DIR = os.getenv('PIPELINE_DIR', 'output/pipeline')
+
+STAGES = ["extract", "chunk", "embed", "load"]
+
+# Artefacto que produce cada etapa (load no produce fichero: registra la colección)
+STAGE_OUTPUTS = {
+    "extract": "extracted_text.json",
+    "chunk": "chunks.json",
+    "embed": "chunks_with_embeddings.json",
+}
+
+
+def file_hash(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def config_hash(config: Dict) -> str:
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def chunk_metadata(chunks: List[Dict], source: str, doc_id: str) -> List[Dict]:
+    """Metadata de carga (la misma que scripts/load_to_qdrant.py)"""
+    return [
+        # Página estimada por id original (la deduplicación deja huecos en la lista)
+        {'chunk_id': c['id'], 'page': c['id'] // 3 + 1, 'has_image': False, 'source': source,
+         'doc_id': doc_id, 'duplicates': c.get('duplicates')}
+        for c in chunks
+    ]
+
+
+class IngestPipeline:
+    def __init__(self,
+                 pipeline_dir: Optional[str] = None,
+                 chunk_size: int = 1000,
+                 overlap: int = 200,
+                 processor=None,
+                 generator=None,
+                 store=None):
+        """
+        processor / generator / store: PDFProcessor, EmbeddingsGenerator y
+        QdrantOptimizedStore; se crean al usarse (extraer no necesita Qdrant)
+        """
+        self.pipeline_dir = pipeline_dir or PIPELINE_DIR
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self._processor = processor
+        self._generator = generator
+        self._store = store
+        self._init_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Componentes (perezosos)
+    # ------------------------------------------------------------------
+
+    @property
+    def processor(self):
+        with self._init_lock:
+            if self._processor is None:
+                from src.infrastructure.document.pdf_processor import PDFProcessor
+                self._processor = PDFProcessor()
+        return self._processor
+
+    @property
+    def generator(self):
+        with self._init_lock:
+            if self._generator is None:
+                from src.infrastructure.embeddings.embeddings_generator import EmbeddingsGenerator
+                self._generator = EmbeddingsGenerator()
+        return self._generator
+
+    @property
+    def store(self):
+        with self._init_lock:
+            if self._store is None:
+                from src.infrastructure.vector_store.qdrant_store_optimized import QdrantOptimizedStore
+                self._store = QdrantOptimizedStore()
+        return self._store
+
+    # ------------------------------------------------------------------
+    # Configuración de cada etapa: si cambia, la etapa se repite
+    # ------------------------------------------------------------------
+
+    def stage_config(self, stage: str) -> Dict:
+        if stage == "extract":
+            # Modelo, tramo de páginas y prompt de la pasada multimodal
+            return self.processor.config()
+        if stage == "chunk":
+            return {"chunk_size": self.chunk_size, "overlap": self.overlap}
+        if stage == "embed":
+            return self.generator.config()
+        if stage == "load":
+            # Una versión nueva tras el alias (rebuild) no contiene el documento
+            return {"collection": self.store.resolve_collection()}
+        raise ValueError(f"Etapa desconocida: {stage}")
+
+    # ------------------------------------------------------------------
+    # Manifest por documento
+    # ------------------------------------------------------------------
+
+    def doc_dir(self, doc_id: str) -> str:
+        return os.path.join(self.pipeline_dir, doc_id)
+
+    def artifact(self, doc_id: str, stage: str) -> str:
+        return os.path.join(self.doc_dir(doc_id), STAGE_OUTPUTS[stage])
+
+    def load_manifest(self, doc_id: str) -> Dict:
+        try:
+            with open(os.path.join(self.doc_dir(doc_id), 'manifest.json'), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"doc_id": doc_id, "stages": {}}
+
+    def save_manifest(self, doc_id: str, manifest: Dict):
+        self._write_json(os.path.join(self.doc_dir(doc_id), 'manifest.json'), manifest)
+
+    def documents(self) -> Dict[str, Dict]:
+        """doc_id → manifest de todos los documentos procesados"""
+        if not os.path.isdir(self.pipeline_dir):
+            return {}
+        return {
+            doc_id: self.load_manifest(doc_id)
+            for doc_id in sorted(os.listdir(self.pipeline_dir))
+            if os.path.exists(os.path.join(self.pipeline_dir, doc_id, 'manifest.json'))
+        }
+
+    def _is_fresh(self, doc_id: str, stage: str, record: Optional[Dict], input_hash: str, cfg_hash: str) -> bool:
+        if not record or record.get("input_hash") != input_hash or record.get("config_hash") != cfg_hash:
+            return False
+        if stage not in STAGE_OUTPUTS:
+            return True
+        path = self.artifact(doc_id, stage)
+        # Un artefacto borrado o editado a mano invalida la etapa
+        return os.path.exists(path) and file_hash(path) == record.get("output_hash")
+
+    # ------------------------------------------------------------------
+    # Etapas
+    # ------------------------------------------------------------------
+
+    def _write_json(self, path: str, data):
+        # Escritura atómica: varios workers pueden procesar documentos a la vez
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _read_json(self, path: str):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _run_stage(self, stage: str, doc_id: str, pdf_path: str) -> Dict:
+        """Ejecuta la etapa y devuelve datos extra para el manifest"""
+        if stage == "extract":
+            result = self.processor.extract_text_from_pdf(pdf_path)
+            self._write_json(self.artifact(doc_id, "extract"), result)
+            return {"chars": len(result["full_text"]), "pages": len(result["complete_analysis"]["pages"])}
+
+        if stage == "chunk":
+            from src.infrastructure.document.text_chunker import TextChunker
+            extracted = self._read_json(self.artifact(doc_id, "extract"))
+            chunks = TextChunker(chunk_size=self.chunk_size, overlap=self.overlap).create_chunks(extracted['full_text'])
+            self._write_json(self.artifact(doc_id, "chunk"), chunks)
+            return {"chunks": len(chunks)}
+
+        if stage == "embed":
+            chunks, report = self.generator.embed_chunks(self._read_json(self.artifact(doc_id, "chunk")))
+            self._write_json(self.artifact(doc_id, "embed"), chunks)
+            return {
+                "chunks": len(chunks),
+                "duplicates_removed": report["duplicates_removed"] if report else 0
+            }
+
+        if stage == "load":
+            chunks = self._read_json(self.artifact(doc_id, "embed"))
+            identity = self.generator.provider.identity()
+            embeddings = [c['embedding'] for c in chunks]
+            if embeddings:
+                # Dos primeras cargas a la vez crearían dos versiones y cambiarían el alias dos veces
+                with FileLock(os.path.join(self.pipeline_dir, '.collection.lock')):
+                    self.store.ensure_collection(len(embeddings[0]), embedding_model=identity)
+            self.store.replace_document(
+                doc_id,
+                [c['content'] for c in chunks],
+                embeddings,
+                chunk_metadata(chunks, pdf_path, doc_id),
+                embedding_model=identity
+            )
+            return {"points": len(chunks)}
+
+        raise ValueError(f"Etapa desconocida: {stage}")
+
+    def _input_hash(self, stage: str, doc_id: str, pdf_path: str) -> str:
+        if stage == "extract":
+            return file_hash(pdf_path)
+        previous = STAGES[STAGES.index(stage) - 1]
+        return file_hash(self.artifact(doc_id, previous))
+
+    def run_document(self,
+                     pdf_path: str,
+                     doc_id: Optional[str] = None,
+                     force: Optional[List[str]] = None,
+                     stages: Optional[List[str]] = None,
+                     on_stage: Optional[Callable[[str, str], None]] = None) -> Dict:
+        """Ejecuta las etapas pendientes de un PDF y devuelve su manifest
+
+        force: etapas a repetir aunque estén al día
+        stages: ejecutar solo hasta estas etapas (por defecto todas)
+        on_stage(stage, estado): 'running' / 'done' / 'skipped' / 'failed' (progreso)
+        """
+        if doc_id is None:
+            from src.infrastructure.vector_store.qdrant_store_optimized import make_doc_id
+            doc_id = make_doc_id(pdf_path)
+        # Un solo run por documento en toda la máquina (manifest y artefactos compartidos)
+        with FileLock(os.path.join(self.pipeline_dir, f"{doc_id}.lock")):
+            return self._run_document(pdf_path, doc_id, set(force or []), stages, on_stage)
+
+    def _run_document(self, pdf_path: str, doc_id: str, force: set, stages: Optional[List[str]],
+                      on_stage: Optional[Callable[[str, str], None]]) -> Dict:
+        os.makedirs(self.doc_dir(doc_id), exist_ok=True)
+
+        manifest = self.load_manifest(doc_id)
+        manifest["source"] = pdf_path
+        run_start = time.perf_counter()
+
+        for stage in stages or STAGES:
+            record = manifest["stages"].get(stage)
+            input_hash = self._input_hash(stage, doc_id, pdf_path)
+            cfg = self.stage_config(stage)
+            cfg_hash = config_hash(cfg)
+
+            # La entrada de cada etapa es la salida de la anterior: si una etapa
+            # produce lo mismo que la vez anterior, las siguientes siguen al día
+            if stage not in force and self._is_fresh(doc_id, stage, record, input_hash, cfg_hash):
+                print(f"   ⏭️ {doc_id}/{stage}: al día")
+                if on_stage:
+                    on_stage(stage, "skipped")
+                continue
+
+            print(f"   ▶️ {doc_id}/{stage}...")
+            if on_stage:
+                on_stage(stage, "running")
+            start = time.perf_counter()
+            try:
+                extra = self._run_stage(stage, doc_id, pdf_path)
+            except Exception:
+                if on_stage:
+                    on_stage(stage, "failed")
+                raise
+            duration = time.perf_counter() - start
+
+            output_hash = file_hash(self.artifact(doc_id, stage)) if stage in STAGE_OUTPUTS else None
+            if stage == "load":
+                # La primera carga crea la versión tras el alias: registrar la real
+                cfg = self.stage_config(stage)
+                cfg_hash = config_hash(cfg)
+            manifest["stages"][stage] = {
+                "input_hash": input_hash,
+                "config": cfg,
+                "config_hash": cfg_hash,
+                "output_hash": output_hash,
+                "duration_s": round(duration, 3),
+                "finished_at": datetime.now().isoformat(timespec="seconds"),
+                **extra
+            }
+            # Guardar tras cada etapa: un fallo posterior no repite las terminadas
+            self.save_manifest(doc_id, manifest)
+            print(f"   ✅ {doc_id}/{stage} ({duration:.2f}s)")
+            if on_stage:
+                on_stage(stage, "done")
+
+        manifest["last_run_s"] = round(time.perf_counter() - run_start, 3)
+        self.save_manifest(doc_id, manifest)
+        return manifest
@@ -1,24 +1,77 @@
 # src/application/rag_service_v2.py - VERSIÓN CORREGIDA COMPLETA
-import google.generativeai as genai
 import json
 import os
 from dotenv import load_dotenv
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
 import base64
+import time
 
+from src.application.extractive import ExtractiveAnswerer
 from src.infrastructure.vector_store.qdrant_store_optimized import QdrantOptimizedStore
+from src.infrastructure.cache.shared_cache import CACHE_DIR, SharedCache, make_key
+from src.infrastructure.llm.gemini_client import get_gemini_client
+from src.infrastructure.embeddings.providers import (
+    create_embedding_provider, get_embedding_provider, provider_name
+)
+from src.infrastructure.resilience import (
+    CircuitOpenError, Deadline, DeadlineExceededError, RequestCancelledError, build_stage_guards
+)
 
 load_dotenv()
 
+ANSWER_CACHE_TTL = float(os.getenv('ANSWER_CACHE_TTL', '3600'))
 
-class RAGServiceV2:
-    def __init__(self):
-        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-        self.embed_model = 'models/text-embedding-004'
-        self.llm_model = genai.GenerativeModel('gemini-2.0-flash-exp')
+# Margen que se reserva del plazo del cliente para responder en modo extractivo
+EXTRACTIVE_RESERVE_S = float(os.getenv('EXTRACTIVE_RESERVE_MS', '150')) / 1000
+EXTRACTIVE_SENTENCES = int(os.getenv('EXTRACTIVE_SENTENCES', '3'))
+
+ANSWER_MODES = ('generative', 'extractive')
+
+THUMBNAIL_DIR = os.path.join(CACHE_DIR, 'thumbnails')
+
+NO_CONTEXT_ANSWER = "No encontré información relevante en el documento."
+
+IMAGE_KEYWORDS = ['diagrama', 'arquitectura', 'imagen', 'foto', 'muestra', 'visualiza']
 
-        # Usar Qdrant Optimizado
-        self.vector_store = QdrantOptimizedStore()
+
+class RAGServiceV2:
+    def __init__(self, vector_store=None, gemini=None, embedder=None):
+        # Cliente Gemini compartido (rate limit + reintentos)
+        self.gemini = gemini or get_gemini_client()
+        # Embeddings de consultas: EMBEDDING_PROVIDER (gemini por red o modelo local en proceso)
+        if embedder is None:
+            embedder = (create_embedding_provider("gemini", gemini=gemini)
+                        if gemini is not None and provider_name() == "gemini"
+                        else get_embedding_provider())
+        self.embedder = embedder
+        self.embed_model = embedder.name
+        self.llm_model = 'gemini-2.0-flash-exp'
+
+        # Usar Qdrant Optimizado (el cliente no conecta hasta la primera llamada)
+        self.vector_store = vector_store or QdrantOptimizedStore()
+
+        # Timeouts, hedging y circuit breaker por etapa (ver resilience.py)
+        self.guards = build_stage_guards()
+
+        # Se rellenan en warmup(), fuera del arranque del API
+        self.document_analysis = {}
+        self.images_metadata = []
+        self.images_by_page = {}
+        self.ready = False
+
+        # Respuesta sin LLM: frases de los chunks con su cita (ver extractive.py)
+        self.extractor = ExtractiveAnswerer(max_sentences=EXTRACTIVE_SENTENCES)
+        self.answer_modes = {"generative": 0, "extractive": 0, "fallback_predicted": 0, "fallback_timeout": 0,
+                             "fallback_circuit_open": 0}
+
+        # Cachés compartidas entre workers (SQLite local, ver shared_cache.py)
+        self.embedding_cache = SharedCache('query_embeddings')
+        self.answer_cache = SharedCache('answers', ttl_seconds=ANSWER_CACHE_TTL)
+        self._collection_version = None
+        self._collection_version_checked = 0.0
+
+    def warmup(self):
+        """Conexión a Qdrant + carga de artefactos (se ejecuta en segundo plano)"""
 
         # Verificar conexión - FORMA CORRECTA
         try:
@@ -31,9 +84,33 @@ class RAGServiceV2:
         except Exception as e:
             raise Exception(f"❌ No se puede conectar a Qdrant: {e}")
 
+        # Consultar con otro modelo que el de la colección daría resultados sin sentido
+        self._check_embedding_model()
+
+        # Sin el contenido de los chunks las respuestas saldrían vacías: no está listo
+        if hasattr(self.vector_store, 'check_chunk_store'):
+            self.vector_store.check_chunk_store()
+
         # Cargar metadata adicional
         self.document_analysis = self._load_document_analysis()
         self.images_metadata = self._load_images_metadata()
+        self.images_by_page = self._build_page_index(self.images_metadata)
+
+        # Abrir el canal con Gemini / cargar el modelo local antes de la primera consulta (no crítico)
+        try:
+            self.embedder.embed_query("warmup")
+        except Exception as e:
+            print(f"⚠️ Warmup de embeddings falló (no crítico): {e}")
+
+        self.ready = True
+
+    def _check_embedding_model(self):
+        recorded = self.vector_store.embedding_model() if hasattr(self.vector_store, 'embedding_model') else None
+        if recorded is None:
+            print(f"⚠️ La colección no registra su modelo de embeddings; se asume {self.embed_model}")
+            return
+        self.vector_store.check_embedding_model(self.embedder.identity())
+        print(f"   - Embeddings: {self.embed_model} ({self.embedder.dim}d)")
 
     def _load_document_analysis(self) -> Dict:
         try:
@@ -50,90 +127,303 @@ class RAGServiceV2:
         except:
             return []
 
-    def query(self, question: str, top_k: int = 3) -> Dict:
-        """Query mejorado usando Qdrant Optimizado"""
+    def _build_page_index(self, images: List[Dict]) -> Dict[int, List[Dict]]:
+        """Índice página → imágenes (fallback de la búsqueda vectorial)"""
+        index = {}
+        for img in images:
+            index.setdefault(img.get('page', 0), []).append(img)
+        return index
 
-        print(f"\n🤔 Pregunta: {question}")
+    def _wants_image(self, question: str) -> bool:
+        query_lower = question.lower()
+        return any(keyword in query_lower for keyword in IMAGE_KEYWORDS)
+
+    def collection_version(self) -> str:
+        """Versión servida tras el alias (se refresca cada 30s); invalida la caché de respuestas al reindexar"""
+        if self._collection_version is None or time.time() - self._collection_version_checked > 30:
+            try:
+                self._collection_version = self.guards['search'].call(
+                    lambda: self.vector_store.resolve_collection(strict=True))
+            except Exception as e:
+                # Sin Qdrant se sigue con la última versión conocida: cambiarla
+                # por el alias invalidaría todas las claves de la caché
+                print(f"⚠️ No se pudo resolver la versión servida: {e}")
+                if self._collection_version is None:
+                    self._collection_version = self.vector_store.resolve_collection()
+            self._collection_version_checked = time.time()
+        return self._collection_version
+
+    def embed_query(self, question: str, deadline: Optional[Deadline] = None) -> List[float]:
+        """Embedding de la pregunta, compartido entre workers vía caché"""
+        key = make_key(self.embed_model, 'retrieval_query', question)
+        embedding = self.embedding_cache.get(key)
+        if embedding is None:
+            embedding = self.guards['embed'].call(lambda: self.embedder.embed_query(question), deadline=deadline)
+            self.embedding_cache.set(key, embedding)
+        return embedding
+
+    def answer_key(self, question: str, top_k: int, filters: Dict, mode: str = 'generative') -> str:
+        return make_key(question.strip().lower(), top_k, filters, self.collection_version(), mode)
+
+    def _retrieve(self, question: str, top_k: int, filters: Dict, deadline: Optional[Deadline] = None):
+        """Embedding + búsqueda híbrida + imágenes: (chunks, imágenes)"""
 
         # Generar embedding de la pregunta
-        query_result = genai.embed_content(
-            model=self.embed_model,
-            content=question,
-            task_type="retrieval_query"
-        )
+        query_embedding = self.embed_query(question, deadline)
 
         # Detectar si necesita imágenes
-        image_keywords = ['diagrama', 'arquitectura', 'imagen', 'foto', 'muestra', 'visualiza']
-        query_lower = question.lower()
-        wants_image = any(keyword in query_lower for keyword in image_keywords)
+        wants_image = self._wants_image(question)
 
         # USAR BÚSQUEDA HÍBRIDA OPTIMIZADA
         print("🔍 Búsqueda híbrida en Qdrant Optimizado...")
 
-        filters = {"has_image": True} if wants_image else None
+        if wants_image:
+            filters = {**filters, "has_image": True}
 
-        relevant_chunks = self.vector_store.hybrid_search(
-            query_embedding=query_result['embedding'],
+        relevant_chunks = self.guards['search'].call(lambda: self.vector_store.hybrid_search(
+            query_embedding=query_embedding,
             query_text=question,  # Para búsqueda de texto
             top_k=top_k,
-            filters=filters
-        )
+            filters=filters or None
+        ), deadline=deadline)
 
         print(f"📊 Encontrados {len(relevant_chunks)} chunks relevantes")
         scores = ['{:.3f}'.format(r['score']) for r in relevant_chunks]
         print(f"   Scores híbridos: {scores}")
 
         # Buscar imágenes relevantes
-        relevant_images = self.find_relevant_images(question, relevant_chunks)
-
-        # Generar respuesta
-        answer = self.generate_answer(question, relevant_chunks, relevant_images)
-
-        # Preparar imágenes
-        images_data = self._prepare_images(relevant_images)
+        relevant_images = self.find_relevant_images(
+            question, relevant_chunks, query_embedding=query_embedding, deadline=deadline
+        )
+        return relevant_chunks, relevant_images
 
+    def _build_result(self, question: str, answer: str, chunks: List[Dict], images: List[Dict],
+                      mode: str = 'generative', passages: Optional[List[Dict]] = None,
+                      degraded: bool = False) -> Dict:
+        # Las imágenes se guardan como referencias; el base64 se genera al responder
         return {
             'question': question,
             'answer': answer,
-            'sources': [f"Chunk {chunk['metadata']['chunk_id']}" for chunk in relevant_chunks],
-            'images': images_data,
-            'confidence': relevant_chunks[0]['score'] if relevant_chunks else 0.0,
-            'chunks_used': len(relevant_chunks),
-            'search_type': 'hybrid_optimized'
+            'sources': [f"Chunk {chunk['metadata']['chunk_id']}" for chunk in chunks],
+            'source_details': [
+                {
+                    'chunk_id': chunk['metadata']['chunk_id'],
+                    'page': chunk['metadata'].get('page'),
+                    'doc_id': chunk['metadata'].get('doc_id'),
+                    'score': chunk['score']
+                }
+                for chunk in chunks
+            ],
+            'images': self._image_refs(images),
+            'confidence': chunks[0]['score'] if chunks else 0.0,
+            'chunks_used': len(chunks),
+            'search_type': 'hybrid_optimized',
+            'mode': mode,
+            'passages': passages or [],
+            # Modo extractivo porque la generación no cabía en el plazo
+            'degraded': degraded
         }
 
-    def find_relevant_images(self, query: str, chunks: List[Dict]) -> List[Dict]:
-        """Encuentra imágenes relevantes"""
-        relevant_images = []
+    def query(self,
+              question: str,
+              top_k: int = 3,
+              filters: Optional[Dict] = None,
+              include_image_data: bool = True,
+              deadline: Optional[Deadline] = None,
+              mode: str = 'generative') -> Dict:
+        """Query mejorado usando Qdrant Optimizado
+
+        filters: doc_id, source, page_from/page_to (ver QdrantOptimizedStore.build_filter)
+        include_image_data: False devuelve las imágenes sin base64 (solo referencias)
+        deadline: plazo del cliente; cada etapa espera como mucho lo que queda y,
+        si se agota o el cliente se va, no se llega a generar
+        mode: 'generative' (Gemini) o 'extractive' (frases citadas, sin LLM)
+        """
+
+        print(f"\n🤔 Pregunta: {question}")
+
+        filters = dict(filters or {})
+        answer_key = self.answer_key(question, top_k, filters, mode)
+        cached = self.answer_cache.get(answer_key)
+        if cached is not None:
+            print("⚡ Respuesta desde caché")
+            return {**cached, 'images': self._response_images(cached['images'], include_image_data), 'cached': True}
+
+        relevant_chunks, relevant_images = self._retrieve(question, top_k, filters, deadline)
+
+        # Generar respuesta (o extraerla si se pide o si Gemini no cabe en el plazo)
+        generative_deadline = self._generation_plan(mode, relevant_chunks, deadline)
+        result = None
+        if generative_deadline is not False:
+            try:
+                answer = self.generate_answer(question, relevant_chunks, relevant_images, generative_deadline)
+                result = self._build_result(question, answer, relevant_chunks, relevant_images)
+            except DeadlineExceededError:
+                if generative_deadline is deadline:
+                    raise
+                self.answer_modes["fallback_timeout"] += 1
+                print("⏱️ Gemini no respondió a tiempo: respuesta extractiva")
+            except CircuitOpenError:
+                self.answer_modes["fallback_circuit_open"] += 1
+                print("🔌 Circuito de generación abierto: respuesta extractiva")
+        if result is None:
+            result = self._extractive_result(question, relevant_chunks, relevant_images, degraded=mode != 'extractive')
+
+        # Las respuestas degradadas no se cachean: la siguiente puede tener más plazo
+        if not result['degraded']:
+            self.answer_modes[result['mode']] += 1
+            self.answer_cache.set(answer_key, result)
+        return {**result, 'images': self._response_images(result['images'], include_image_data), 'cached': False}
+
+    def query_stream(self,
+                     question: str,
+                     top_k: int = 3,
+                     filters: Optional[Dict] = None,
+                     deadline: Optional[Deadline] = None,
+                     mode: str = 'generative') -> Iterator[Dict]:
+        """Como query(), pero en eventos: meta (fuentes + imágenes por referencia),
+        token (fragmentos de la respuesta según los genera Gemini) y done
+        (modo de la respuesta y pasajes si es extractiva)"""
+
+        print(f"\n🤔 Pregunta (stream): {question}")
+
+        filters = dict(filters or {})
+        answer_key = self.answer_key(question, top_k, filters, mode)
+        cached = self.answer_cache.get(answer_key)
+        if cached is not None:
+            print("⚡ Respuesta desde caché")
+            yield self._meta_event(cached, cached=True)
+            yield {'type': 'token', 'text': cached['answer']}
+            yield self._done_event(cached)
+            return
+
+        relevant_chunks, relevant_images = self._retrieve(question, top_k, filters, deadline)
+        result = self._build_result(question, '', relevant_chunks, relevant_images)
+        yield self._meta_event(result, cached=False)
+
+        generative_deadline = self._generation_plan(mode, relevant_chunks, deadline)
+        if generative_deadline is not False:
+            tokens = self.stream_answer(question, relevant_chunks, relevant_images, generative_deadline)
+            try:
+                # Hasta el primer fragmento todavía se puede cambiar de modo
+                first = next(tokens, None)
+            except DeadlineExceededError:
+                if generative_deadline is deadline:
+                    raise
+                self.answer_modes["fallback_timeout"] += 1
+                print("⏱️ Gemini no respondió a tiempo: respuesta extractiva")
+            except CircuitOpenError:
+                self.answer_modes["fallback_circuit_open"] += 1
+                print("🔌 Circuito de generación abierto: respuesta extractiva")
+            else:
+                parts = []
+                if first is not None:
+                    parts.append(first)
+                    yield {'type': 'token', 'text': first}
+                for text in tokens:
+                    parts.append(text)
+                    yield {'type': 'token', 'text': text}
+
+                result['answer'] = ''.join(parts)
+                self.answer_modes['generative'] += 1
+                self.answer_cache.set(answer_key, result)
+                yield self._done_event(result)
+                return
+
+        result = self._extractive_result(question, relevant_chunks, relevant_images, degraded=mode != 'extractive')
+        yield {'type': 'token', 'text': result['answer']}
+        if not result['degraded']:
+            self.answer_modes['extractive'] += 1
+            self.answer_cache.set(answer_key, result)
+        yield self._done_event(result)
+
+    def _generation_plan(self, mode: str, chunks: List[Dict], deadline: Optional[Deadline]):
+        """Plazo con el que llamar a Gemini, o False si se responde en modo extractivo
+
+        Con plazo del cliente, Gemini recibe un plazo hijo que vence
+        EXTRACTIVE_RESERVE_S antes: si no responde, aún queda margen para la
+        respuesta extractiva. Si su latencia típica ya no cabe, ni se llama.
+        """
+        if mode == 'extractive':
+            return False
+        if not chunks or deadline is None or deadline.expires_at is None:
+            return deadline
+
+        expected = self.guards['generate'].expected_latency()
+        if expected is not None and expected + EXTRACTIVE_RESERVE_S > deadline.remaining():
+            deadline.check('extractive')
+            self.answer_modes["fallback_predicted"] += 1
+            print(f"⏱️ Gemini (~{expected * 1000:.0f}ms) no cabe en el plazo: respuesta extractiva")
+            return False
+        return deadline.child(EXTRACTIVE_RESERVE_S)
+
+    def _extractive_result(self, question: str, chunks: List[Dict], images: List[Dict], degraded: bool) -> Dict:
+        passages, answer = self.extractive_answer(question, chunks)
+        return self._build_result(question, answer, chunks, images, 'extractive', passages, degraded)
+
+    def extractive_answer(self, question: str, chunks: List[Dict]) -> Tuple[List[Dict], str]:
+        """Pasajes citados + texto de la respuesta, sin llamar a Gemini"""
+        passages = self.extractor.extract(question, chunks)
+        if not passages:
+            return [], NO_CONTEXT_ANSWER
+        return passages, self.extractor.format_answer(passages)
+
+    def _done_event(self, result: Dict) -> Dict:
+        return {
+            'type': 'done',
+            'mode': result.get('mode', 'generative'),
+            'degraded': result.get('degraded', False),
+            'passages': result.get('passages', [])
+        }
 
-        # Detectar si piden imágenes
-        image_keywords = ['diagrama', 'arquitectura', 'imagen', 'foto', 'muestra', 'visualiza']
-        query_lower = query.lower()
-        wants_image = any(keyword in query_lower for keyword in image_keywords)
+    def _meta_event(self, result: Dict, cached: bool) -> Dict:
+        return {
+            'type': 'meta',
+            'sources': result['sources'],
+            'images': self._response_images(result['images'], include_image_data=False),
+            'confidence': result['confidence'],
+            'cached': cached
+        }
+
+    def find_relevant_images(self,
+                             query: str,
+                             chunks: List[Dict],
+                             query_embedding: Optional[List[float]] = None,
+                             max_images: int = 2,
+                             deadline: Optional[Deadline] = None) -> List[Dict]:
+        """Encuentra imágenes relevantes"""
 
-        if not wants_image:
+        if not self._wants_image(query):
             return []
 
-        # Buscar imágenes por página - AJUSTADO PARA HYBRID SEARCH
-        relevant_pages = set()
+        # 1. Búsqueda vectorial directa sobre las descripciones de imágenes
+        if query_embedding is not None:
+            try:
+                images = self.guards['images'].call(
+                    lambda: self.vector_store.search_images(query_embedding, top_k=max_images),
+                    deadline=deadline
+                )
+                if images:
+                    print(f"🖼️ {len(images)} imágenes por búsqueda vectorial")
+                    return images
+            except (DeadlineExceededError, RequestCancelledError):
+                raise
+            except Exception as e:
+                print(f"⚠️ Búsqueda de imágenes no disponible: {e}")
+
+        # 2. Fallback: imágenes de las páginas de los chunks recuperados
+        relevant_images = []
         for chunk in chunks:
             page = chunk.get('metadata', {}).get('page', 0)
-            relevant_pages.add(page)
-
-        for img in self.images_metadata:
-            if img.get('page', 0) in relevant_pages:
-                relevant_images.append(img)
-                if len(relevant_images) >= 2:
-                    break
+            for img in self.images_by_page.get(page, []):
+                if img not in relevant_images:
+                    relevant_images.append(img)
+                if len(relevant_images) >= max_images:
+                    return relevant_images
 
         return relevant_images
 
-    def generate_answer(self, query: str, chunks: List[Dict], images: List[Dict]) -> str:
-        """Genera respuesta con contexto optimizado"""
-
-        if not chunks:
-            return "No encontré información relevante en el documento."
-
+    def _build_prompt(self, query: str, chunks: List[Dict], images: List[Dict]) -> str:
         # Contexto con scores híbridos
         context = "\n\n---\n\n".join([
             f"[Score híbrido: {chunk['score']:.2%}]\n{chunk['text']}"
@@ -147,7 +437,7 @@ class RAGServiceV2:
             for img in images:
                 image_context += f"- {img.get('description', 'Imagen')} (página {img.get('page', '?')})\n"
 
-        prompt = f"""
+        return f"""
         Eres un asistente experto analizando el documento AWS GenAI IDP Accelerator.
 
         CONTEXTO RECUPERADO (búsqueda híbrida):
@@ -165,13 +455,73 @@ class RAGServiceV2:
         RESPUESTA:
         """
 
-        response = self.llm_model.generate_content(prompt)
+    def generate_answer(self, query: str, chunks: List[Dict], images: List[Dict],
+                        deadline: Optional[Deadline] = None) -> str:
+        """Genera respuesta con contexto optimizado"""
+
+        if not chunks:
+            return NO_CONTEXT_ANSWER
+
+        prompt = self._build_prompt(query, chunks, images)
+        response = self.guards['generate'].call(
+            lambda: self.gemini.generate_content(self.llm_model, prompt, deadline=deadline),
+            deadline=deadline
+        )
         return response.text
 
+    def stream_answer(self, query: str, chunks: List[Dict], images: List[Dict],
+                      deadline: Optional[Deadline] = None) -> Iterator[str]:
+        """Genera la respuesta en fragmentos (stream=True de Gemini)
+
+        El guard cubre hasta recibir el stream; los fragmentos llegan después
+        (con plazo, se deja de leer el stream en cuanto se agota).
+        """
+
+        if not chunks:
+            yield NO_CONTEXT_ANSWER
+            return
+
+        prompt = self._build_prompt(query, chunks, images)
+        response = self.guards['generate'].call(
+            lambda: self.gemini.generate_content(self.llm_model, prompt, stream=True, deadline=deadline),
+            deadline=deadline
+        )
+        for part in response:
+            if deadline is not None:
+                deadline.check('generate')
+            try:
+                text = part.text
+            except ValueError:
+                # Fragmento sin texto (p.ej. bloqueado por seguridad)
+                continue
+            if text:
+                yield text
+
+    def _image_refs(self, images: List[Dict]) -> List[Dict]:
+        """Referencias ligeras (sin bytes) a las imágenes de una respuesta"""
+        return [
+            {
+                'filename': img.get('filename', ''),
+                'path': img.get('path', ''),
+                'description': img.get('description', ''),
+                'page': img.get('page', 0)
+            }
+            for img in images
+        ]
+
+    def _response_images(self, images: List[Dict], include_image_data: bool) -> List[Dict]:
+        if include_image_data:
+            return self._prepare_images(images)
+        return [{k: v for k, v in img.items() if k not in ('path', 'data')} for img in images]
+
     def _prepare_images(self, images: List[Dict]) -> List[Dict]:
         """Prepara imágenes para respuesta"""
         images_data = []
         for img in images:
+            if 'data' in img:
+                # Entrada de caché anterior, ya codificada
+                images_data.append(img)
+                continue
             try:
                 path = img.get('path', '')
                 if os.path.exists(path):
@@ -187,6 +537,32 @@ class RAGServiceV2:
                 print(f"⚠️ Error cargando imagen: {e}")
         return images_data
 
+    def image_path(self, filename: str) -> Optional[str]:
+        """Ruta de una imagen conocida (solo las de images_with_context.json)"""
+        for img in self.images_metadata:
+            if img.get('filename') == filename and os.path.exists(img.get('path', '')):
+                return img['path']
+        return None
+
+    def image_thumbnail(self, filename: str, size: int = 256) -> Optional[str]:
+        """Miniatura JPEG cacheada en disco (se genera en la primera petición)"""
+        path = self.image_path(filename)
+        if path is None:
+            return None
+
+        thumb_path = os.path.join(THUMBNAIL_DIR, str(size), f"{os.path.splitext(filename)[0]}.jpg")
+        if not os.path.exists(thumb_path) or os.path.getmtime(thumb_path) < os.path.getmtime(path):
+            from PIL import Image
+
+            os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+            with Image.open(path) as img:
+                img.thumbnail((size, size))
+                tmp_path = f"{thumb_path}.{os.getpid()}.tmp"
+                img.convert('RGB').save(tmp_path, 'JPEG', quality=85)
+            # Rename atómico: varios workers pueden generar la misma miniatura
+            os.replace(tmp_path, thumb_path)
+        return thumb_path
+
     def get_stats(self) -> Dict:
         """Estadísticas del sistema"""
         stats = self.vector_store.get_statistics()
@@ -195,7 +571,15 @@ class RAGServiceV2:
             'vector_db': 'Qdrant',
             'collection': self.vector_store.collection_name,
             'stats': stats if 'error' not in stats else None,
-            'model': 'gemini-2.0-flash-exp',
-            'embedding_model': 'text-embedding-004',
-            'search_type': 'hybrid_optimized'
+            'model': self.llm_model,
+            'embedding_model': self.embedder.identity(),
+            'search_type': 'hybrid_optimized',
+            'gemini': self.gemini.metrics(),
+            'embeddings': self.embedder.metrics(),
+            'stages': {name: guard.stats() for name, guard in self.guards.items()},
+            'answer_modes': self.answer_modes,
+            'caches': {
+                'query_embeddings': self.embedding_cache.stats(),
+                'answers': self.answer_cache.stats()
+            }
         }
\ No newline at end of file
@@ -0,0 +1,343 @@
+# src/application/snapshot_bundle.py
+"""
+Paquetes de snapshot del índice para levantar réplicas sin reingestar.
+
+export: snapshot de Qdrant de la versión servida (y de la versión de
+imágenes servida), filas del ChunkStore de esa versión (texto de los chunks, del
+que sale el score léxico de hybrid_search) y los artefactos que el
+servicio carga al arrancar: análisis del documento, metadata e imágenes,
+perfil de índice e identidad del modelo de embeddings. Todo va a un
+directorio con un manifest.json que guarda sha256 y tamaño de cada fichero.
+
+import: verifica cada fichero leyéndolo por bloques, sube los snapshots a
+Qdrant en streaming (Qdrant vuelve a comprobar el checksum) con su nombre
+de versión, comprueba puntos, dimensión y modelo de embeddings de cada
+colección, restaura las filas del ChunkStore y los artefactos, y solo
+entonces apunta los alias de chunks e imágenes a la vez (una operación).
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+
+from src.infrastructure.embeddings.embeddings_generator import EMBEDDING_MODEL_PATH
+from src.infrastructure.embeddings.providers import check_identity, get_embedding_provider
+from src.infrastructure.vector_store.index_profile import PROFILE_PATH
+from src.infrastructure.vector_store.qdrant_store_optimized import FULL_VECTOR, QdrantOptimizedStore
+
+BUNDLES_DIR = os.getenv('BUNDLES_DIR', 'output/bundles')
+BUNDLE_FORMAT = 1
+BLOCK_SIZE = 1 << 20
+
+IMAGES_METADATA_PATH = 'output/images_with_context.json'
+
+# Artefactos que carga el servicio al arrancar (rutas relativas a la raíz del repo)
+ARTIFACTS = [
+    'output/complete_document_analysis.json',
+    IMAGES_METADATA_PATH,
+    PROFILE_PATH,
+    EMBEDDING_MODEL_PATH,
+]
+
+
+class BundleError(Exception):
+    """Bundle incompleto, corrupto o incompatible"""
+
+
+def sha256_file(path: str) -> Dict:
+    sha = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+            sha.update(block)
+            size += len(block)
+    return {"sha256": sha.hexdigest(), "bytes": size}
+
+
+def _safe_relpath(path: str) -> str:
+    """Ruta relativa dentro del repo (un manifest no puede escribir fuera)"""
+    rel = os.path.normpath(path)
+    if os.path.isabs(rel) or rel == '..' or rel.startswith('..' + os.sep):
+        raise BundleError(f"Ruta fuera del repositorio en el bundle: {path}")
+    return rel
+
+
+class SnapshotBundler:
+    def __init__(self, store: Optional[QdrantOptimizedStore] = None, timeout: float = 600):
+        self.store = store or QdrantOptimizedStore()
+        self.timeout = timeout
+
+    # ------------------------------------------------------------------
+    # Snapshots de Qdrant (REST, en streaming)
+    # ------------------------------------------------------------------
+
+    def _download_snapshot(self, collection: str, path: str) -> Dict:
+        snapshot = self.store.client.create_snapshot(collection_name=collection, wait=True)
+        url = f"{self.store.url}/collections/{collection}/snapshots/{snapshot.name}"
+        tmp_path = f"{path}.tmp"
+        sha = hashlib.sha256()
+        size = 0
+        try:
+            with httpx.stream("GET", url, timeout=self.timeout) as response:
+                response.raise_for_status()
+                with open(tmp_path, 'wb') as f:
+                    for block in response.iter_bytes(BLOCK_SIZE):
+                        f.write(block)
+                        sha.update(block)
+                        size += len(block)
+        except BaseException:
+            # Descarga cortada (red, disco, Ctrl+C): sin ficheros a medias
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            # El snapshot ocupa disco en el servidor: solo se necesitaba para descargarlo
+            self.store.client.delete_snapshot(collection_name=collection, snapshot_name=snapshot.name)
+
+        digest = sha.hexdigest()
+        if snapshot.checksum and snapshot.checksum != digest:
+            os.remove(tmp_path)
+            raise BundleError(f"Snapshot de '{collection}' corrupto en la descarga")
+        os.replace(tmp_path, path)
+        return {"sha256": digest, "bytes": size}
+
+    def _upload_snapshot(self, collection: str, path: str, checksum: str):
+        url = f"{self.store.url}/collections/{collection}/snapshots/upload"
+        # httpx envía el fichero por bloques; priority=snapshot: los datos del
+        # snapshot sustituyen a los de la colección si ya existía
+        with open(path, 'rb') as f:
+            response = httpx.post(
+                url,
+                params={"priority": "snapshot", "checksum": checksum, "wait": "true"},
+                files={"snapshot": (os.path.basename(path), f, "application/octet-stream")},
+                timeout=self.timeout
+            )
+        if response.status_code >= 400:
+            raise BundleError(f"Qdrant rechazó el snapshot de '{collection}': {response.text[:300]}")
+
+    def _count(self, collection: str) -> int:
+        return self.store.client.count(collection_name=collection, exact=True).count
+
+    def _vector_size(self, collection: str) -> int:
+        vectors = self.store.client.get_collection(collection).config.params.vectors
+        if isinstance(vectors, dict):
+            # Colección en dos etapas: la dimensión del modelo es la del vector completo
+            vectors = vectors.get(FULL_VECTOR) or next(iter(vectors.values()))
+        return vectors.size
+
+    def _check_vectors(self, collection: str, expected: Optional[Dict], current: Optional[Dict]):
+        """La colección restaurada tiene la dimensión y el modelo que declara el bundle"""
+        if not expected:
+            return
+        size = self._vector_size(collection)
+        if size != expected.get("dim"):
+            raise BundleError(f"'{collection}' tiene vectores de {size}d; el bundle declara "
+                              f"{expected['provider']}:{expected['model']} ({expected.get('dim')}d)")
+        if current is not None:
+            check_identity(expected, current, f"La colección '{collection}' del bundle")
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def _artifact_paths(self) -> List[str]:
+        paths = [path for path in ARTIFACTS if os.path.exists(path)]
+        # Las imágenes que sirve /images/{filename}
+        try:
+            with open(IMAGES_METADATA_PATH, 'r') as f:
+                images = json.load(f)
+        except (OSError, ValueError):
+            images = []
+        for img in images:
+            path = img.get('path')
+            if path and os.path.exists(path) and path not in paths:
+                paths.append(path)
+        return paths
+
+    def export(self, bundle_dir: Optional[str] = None) -> Dict:
+        """Empaqueta la versión servida; devuelve el manifest"""
+        start = time.perf_counter()
+        collection = self.store.resolve_collection()
+        if not self.store.client.collection_exists(collection):
+            raise BundleError(f"No existe la colección '{collection}'")
+
+        bundle_dir = bundle_dir or os.path.join(BUNDLES_DIR, collection)
+        os.makedirs(os.path.join(bundle_dir, 'qdrant'), exist_ok=True)
+        files = {}
+        collections = {}
+
+        print(f"📦 Exportando '{collection}' → {bundle_dir}")
+        targets = [("chunks", collection, self.store.collection_name)]
+        # Imágenes: la versión servida tras su alias (load_images_to_qdrant.py)
+        images_alias = self.store.images_collection_name
+        images = self.store.resolve_collection(images_alias)
+        if self.store.client.collection_exists(images):
+            targets.append(("images", images, images_alias))
+        for role, name, alias in targets:
+            rel = f"qdrant/{name}.snapshot"
+            files[rel] = self._download_snapshot(name, os.path.join(bundle_dir, rel))
+            collections[role] = {"name": name, "alias": alias, "file": rel, "points": self._count(name),
+                                 "embedding_model": self.store.chunk_store.get_embedding_model(name)}
+            print(f"   ✅ Snapshot '{name}': {files[rel]['bytes'] / 1e6:.1f} MB, {collections[role]['points']} puntos")
+
+        # Texto de los chunks de esta versión (un JSON por línea)
+        rel = "chunk_store.jsonl"
+        rows = 0
+        with open(os.path.join(bundle_dir, rel), 'w', encoding='utf-8') as f:
+            for batch in self.store.chunk_store.iter_collection(collection):
+                for row in batch:
+                    f.write(json.dumps(row, ensure_ascii=False) + '\n')
+                rows += len(batch)
+        files[rel] = sha256_file(os.path.join(bundle_dir, rel))
+        print(f"   ✅ ChunkStore: {rows} filas")
+
+        artifacts = {}
+        for path in self._artifact_paths():
+            rel = os.path.join('artifacts', _safe_relpath(path))
+            os.makedirs(os.path.dirname(os.path.join(bundle_dir, rel)), exist_ok=True)
+            shutil.copyfile(path, os.path.join(bundle_dir, rel))
+            files[rel] = sha256_file(os.path.join(bundle_dir, rel))
+            artifacts[rel] = path
+        print(f"   ✅ Artefactos: {len(artifacts)} ficheros")
+
+        manifest = {
+            "format": BUNDLE_FORMAT,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "alias": self.store.collection_name,
+            "collections": collections,
+            "chunk_rows": rows,
+            "embedding_model": self.store.chunk_store.get_embedding_model(collection),
+            "artifacts": artifacts,
+            "files": files
+        }
+        with open(os.path.join(bundle_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        total = sum(entry["bytes"] for entry in files.values())
+        print(f"✅ Bundle listo: {total / 1e6:.1f} MB en {time.perf_counter() - start:.1f}s")
+        return manifest
+
+    # ------------------------------------------------------------------
+    # Import
+    # ------------------------------------------------------------------
+
+    def load_manifest(self, bundle_dir: str) -> Dict:
+        try:
+            with open(os.path.join(bundle_dir, 'manifest.json'), 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise BundleError(f"Bundle sin manifest.json válido en {bundle_dir}: {e}")
+        if manifest.get("format") != BUNDLE_FORMAT:
+            raise BundleError(f"Formato de bundle {manifest.get('format')} no soportado (se espera {BUNDLE_FORMAT})")
+        return manifest
+
+    def verify(self, bundle_dir: str, manifest: Optional[Dict] = None) -> Dict:
+        """Comprueba tamaño y sha256 de todos los ficheros antes de tocar nada"""
+        manifest = manifest or self.load_manifest(bundle_dir)
+        errors = []
+        for rel, expected in manifest["files"].items():
+            path = os.path.join(bundle_dir, _safe_relpath(rel))
+            if not os.path.exists(path):
+                errors.append(f"{rel}: no existe")
+                continue
+            actual = sha256_file(path)
+            if actual != expected:
+                errors.append(f"{rel}: checksum o tamaño distinto")
+        if errors:
+            raise BundleError("Bundle corrupto o incompleto:\n   " + "\n   ".join(errors))
+        return manifest
+
+    def _restore_file(self, source: str, target: str):
+        os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        shutil.copyfile(source, tmp_path)
+        # Rename atómico: un worker que lea el artefacto no ve un fichero a medias
+        os.replace(tmp_path, target)
+
+    def import_bundle(self,
+                      bundle_dir: str,
+                      swap: bool = True,
+                      force: bool = False,
+                      keep_versions: int = 2,
+                      check_model: bool = True) -> Dict:
+        """Restaura un bundle y (swap) lo sirve tras el alias; devuelve el manifest
+
+        force: volver a subir los snapshots aunque la colección ya exista
+        check_model: exigir que EMBEDDING_PROVIDER/EMBEDDING_MODEL coincidan
+        con el modelo del bundle (el servicio no arrancaría si no)
+        """
+        start = time.perf_counter()
+        manifest = self.verify(bundle_dir)
+        print(f"🔍 Bundle verificado ({len(manifest['files'])} ficheros)")
+
+        current = get_embedding_provider().identity() if check_model else None
+        if current is not None:
+            check_identity(manifest.get("embedding_model"), current, "El bundle")
+
+        collection = manifest["collections"]["chunks"]["name"]
+        served = self.store.get_alias_target(manifest["alias"])
+        # alias → versión restaurada; los alias solo cambian cuando todas están verificadas
+        restored = {}
+        identities = {}
+        for role, info in manifest["collections"].items():
+            name = info["name"]
+            alias = info.get("alias") or (manifest["alias"] if role == "chunks" else self.store.images_collection_name)
+            if name == alias:
+                # Bundles anteriores: la colección de imágenes se exportaba con el nombre del alias
+                name = self.store.new_version_name(alias)
+            restored[alias] = name
+            identities[name] = info.get("embedding_model") or manifest.get("embedding_model")
+
+            if name == self.store.get_alias_target(alias) and not force:
+                print(f"   ⏭️ '{name}' ya es la versión servida")
+                continue
+            if self.store.client.collection_exists(name) and not force:
+                print(f"   ⏭️ '{name}' ya existe")
+            else:
+                self._upload_snapshot(
+                    name, os.path.join(bundle_dir, info["file"]), manifest["files"][info["file"]]["sha256"]
+                )
+            points = self._count(name)
+            if points != info["points"]:
+                raise BundleError(f"'{name}' tiene {points} puntos tras restaurar; el bundle tiene {info['points']}")
+            self._check_vectors(name, identities[name], current)
+            print(f"   ✅ Qdrant '{name}': {points} puntos")
+
+        # Filas del ChunkStore: se sustituyen las de esa versión (si ya se sirve,
+        # INSERT OR REPLACE sin borrar antes: las consultas no ven huecos)
+        chunk_store = self.store.chunk_store
+        if collection != served:
+            chunk_store.delete_collection(collection)
+        batch = []
+        with open(os.path.join(bundle_dir, 'chunk_store.jsonl'), 'r', encoding='utf-8') as f:
+            for line in f:
+                batch.append(json.loads(line))
+                if len(batch) >= 1000:
+                    chunk_store.put_many(collection, batch)
+                    batch = []
+        if batch:
+            chunk_store.put_many(collection, batch)
+        for name, identity in identities.items():
+            if identity:
+                chunk_store.set_embedding_model(name, identity)
+        print(f"   ✅ ChunkStore: {chunk_store.count(collection)} filas")
+
+        for rel, target in manifest["artifacts"].items():
+            self._restore_file(os.path.join(bundle_dir, _safe_relpath(rel)), _safe_relpath(target))
+        print(f"   ✅ Artefactos: {len(manifest['artifacts'])} ficheros")
+
+        if swap:
+            # Chunks e imágenes cambian en la misma operación: nunca se sirven de versiones distintas
+            targets = {alias: name for alias, name in restored.items() if self.store.get_alias_target(alias) != name}
+            if targets:
+                self.store.swap_aliases(targets)
+                for alias in targets:
+                    self.store.garbage_collect_versions(alias, keep=keep_versions)
+
+        print(f"✅ Bundle restaurado en {time.perf_counter() - start:.1f}s")
+        return manifest
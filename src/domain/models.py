@@ -1,17 +1,66 @@
 # src/domain/models.py
 from pydantic import BaseModel
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Literal
 
 class QueryRequest(BaseModel):
     question: str
     top_k: Optional[int] = 3
+    # Filtros opcionales (se aplican dentro de la búsqueda vectorial)
+    doc_id: Optional[str] = None
+    source: Optional[str] = None
+    page_from: Optional[int] = None
+    page_to: Optional[int] = None
+    # False: imágenes solo por URL (sin base64 en la respuesta)
+    include_image_data: Optional[bool] = True
+    # Plazo del cliente en ms (también cabecera X-Request-Timeout-Ms); se propaga a cada etapa
+    timeout_ms: Optional[int] = None
+    # extractive: frases de los chunks con su cita, sin LLM (también es el plan B
+    # automático si la generación no cabe en el plazo)
+    mode: Optional[Literal["generative", "extractive"]] = "generative"
+
+    def filters(self) -> Dict:
+        return {
+            key: value for key, value in {
+                "doc_id": self.doc_id,
+                "source": self.source,
+                "page_from": self.page_from,
+                "page_to": self.page_to
+            }.items() if value is not None
+        }
+
+class ImageInfo(BaseModel):
+    filename: str
+    description: str = ""
+    page: int = 0
+    # Base64 del PNG (solo si include_image_data)
+    data: Optional[str] = None
+    url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+
+class SourceInfo(BaseModel):
+    chunk_id: int
+    page: Optional[int] = None
+    doc_id: Optional[str] = None
+    score: float
+
+class PassageInfo(BaseModel):
+    text: str
+    chunk_id: Optional[int] = None
+    page: Optional[int] = None
+    doc_id: Optional[str] = None
+    score: float
 
 class QueryResponse(BaseModel):
     question: str
     answer: str
     sources: List[str]
-    images: Optional[List[Dict]] = []
+    source_details: List[SourceInfo] = []
+    images: Optional[List[ImageInfo]] = []
     confidence: Optional[float] = None
+    # generative / extractive; degraded = extractiva porque Gemini no cabía en el plazo
+    mode: str = "generative"
+    degraded: bool = False
+    passages: List[PassageInfo] = []
 
 class DocumentInfo(BaseModel):
     total_chunks: int
@@ -22,4 +71,20 @@ class DocumentInfo(BaseModel):
 class HealthResponse(BaseModel):
     status: str
     model: str
-    chunks_loaded: int
\ No newline at end of file
+    chunks_loaded: int
+
+class IngestJob(BaseModel):
+    job_id: str
+    doc_id: str
+    filename: str
+    # queued / running / done / failed / rejected
+    status: str
+    # Etapa actual y estado de cada una (pending / running / done / skipped)
+    stage: Optional[str] = None
+    stages: Dict[str, str] = {}
+    progress: float = 0.0
+    error: Optional[str] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    duration_s: Optional[float] = None
@@ -0,0 +1,100 @@
+# src/infrastructure/cache/query_log.py
+"""
+Registro de las consultas servidas por el API (JSON Lines, un fichero
+compartido por todos los workers).
+
+Solo guarda lo necesario para repetir la consulta (pregunta, top_k,
+filtros, modo) y el instante; el calentamiento de cachés (ver
+src/application/cache_warmup.py) lo usa para saber qué preguntas son
+frecuentes. Al superar QUERY_LOG_MAX_MB se rota a <fichero>.1.
+
+La pregunta se guarda tal cual la escribió el usuario, sin anonimizar:
+si puede contener datos personales, QUERY_LOG=0 desactiva el registro.
+
+record() escribe en disco: desde el event loop hay que llamarlo en un
+thread (ver _log_query en src/api/main.py).
+"""
+import json
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+QUERY_LOG_PATH = os.getenv('QUERY_LOG_PATH', 'output/query_log.jsonl')
+
+
+class QueryLog:
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.path = path or QUERY_LOG_PATH
+        self.max_bytes = max_bytes or int(float(os.getenv('QUERY_LOG_MAX_MB', '20')) * 1024 * 1024)
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def record(self, question: str, top_k: int, filters: Dict, mode: str = 'generative'):
+        """Añade una consulta (nunca falla: el registro no puede tumbar una respuesta)"""
+        line = json.dumps({
+            "ts": round(time.time(), 3),
+            "question": question,
+            "top_k": top_k,
+            "filters": filters,
+            "mode": mode
+        }, ensure_ascii=False) + "\n"
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                # Modo append: las líneas cortas de varios workers no se mezclan
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+                    size = f.tell()
+                if size > self.max_bytes:
+                    os.replace(self.path, f"{self.path}.1")
+            self.recorded += 1
+        except OSError as e:
+            print(f"⚠️ No se pudo registrar la consulta: {e}")
+
+    def _entries(self, since: float):
+        for path in (f"{self.path}.1", self.path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            # Línea a medio escribir
+                            continue
+                        if entry.get("ts", 0) >= since:
+                            yield entry
+            except OSError:
+                continue
+
+    def frequent(self, limit: int = 50, window_s: Optional[float] = None) -> Tuple[List[Dict], int]:
+        """Consultas más repetidas en la ventana y total de consultas registradas en ella
+
+        Devuelve ([{question, top_k, filters, mode, count}], total); las preguntas
+        se agrupan igual que en la caché de respuestas (sin mayúsculas ni espacios).
+        """
+        since = time.time() - window_s if window_s else 0.0
+        counts: Counter = Counter()
+        latest: Dict[str, Dict] = {}
+        total = 0
+        for entry in self._entries(since):
+            question = (entry.get("question") or "").strip()
+            if not question:
+                continue
+            group = json.dumps([question.lower(), entry.get("top_k"), entry.get("filters") or {},
+                                entry.get("mode") or "generative"], sort_keys=True, ensure_ascii=False)
+            counts[group] += 1
+            latest[group] = entry
+            total += 1
+
+        return [
+            {
+                "question": latest[group]["question"].strip(),
+                "top_k": latest[group].get("top_k") or 3,
+                "filters": latest[group].get("filters") or {},
+                "mode": latest[group].get("mode") or "generative",
+                "count": count
+            }
+            for group, count in counts.most_common(limit)
+        ], total
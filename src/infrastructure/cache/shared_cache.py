@@ -0,0 +1,168 @@
+# src/infrastructure/cache/shared_cache.py
+"""
+Caché local en disco (SQLite en modo WAL) compartida entre procesos.
+
+Todos los workers de uvicorn/gunicorn de la misma máquina leen y escriben
+el mismo fichero, así que la tasa de aciertos no cae al añadir workers.
+Las conexiones se abren de forma perezosa por proceso y por thread: es
+seguro crear la caché antes de un fork.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+CACHE_DIR = os.getenv('CACHE_DIR', 'output/cache')
+
+
+def make_key(*parts: Any) -> str:
+    """Clave estable a partir de cualquier combinación serializable"""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class SharedCache:
+    def __init__(self,
+                 namespace: str,
+                 ttl_seconds: Optional[float] = None,
+                 max_entries: int = 10000,
+                 path: Optional[str] = None):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.path = path or os.path.join(CACHE_DIR, 'shared_cache.sqlite')
+        self._local = threading.local()
+        # Métricas de este proceso
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Una conexión por (proceso, thread): nunca se hereda tras un fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and getattr(self._local, 'pid', None) == os.getpid():
+            return conn
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            ' namespace TEXT NOT NULL,'
+            ' key TEXT NOT NULL,'
+            ' value TEXT NOT NULL,'
+            ' created_at REAL NOT NULL,'
+            ' expires_at REAL,'
+            ' PRIMARY KEY (namespace, key))'
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            row = self._connection().execute(
+                'SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ Caché '{self.namespace}' no disponible: {e}")
+            row = None
+
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        now = time.time()
+        expires_at = now + self.ttl_seconds if self.ttl_seconds else None
+        try:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO cache (namespace, key, value, created_at, expires_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (self.namespace, key, json.dumps(value, ensure_ascii=False), now, expires_at)
+            )
+            self.writes += 1
+            # Poda ocasional para no crecer sin límite
+            if self.writes % 100 == 0:
+                self._evict(conn)
+        except sqlite3.Error as e:
+            print(f"⚠️ No se pudo escribir en la caché '{self.namespace}': {e}")
+
+    def add(self, key: str, value: Any) -> bool:
+        """Escribe solo si la clave no existe (o caducó); True si la escribió esta llamada
+
+        Atómico entre procesos (INSERT OR IGNORE): sirve para repartir trabajo entre workers.
+        """
+        now = time.time()
+        expires_at = now + self.ttl_seconds if self.ttl_seconds else None
+        try:
+            conn = self._connection()
+            conn.execute(
+                'DELETE FROM cache WHERE namespace = ? AND key = ? AND expires_at IS NOT NULL AND expires_at < ?',
+                (self.namespace, key, now)
+            )
+            inserted = conn.execute(
+                'INSERT OR IGNORE INTO cache (namespace, key, value, created_at, expires_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (self.namespace, key, json.dumps(value, ensure_ascii=False), now, expires_at)
+            ).rowcount == 1
+        except sqlite3.Error as e:
+            print(f"⚠️ No se pudo escribir en la caché '{self.namespace}': {e}")
+            return False
+        if inserted:
+            self.writes += 1
+        return inserted
+
+    def contains(self, key: str) -> bool:
+        try:
+            row = self._connection().execute(
+                'SELECT 1 FROM cache WHERE namespace = ? AND key = ? '
+                'AND (expires_at IS NULL OR expires_at >= ?)',
+                (self.namespace, key, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ Caché '{self.namespace}' no disponible: {e}")
+            return False
+        return row is not None
+
+    def _evict(self, conn: sqlite3.Connection):
+        conn.execute(
+            'DELETE FROM cache WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at < ?',
+            (self.namespace, time.time())
+        )
+        conn.execute(
+            'DELETE FROM cache WHERE namespace = ? AND key NOT IN ('
+            ' SELECT key FROM cache WHERE namespace = ? ORDER BY created_at DESC LIMIT ?)',
+            (self.namespace, self.namespace, self.max_entries)
+        )
+
+    def clear(self):
+        try:
+            self._connection().execute('DELETE FROM cache WHERE namespace = ?', (self.namespace,))
+        except sqlite3.Error as e:
+            print(f"⚠️ No se pudo vaciar la caché '{self.namespace}': {e}")
+
+    def stats(self) -> Dict:
+        try:
+            entries = self._connection().execute(
+                'SELECT COUNT(*) FROM cache WHERE namespace = ?', (self.namespace,)
+            ).fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "pid": os.getpid()
+        }
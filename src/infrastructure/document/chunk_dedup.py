@@ -0,0 +1,166 @@
+# src/infrastructure/document/chunk_dedup.py
+"""
+Detección de chunks casi duplicados (MinHash + LSH) antes de embeber.
+
+Cabeceras, avisos legales o diapositivas repetidas producen chunks casi
+iguales que gastan llamadas de embeddings y ocupan el top_k. Cada grupo
+de duplicados se reduce a su primer chunk (canónico), que guarda en
+`duplicates` los ids del resto para no perder la procedencia.
+
+El solape de TextChunker (200 de 1000 caracteres) queda muy por debajo
+del umbral: chunks vecinos no se marcan como duplicados.
+"""
+import hashlib
+import json
+import random
+import re
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+class ChunkDeduplicator:
+    def __init__(self,
+                 threshold: float = 0.85,
+                 num_perm: int = 128,
+                 bands: int = 32,
+                 shingle_size: int = 5,
+                 seed: int = 1):
+        """
+        threshold: similitud de Jaccard (shingles de palabras) para considerar duplicado
+        num_perm / bands: firma MinHash y bandas LSH (rows = num_perm / bands)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        # Permutaciones h(x) = (a·x + b) mod p; a, b < 2^31 para no desbordar uint64
+        rng = random.Random(seed)
+        self.a = np.array([rng.randint(1, (1 << 31) - 1) for _ in range(num_perm)], dtype=np.uint64)
+        self.b = np.array([rng.randint(0, (1 << 31) - 1) for _ in range(num_perm)], dtype=np.uint64)
+
+    def shingles(self, text: str) -> Set[int]:
+        words = re.sub(r'[^\w\s]', ' ', text.lower()).split()
+        if len(words) < self.shingle_size:
+            grams = [' '.join(words)] if words else []
+        else:
+            grams = [' '.join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)]
+        return {
+            int.from_bytes(hashlib.blake2b(g.encode('utf-8'), digest_size=4).digest(), 'little')
+            for g in grams
+        }
+
+    def signature(self, shingles: Set[int]) -> np.ndarray:
+        if not shingles:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        values = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        hashed = (np.outer(self.a, values) + self.b[:, None]) % np.uint64(_MERSENNE_PRIME)
+        return (hashed & np.uint64(_MAX_HASH)).min(axis=1)
+
+    @staticmethod
+    def jaccard(a: Set[int], b: Set[int]) -> float:
+        if not a and not b:
+            return 1.0
+        return len(a & b) / len(a | b)
+
+    def find_clusters(self, texts: List[str]) -> List[List[int]]:
+        """Grupos de índices casi duplicados (cada grupo ordenado, tamaño ≥ 2)"""
+        shingle_sets = [self.shingles(t) for t in texts]
+
+        # LSH: dos chunks son candidatos si coinciden en alguna banda completa
+        buckets: Dict[Tuple, List[int]] = {}
+        for idx, shingle_set in enumerate(shingle_sets):
+            sig = self.signature(shingle_set)
+            for band in range(self.bands):
+                key = (band, sig[band * self.rows:(band + 1) * self.rows].tobytes())
+                buckets.setdefault(key, []).append(idx)
+
+        parent = list(range(len(texts)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        checked = set()
+        for members in buckets.values():
+            for i_pos, i in enumerate(members):
+                for j in members[i_pos + 1:]:
+                    if (i, j) in checked:
+                        continue
+                    checked.add((i, j))
+                    # Verificación exacta: LSH solo propone candidatos
+                    if self.jaccard(shingle_sets[i], shingle_sets[j]) >= self.threshold:
+                        root_i, root_j = find(i), find(j)
+                        if root_i != root_j:
+                            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        clusters: Dict[int, List[int]] = {}
+        for idx in range(len(texts)):
+            clusters.setdefault(find(idx), []).append(idx)
+        return [sorted(members) for members in clusters.values() if len(members) > 1]
+
+    def deduplicate(self, chunks: List[Dict], vector_size: int = 768) -> Tuple[List[Dict], Dict]:
+        """Chunks canónicos (con `duplicates`) + informe de ahorro"""
+        clusters = self.find_clusters([c['content'] for c in chunks])
+
+        dropped = set()
+        canonical_of = {}
+        for members in clusters:
+            canonical = members[0]
+            for idx in members[1:]:
+                dropped.add(idx)
+                canonical_of[idx] = canonical
+
+        duplicates_by_canonical: Dict[int, List] = {}
+        for idx, canonical in canonical_of.items():
+            duplicates_by_canonical.setdefault(canonical, []).append(chunks[idx].get('id', idx))
+
+        result = []
+        for idx, chunk in enumerate(chunks):
+            if idx in dropped:
+                continue
+            if idx in duplicates_by_canonical:
+                chunk = {**chunk, 'duplicates': duplicates_by_canonical[idx]}
+            result.append(chunk)
+
+        chars_saved = sum(len(chunks[idx]['content']) for idx in dropped)
+        report = {
+            'input_chunks': len(chunks),
+            'unique_chunks': len(result),
+            'duplicates_removed': len(dropped),
+            'clusters': len(clusters),
+            'embedding_calls_saved': len(dropped),
+            'chars_saved': chars_saved,
+            # Vector float32 + contenido en el ChunkStore
+            'index_bytes_saved': len(dropped) * vector_size * 4 + chars_saved,
+            'threshold': self.threshold,
+            'duplicate_of': {str(chunks[idx].get('id', idx)): chunks[c].get('id', c) for idx, c in canonical_of.items()}
+        }
+        return result, report
+
+
+def print_report(report: Dict):
+    print(f"🧬 Deduplicación (Jaccard ≥ {report['threshold']}): "
+          f"{report['input_chunks']} → {report['unique_chunks']} chunks "
+          f"({report['duplicates_removed']} duplicados en {report['clusters']} grupos)")
+    print(f"   - Llamadas de embeddings ahorradas: {report['embedding_calls_saved']}")
+    print(f"   - Índice: ~{report['index_bytes_saved'] / 1024:.1f} KB menos")
+
+
+# Test
+if __name__ == "__main__":
+    with open('output/chunks.json', 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+
+    unique, report = ChunkDeduplicator().deduplicate(chunks)
+    print_report(report)
+    for duplicate, canonical in list(report['duplicate_of'].items())[:5]:
+        print(f"   - Chunk {duplicate} ≈ chunk {canonical}")
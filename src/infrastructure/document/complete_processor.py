@@ -1,93 +1,302 @@
 # src/infrastructure/document/complete_processor.py
-import google.generativeai as genai
+import hashlib
 import json
 import os
-from dotenv import load_dotenv
 import re
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
-load_dotenv()
+from src.infrastructure.llm.gemini_client import get_gemini_client
+from src.infrastructure.llm.upload_registry import content_hash, get_upload_registry
 
+RANGES_DIR = 'output/page_ranges'
 
-class CompleteDocumentProcessor:
-    def __init__(self):
-        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-        self.model = genai.GenerativeModel('gemini-2.5-pro')
-
-    def process_document_with_context(self, pdf_path: str) -> dict:
-        """Procesa el PDF manteniendo TODAS las relaciones"""
+# Prompt por tramo de páginas; los números de página son relativos al tramo
+RANGE_PROMPT = """
+Analiza este fragmento de un documento PDF ({num_pages} páginas) y devuelve ÚNICAMENTE un JSON válido (sin markdown, sin explicaciones).
 
-        print(f"📄 Procesando documento completo: {pdf_path}")
+Numera las páginas del fragmento de 1 a {num_pages} y devuelve una entrada por cada una.
 
-        # Subir PDF
-        uploaded_file = genai.upload_file(pdf_path)
-
-        # Prompt más explícito sobre formato JSON
-        prompt = """
-        Analiza este documento PDF y devuelve ÚNICAMENTE un JSON válido (sin markdown, sin explicaciones).
-
-        El JSON debe tener esta estructura:
-        {
-            "pages": [
-                {
-                    "page_number": 1,
-                    "text_content": "texto completo de la página",
-                    "images": [
-                        {
-                            "position": "top/middle/bottom",
-                            "description": "descripción de la imagen",
-                            "related_text": "texto relacionado si existe"
-                        }
-                    ]
-                }
-            ],
-            "people": [
-                {
-                    "name": "nombre si se menciona",
-                    "page": 1,
-                    "role": "cargo/rol",
-                    "image_description": "descripción visual"
-                }
-            ],
-            "diagrams": [
-                {
-                    "page": 1,
-                    "type": "architecture/flow/table",
-                    "description": "qué muestra"
-                }
+El JSON debe tener esta estructura:
+{{
+    "pages": [
+        {{
+            "page_number": 1,
+            "text_content": "TODO el texto de la página: títulos, párrafos, listas y tablas, manteniendo su estructura",
+            "images": [
+                {{
+                    "position": "top/middle/bottom",
+                    "description": "descripción de la imagen",
+                    "related_text": "texto relacionado si existe"
+                }}
             ]
-        }
+        }}
+    ],
+    "people": [
+        {{
+            "name": "nombre si se menciona",
+            "page": 1,
+            "role": "cargo/rol",
+            "image_description": "descripción visual"
+        }}
+    ],
+    "diagrams": [
+        {{
+            "page": 1,
+            "type": "architecture/flow/table",
+            "description": "qué muestra"
+        }}
+    ]
+}}
+
+IMPORTANTE: Responde SOLO con el JSON, sin ```json``` ni texto adicional.
+"""
+
+
+class RangeAnalysisError(Exception):
+    """Respuesta de un tramo que no es JSON válido o no cubre sus páginas"""
+
+    def __init__(self, message: str, raw_text: str = ""):
+        super().__init__(message)
+        self.raw_text = raw_text
+
+
+def parse_json_response(text: str) -> Dict:
+    """JSON de la respuesta, sin el markdown que a veces añade el modelo"""
+    response_text = text.strip()
+    if response_text.startswith("```"):
+        response_text = re.sub(r'^```json?\n?', '', response_text)
+        response_text = re.sub(r'\n?```$', '', response_text)
+    try:
+        return json.loads(response_text)
+    except json.JSONDecodeError as e:
+        raise RangeAnalysisError(f"JSON inválido: {e}", response_text)
+
+
+def validate_range(analysis, num_pages: int) -> List[str]:
+    """Errores de estructura de la respuesta de un tramo (lista vacía = válida)"""
+    if not isinstance(analysis, dict):
+        return ["la respuesta no es un objeto JSON"]
+    pages = analysis.get("pages")
+    if not isinstance(pages, list):
+        return ["falta la lista 'pages'"]
+
+    errors = []
+    numbers = set()
+    for page in pages:
+        number = page.get("page_number") if isinstance(page, dict) else None
+        if not isinstance(number, int) or not 1 <= number <= num_pages:
+            errors.append(f"page_number fuera del tramo: {number}")
+        elif not isinstance(page.get("text_content", ""), str):
+            errors.append(f"text_content inválido en la página {number}")
+        else:
+            numbers.add(number)
+    missing = sorted(set(range(1, num_pages + 1)) - numbers)
+    if missing:
+        # Respuesta truncada o páginas omitidas
+        errors.append(f"faltan páginas {missing}")
+    for section in ("people", "diagrams"):
+        if not isinstance(analysis.get(section, []), list):
+            errors.append(f"'{section}' no es una lista")
+    return errors
+
+
+def _norm(text) -> str:
+    return re.sub(r'\s+', ' ', str(text or '')).strip().lower()
+
+
+def merge_ranges(results: List[Dict]) -> Dict:
+    """Une los tramos (ya con páginas absolutas): páginas en orden, personas y diagramas sin duplicados"""
+    pages = sorted(
+        (page for result in results for page in result.get("pages", [])),
+        key=lambda p: p["page_number"]
+    )
+
+    # Una persona aparece en varios tramos: se conserva la primera mención y se
+    # completan los campos vacíos con las siguientes
+    people = {}
+    for result in results:
+        for person in result.get("people", []):
+            key = _norm(person.get("name"))
+            if not key:
+                continue
+            if key not in people:
+                people[key] = dict(person)
+            else:
+                for field, value in person.items():
+                    if value and not people[key].get(field):
+                        people[key][field] = value
+
+    diagrams = {}
+    for result in results:
+        for diagram in result.get("diagrams", []):
+            key = (diagram.get("page"), _norm(diagram.get("type")), _norm(diagram.get("description")))
+            diagrams.setdefault(key, diagram)
+
+    return {"pages": pages, "people": list(people.values()), "diagrams": list(diagrams.values())}
+
 
-        IMPORTANTE: Responde SOLO con el JSON, sin ```json``` ni texto adicional.
+def document_text(analysis: Dict) -> str:
+    """Texto completo del documento a partir del análisis por páginas"""
+    return "\n\n".join(
+        page.get("text_content", "").strip() for page in analysis.get("pages", [])
+        if page.get("text_content", "").strip()
+    )
+
+
+class CompleteDocumentProcessor:
+    def __init__(self,
+                 pages_per_range: int = 4,
+                 max_workers: int = 4,
+                 max_attempts: int = 3,
+                 model: str = 'gemini-2.5-pro',
+                 registry=None):
+        """
+        pages_per_range: páginas por petición (respuestas cortas: sin truncado)
+        max_workers: tramos en paralelo (el cliente limita a la cuota del modelo)
+        max_attempts: intentos por tramo; solo se repiten los tramos fallidos
+        registry: UploadRegistry (por defecto el compartido); un tramo ya subido
+        y vigente no se vuelve a subir
+        """
+        # Cliente Gemini compartido (rate limit + reintentos)
+        self.client = get_gemini_client()
+        self.registry = registry or get_upload_registry()
+        self.model = model
+        self.pages_per_range = pages_per_range
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+
+    def split_pdf(self, pdf_path: str, work_dir: str) -> List[Dict]:
+        """Un PDF por tramo de páginas: el modelo solo ve las páginas que debe analizar
+
+        work_dir: directorio propio de esta ejecución; dos PDFs con el mismo
+        nombre (o el mismo PDF en dos workers) no se pisan los tramos
         """
+        import fitz  # PyMuPDF
+
+        stem = Path(pdf_path).stem
+        # Los sub-PDFs no son idénticos byte a byte entre ejecuciones: la clave de
+        # subida es el hash del PDF original más el tramo
+        source_hash = content_hash(pdf_path)
+        # Respuestas raw para depurar: se conservan, con el hash del PDF en el nombre
+        debug_prefix = f"{RANGES_DIR}/{stem}_{source_hash[:12]}"
+        ranges = []
+
+        with fitz.open(pdf_path) as doc:
+            total = len(doc)
+            for start in range(1, total + 1, self.pages_per_range):
+                end = min(start + self.pages_per_range - 1, total)
+                path = os.path.join(work_dir, f"{stem}_p{start}-{end}.pdf")
+                with fitz.open() as part:
+                    part.insert_pdf(doc, from_page=start - 1, to_page=end - 1)
+                    part.save(path)
+                ranges.append({"start": start, "end": end, "path": path, "key": f"{source_hash}:p{start}-{end}",
+                               "debug_prefix": debug_prefix})
+
+        print(f"📑 {total} páginas en {len(ranges)} tramos de hasta {self.pages_per_range}")
+        return ranges
+
+    def analyze_range(self, page_range: Dict, uploaded_file) -> Dict:
+        """Analiza un tramo y devuelve su resultado con números de página absolutos"""
+        num_pages = page_range["end"] - page_range["start"] + 1
+        response = self.client.generate_content(
+            self.model,
+            [uploaded_file, RANGE_PROMPT.format(num_pages=num_pages)],
+            generation_config={"response_mime_type": "application/json"}
+        )
+
+        analysis = parse_json_response(response.text)
+        errors = validate_range(analysis, num_pages)
+        if errors:
+            raise RangeAnalysisError("; ".join(errors), response.text)
 
-        response = self.model.generate_content([uploaded_file, prompt])
+        offset = page_range["start"] - 1
+        for page in analysis["pages"]:
+            page["page_number"] += offset
+        for section in ("people", "diagrams"):
+            analysis[section] = analysis.get(section) or []
+            for item in analysis[section]:
+                if isinstance(item.get("page"), int):
+                    item["page"] += offset
+        return analysis
 
-        # Limpiar la respuesta
-        response_text = response.text.strip()
+    def _attempt(self, page_range: Dict, uploads: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+        label = f"{page_range['start']}-{page_range['end']}"
+        try:
+            # Los reintentos (y otras ejecuciones, vía el registro) reutilizan el fichero ya subido
+            if label not in uploads:
+                uploads[label] = self.registry.get_or_upload(page_range["path"], key=page_range["key"])
+            result = self.analyze_range(page_range, uploads[label])
+            print(f"   ✅ Páginas {label}")
+            return result, None
+        except Exception as e:
+            print(f"   ⚠️ Páginas {label}: {e}")
+            if isinstance(e, RangeAnalysisError) and e.raw_text:
+                # Guardar respuesta raw para debug
+                with open(f"{page_range['debug_prefix']}_raw_response_p{label}.txt", 'w', encoding='utf-8') as f:
+                    f.write(e.raw_text)
+            return None, str(e)
 
-        # Remover markdown si existe
-        if response_text.startswith("```"):
-            response_text = re.sub(r'^```json?\n?', '', response_text)
-            response_text = re.sub(r'\n?```$', '', response_text)
+    def config(self) -> Dict:
+        """Parámetros que cambian el resultado (el pipeline re-extrae si cambian)"""
+        return {
+            "model": self.model,
+            "pages_per_range": self.pages_per_range,
+            "prompt": hashlib.sha256(RANGE_PROMPT.encode('utf-8')).hexdigest()[:12]
+        }
 
-        # Intentar parsear JSON
+    def analyze_document(self, pdf_path: str) -> Dict:
+        """Una sola pasada: texto por página, imágenes, personas y diagramas"""
+        Path(RANGES_DIR).mkdir(parents=True, exist_ok=True)
+        work_dir = tempfile.mkdtemp(prefix=f"{Path(pdf_path).stem}_", dir=RANGES_DIR)
         try:
-            analysis = json.loads(response_text)
-        except json.JSONDecodeError as e:
-            print(f"⚠️ No se pudo parsear JSON. Guardando respuesta raw...")
-            print(f"Error: {e}")
-            print(f"\nPrimeros 500 caracteres de la respuesta:")
-            print(response_text[:500])
-
-            # Guardar respuesta raw para debug
-            with open('output/raw_response.txt', 'w', encoding='utf-8') as f:
-                f.write(response_text)
-
-            # Crear estructura básica
-            analysis = {
-                "error": "No se pudo parsear como JSON",
-                "raw_text": response_text
-            }
+            return self._analyze_ranges(self.split_pdf(pdf_path, work_dir))
+        finally:
+            # Los tramos ya están subidos (el registro guarda la subida por clave)
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _analyze_ranges(self, pending: List[Dict]) -> Dict:
+        uploads = {}
+        results = []
+        errors = {}
+
+        for attempt in range(1, self.max_attempts + 1):
+            if not pending:
+                break
+            if attempt > 1:
+                print(f"🔁 Reintento {attempt}/{self.max_attempts}: {len(pending)} tramos fallidos")
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                outcomes = list(pool.map(lambda r: self._attempt(r, uploads), pending))
+
+            failed = []
+            for page_range, (result, error) in zip(pending, outcomes):
+                if result is not None:
+                    results.append(result)
+                else:
+                    failed.append(page_range)
+                    errors[f"{page_range['start']}-{page_range['end']}"] = error
+            pending = failed
+
+        analysis = merge_ranges(results)
+        if pending:
+            # Las páginas analizadas se conservan; solo faltan los tramos fallidos
+            analysis["failed_ranges"] = [
+                {"start": r["start"], "end": r["end"], "error": errors[f"{r['start']}-{r['end']}"]}
+                for r in pending
+            ]
+            print(f"⚠️ {len(pending)} tramos sin analizar tras {self.max_attempts} intentos "
+                  f"(respuestas en {RANGES_DIR}/*_raw_response_p*.txt)")
+        return analysis
+
+    def process_document_with_context(self, pdf_path: str) -> dict:
+        """Procesa el PDF por tramos de páginas en paralelo y une los resultados"""
+
+        print(f"📄 Procesando documento completo: {pdf_path}")
+        analysis = self.analyze_document(pdf_path)
 
         # Guardar resultado
         result = {
@@ -108,14 +317,14 @@ if __name__ == "__main__":
         processor = CompleteDocumentProcessor()
         result = processor.process_document_with_context("data/rag-challenge.pdf")
 
-        if "error" in result["complete_analysis"]:
-            print("\n⚠️ Hubo un problema con el formato JSON")
-            print("Revisa output/raw_response.txt para ver la respuesta completa")
+        if result["complete_analysis"].get("failed_ranges"):
+            print("\n⚠️ Algunos tramos de páginas no se pudieron analizar")
+            print(f"Revisa {RANGES_DIR}/*_raw_response_p*.txt para ver las respuestas")
         else:
             print("\n✅ Documento procesado exitosamente")
-            print(f"📊 Páginas analizadas: {len(result['complete_analysis'].get('pages', []))}")
-            print(f"👥 Personas identificadas: {len(result['complete_analysis'].get('people', []))}")
-            print(f"📐 Diagramas encontrados: {len(result['complete_analysis'].get('diagrams', []))}")
+        print(f"📊 Páginas analizadas: {len(result['complete_analysis'].get('pages', []))}")
+        print(f"👥 Personas identificadas: {len(result['complete_analysis'].get('people', []))}")
+        print(f"📐 Diagramas encontrados: {len(result['complete_analysis'].get('diagrams', []))}")
 
     except Exception as e:
         print(f"❌ Error: {e}")
\ No newline at end of file
@@ -1,18 +1,56 @@
 # src/infrastructure/document/image_analyzer.py
-import google.generativeai as genai
 from PIL import Image
 import json
-import os
-from dotenv import load_dotenv
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
-load_dotenv()
+from src.infrastructure.llm.gemini_client import get_gemini_client
 
 
 class ImageAnalyzer:
     def __init__(self):
-        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        # Cliente compartido: rate limit + reintentos con backoff
+        self.client = get_gemini_client()
+        self.model = 'gemini-1.5-flash'
+        self.max_workers = 8
+
+    def analyze_image(self, img_info: dict) -> dict:
+        """Analiza una imagen; los fallos quedan marcados con analyzed=False"""
+        img_path = img_info['path']
+        print(f"\n📸 Analizando: {img_info['filename']}")
+
+        # Cargar imagen
+        img = Image.open(img_path)
+
+        # Prompt para Gemini
+        prompt = """
+        Describe esta imagen de forma detallada:
+        1. ¿Qué tipo de contenido es? (diagrama, foto de persona, tabla, screenshot, etc.)
+        2. Si es un diagrama: ¿qué arquitectura o proceso muestra?
+        3. Si es una persona: describe características visibles
+        4. Si es una tabla: ¿qué información contiene?
+        5. Cualquier texto visible en la imagen
+
+        Sé específico y conciso.
+        """
+
+        # El cliente ya reintenta 429/5xx; si aun así falla, la imagen queda
+        # marcada como no analizada en vez de guardar el error como descripción
+        try:
+            response = self.client.generate_content(self.model, [img, prompt])
+            description = response.text
+            error = None
+            print(f"  ✅ Analizada: {img_info['filename']}")
+        except Exception as e:
+            description = ""
+            error = str(e)
+            print(f"  ❌ Error en {img_info['filename']}: {e}")
+
+        return {
+            **img_info,  # Mantener info original
+            "description": description,
+            "analyzed": error is None,
+            **({"error": error} if error else {})
+        }
 
     def analyze_images(self) -> list:
         """Analiza cada imagen y obtiene su contexto/descripción"""
@@ -21,43 +59,11 @@ class ImageAnalyzer:
         with open('output/images_metadata.json', 'r') as f:
             images_metadata = json.load(f)
 
-        analyzed_images = []
-
         print("🔍 Analizando imágenes con Gemini...")
 
-        for img_info in images_metadata:
-            img_path = img_info['path']
-            print(f"\n📸 Analizando: {img_info['filename']}")
-
-            # Cargar imagen
-            img = Image.open(img_path)
-
-            # Prompt para Gemini
-            prompt = """
-            Describe esta imagen de forma detallada:
-            1. ¿Qué tipo de contenido es? (diagrama, foto de persona, tabla, screenshot, etc.)
-            2. Si es un diagrama: ¿qué arquitectura o proceso muestra?
-            3. Si es una persona: describe características visibles
-            4. Si es una tabla: ¿qué información contiene?
-            5. Cualquier texto visible en la imagen
-
-            Sé específico y conciso.
-            """
-
-            try:
-                response = self.model.generate_content([img, prompt])
-                description = response.text
-                print(f"  ✅ Analizada")
-            except Exception as e:
-                description = f"Error al analizar: {str(e)}"
-                print(f"  ❌ Error: {e}")
-
-            # Agregar análisis
-            analyzed_images.append({
-                **img_info,  # Mantener info original
-                "description": description,
-                "analyzed": True
-            })
+        # En paralelo: el cliente compartido limita la concurrencia real a la cuota
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            analyzed_images = list(pool.map(self.analyze_image, images_metadata))
 
         # Guardar análisis
         output_path = 'output/images_with_context.json'
@@ -65,6 +71,9 @@ class ImageAnalyzer:
             json.dump(analyzed_images, f, indent=2, ensure_ascii=False)
 
         print(f"\n✅ Análisis completo guardado en: {output_path}")
+        failed = [img['filename'] for img in analyzed_images if not img['analyzed']]
+        if failed:
+            print(f"⚠️ {len(failed)} imágenes sin analizar (reintentar): {failed}")
 
         # Mostrar resumen
         self.print_summary(analyzed_images)
@@ -78,7 +87,7 @@ class ImageAnalyzer:
 
         for img in analyzed_images[:3]:  # Mostrar solo las primeras 3
             print(f"\n📄 {img['filename']} (Página {img['page']}):")
-            print(f"   {img['description'][:200]}...")
+            print(f"   {(img['description'] or img.get('error', ''))[:200]}...")
 
         print("\n(...)")
 
@@ -1,41 +1,36 @@
 # src/infrastructure/document/pdf_processor.py
-import google.generativeai as genai
 from pathlib import Path
 import json
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
+from src.infrastructure.document.complete_processor import CompleteDocumentProcessor, document_text
 
 
 class PDFProcessor:
-    def __init__(self):
-        # Configurar Gemini
-        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+    def __init__(self, analyzer=None):
+        # Una sola pasada multimodal: el análisis por tramos ya trae el texto de
+        # cada página junto con imágenes, personas y diagramas (una subida por tramo)
+        self.analyzer = analyzer or CompleteDocumentProcessor()
+        self.model = self.analyzer.model
+
+    def config(self) -> dict:
+        return self.analyzer.config()
 
     def extract_text_from_pdf(self, pdf_path: str) -> dict:
-        """Extrae texto del PDF usando Gemini Vision - igual que el chat"""
+        """Extrae el texto del PDF y su estructura en la misma pasada de Gemini"""
 
         print(f"📄 Procesando: {pdf_path}")
+        analysis = self.analyzer.analyze_document(pdf_path)
 
-        # Subir el archivo a Gemini (como cuando lo arrastras al chat)
-        uploaded_file = genai.upload_file(pdf_path)
-        print(f"✅ Archivo subido a Gemini")
-
-        # Prompt para extraer TODO el contenido
-        prompt = """
-        Extrae TODO el texto de este documento PDF.
-        Incluye TODOS los títulos, párrafos, listas, tablas y cualquier texto visible.
-        Mantén la estructura y formato original lo más posible.
-        """
-
-        # Generar respuesta
-        response = self.model.generate_content([uploaded_file, prompt])
+        if analysis.get("failed_ranges"):
+            # Sin estas páginas el texto quedaría incompleto; al repetir la
+            # extracción solo se reenvían los tramos (ya subidos) al modelo
+            ranges = ", ".join(f"{r['start']}-{r['end']}" for r in analysis["failed_ranges"])
+            raise RuntimeError(f"No se pudieron analizar las páginas {ranges} de {pdf_path}")
 
         return {
-            "full_text": response.text,
-            "source_file": pdf_path
+            "full_text": document_text(analysis),
+            "source_file": pdf_path,
+            "complete_analysis": analysis
         }
 
 
@@ -51,11 +46,16 @@ def test_extraction():
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(result, f, indent=2, ensure_ascii=False)
 
+    # El mismo análisis alimenta páginas, personas y diagramas (sin segunda pasada)
+    with open("output/complete_document_analysis.json", 'w', encoding='utf-8') as f:
+        json.dump({"complete_analysis": result["complete_analysis"], "source": result["source_file"]},
+                  f, indent=2, ensure_ascii=False)
+
     print(f"\n✅ Texto extraído: {len(result['full_text'])} caracteres")
-    print(f"📁 Guardado en: {output_path}")
+    print(f"📁 Guardado en: {output_path} y output/complete_document_analysis.json")
 
     return result
 
 
 if __name__ == "__main__":
-    test_extraction()
\ No newline at end of file
+    test_extraction()
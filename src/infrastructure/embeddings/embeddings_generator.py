@@ -1,50 +1,84 @@
 # src/infrastructure/embeddings/embeddings_generator.py
-import google.generativeai as genai
 import json
 import os
-from dotenv import load_dotenv
-import numpy as np
+from typing import Dict, List, Optional, Tuple
 
-load_dotenv()
+from src.infrastructure.embeddings.providers import EmbeddingProvider, get_embedding_provider
+from src.infrastructure.document.chunk_dedup import ChunkDeduplicator, print_report
+
+# Identidad del modelo que generó output/chunks_with_embeddings.json (la registra load_to_qdrant)
+EMBEDDING_MODEL_PATH = 'output/embedding_model.json'
+
+
+def load_embedding_model(path: str = EMBEDDING_MODEL_PATH) -> Dict:
+    """Identidad guardada junto a los embeddings; los ficheros antiguos son de Gemini"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"provider": "gemini", "model": "models/text-embedding-004", "dim": 768}
 
 
 class EmbeddingsGenerator:
-    def __init__(self):
-        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-        # Modelo de embeddings de Google
-        self.model = 'models/text-embedding-004'
+    def __init__(self, dedup_threshold: Optional[float] = None, provider: Optional[EmbeddingProvider] = None):
+        # Proveedor por EMBEDDING_PROVIDER (Gemini por defecto); lotes en paralelo
+        self.provider = provider or get_embedding_provider()
+        self.model = self.provider.name
+        # Umbral de Jaccard para descartar chunks casi duplicados (0 desactiva)
+        if dedup_threshold is None:
+            dedup_threshold = float(os.getenv('CHUNK_DEDUP_THRESHOLD', '0.85'))
+        self.dedup_threshold = dedup_threshold
 
-    def generate_embeddings(self):
-        """Genera embeddings para cada chunk"""
+    def embed_document(self, text: str):
+        return self.provider.embed_documents([text])[0]
 
-        # Cargar chunks
-        with open('output/chunks.json', 'r', encoding='utf-8') as f:
-            chunks = json.load(f)
+    def config(self) -> Dict:
+        """Todo lo que cambia los embeddings generados (ver ingest_pipeline)"""
+        return {"embedding_model": self.provider.identity(), "dedup_threshold": self.dedup_threshold}
+
+    def embed_chunks(self, chunks: List[Dict]) -> Tuple[List[Dict], Optional[Dict]]:
+        """Deduplica y añade 'embedding' a cada chunk: (chunks, informe de deduplicación)"""
 
-        print(f"📊 Generando embeddings para {len(chunks)} chunks...")
+        # Solo se embebe una copia de cada grupo de casi duplicados
+        report = None
+        if self.dedup_threshold > 0:
+            chunks, report = ChunkDeduplicator(threshold=self.dedup_threshold).deduplicate(chunks)
+            print_report(report)
 
-        # Generar embedding para cada chunk
-        for i, chunk in enumerate(chunks):
-            text = chunk['content']
+        print(f"📊 Generando embeddings para {len(chunks)} chunks con {self.model}...")
 
-            # Generar embedding
-            result = genai.embed_content(
-                model=self.model,
-                content=text,
-                task_type="retrieval_document"
-            )
+        # Generar embeddings por lotes
+        embeddings = self.provider.embed_documents([chunk['content'] for chunk in chunks])
 
+        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
             # Agregar embedding al chunk
-            chunk['embedding'] = result['embedding']
+            chunk['embedding'] = embedding
+
+            print(f"✅ Chunk {i + 1}/{len(chunks)} - Vector de {len(embedding)} dimensiones")
+
+        return chunks, report
+
+    def generate_embeddings(self):
+        """Genera embeddings para cada chunk"""
+
+        # Cargar chunks
+        with open('output/chunks.json', 'r', encoding='utf-8') as f:
+            chunks = json.load(f)
 
-            print(f"✅ Chunk {i + 1}/{len(chunks)} - Vector de {len(result['embedding'])} dimensiones")
+        chunks, report = self.embed_chunks(chunks)
+        if report is not None:
+            with open('output/dedup_report.json', 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
 
         # Guardar chunks con embeddings
         with open('output/chunks_with_embeddings.json', 'w', encoding='utf-8') as f:
             json.dump(chunks, f, indent=2)
+        with open(EMBEDDING_MODEL_PATH, 'w') as f:
+            json.dump(self.provider.identity(), f, indent=2)
 
         print(f"\n✅ Embeddings generados y guardados")
-        print(f"📁 Archivo: output/chunks_with_embeddings.json")
+        print(f"📁 Archivo: output/chunks_with_embeddings.json ({EMBEDDING_MODEL_PATH})")
+        print(f"📈 Métricas de embeddings: {self.provider.metrics()}")
 
         return chunks
 
@@ -57,4 +91,4 @@ if __name__ == "__main__":
     # Verificar
     print(f"\n🔍 Verificación:")
     print(f"  - Chunks con embeddings: {len(chunks_with_embeddings)}")
-    print(f"  - Dimensiones del vector: {len(chunks_with_embeddings[0]['embedding'])}")
\ No newline at end of file
+    print(f"  - Dimensiones del vector: {len(chunks_with_embeddings[0]['embedding'])}")
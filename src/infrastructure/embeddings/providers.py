@@ -0,0 +1,214 @@
+# src/infrastructure/embeddings/providers.py
+"""
+Proveedores de embeddings intercambiables.
+
+- gemini: text-embedding-004 vía el cliente compartido (red, cuota)
+- fastembed: modelo ONNX local en CPU (opcional: pip install fastembed)
+- hashing: feature hashing determinista, sin dependencias (pruebas y CI)
+
+Todos embeben por lotes y reparten los lotes entre threads. Cada
+proveedor tiene una identidad (proveedor, modelo, dimensión) que se
+guarda con la colección: consultar con otro modelo devolvería vecinos sin
+sentido, así que el servicio se niega a arrancar si no coinciden.
+
+EMBEDDING_PROVIDER elige el proveedor (gemini por defecto) y
+EMBEDDING_MODEL sustituye su modelo por defecto.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class EmbeddingProvider:
+    """Base: lotes de batch_size textos repartidos entre max_workers threads"""
+    provider = "base"
+
+    def __init__(self, model: str, dim: int, batch_size: int = 32, max_workers: int = 4):
+        self.model = model
+        self.dim = dim
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._metrics = {"texts": 0, "batches": 0, "total_latency_s": 0.0}
+
+    @property
+    def name(self) -> str:
+        """Clave de caché y de identidad: gemini:models/text-embedding-004"""
+        return f"{self.provider}:{self.model}"
+
+    def identity(self) -> Dict:
+        return {"provider": self.provider, "model": self.model, "dim": self.dim}
+
+    def _embed_batch(self, texts: List[str], task_type: str) -> List[List[float]]:
+        raise NotImplementedError
+
+    def _timed_batch(self, texts: List[str], task_type: str) -> List[List[float]]:
+        start = time.perf_counter()
+        vectors = self._embed_batch(texts, task_type)
+        with self._lock:
+            self._metrics["texts"] += len(texts)
+            self._metrics["batches"] += 1
+            self._metrics["total_latency_s"] += time.perf_counter() - start
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) <= 1 or self.max_workers <= 1:
+            results = [self._timed_batch(batch, "retrieval_document") for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                results = list(pool.map(lambda batch: self._timed_batch(batch, "retrieval_document"), batches))
+        return [vector for batch in results for vector in batch]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._timed_batch([text], "retrieval_query")[0]
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            m = dict(self._metrics)
+        m["avg_batch_latency_s"] = round(m.pop("total_latency_s") / m["batches"], 4) if m["batches"] else None
+        return m
+
+
+# Dimensión de los modelos de embeddings de Gemini conocidos; el resto se mide con una llamada
+GEMINI_EMBEDDING_DIMS = {
+    'models/text-embedding-004': 768,
+    'models/embedding-001': 768,
+    'models/gemini-embedding-001': 3072,
+}
+
+
+class GeminiEmbeddingProvider(EmbeddingProvider):
+    provider = "gemini"
+
+    def __init__(self, model: Optional[str] = None, gemini=None, batch_size: int = 100, max_workers: int = 16):
+        model = model or 'models/text-embedding-004'
+        known = GEMINI_EMBEDDING_DIMS.get(model if model.startswith('models/') else f"models/{model}")
+        self._dim_lock = threading.Lock()
+        # batchEmbedContents admite hasta 100 textos por petición
+        super().__init__(model, known, batch_size, max_workers)
+        if gemini is None:
+            from src.infrastructure.llm.gemini_client import get_gemini_client
+            gemini = get_gemini_client()
+        # Cliente compartido: rate limit + reintentos
+        self.gemini = gemini
+
+    @property
+    def dim(self) -> int:
+        """Dimensión del modelo; si no está en GEMINI_EMBEDDING_DIMS, se mide una vez"""
+        if self._dim is None:
+            with self._dim_lock:
+                if self._dim is None:
+                    self._dim = len(self._embed_batch(["dim"], "retrieval_query")[0])
+        return self._dim
+
+    @dim.setter
+    def dim(self, value: Optional[int]):
+        self._dim = value
+
+    def _embed_batch(self, texts: List[str], task_type: str) -> List[List[float]]:
+        if len(texts) == 1:
+            return [self.gemini.embed_content(model=self.model, content=texts[0], task_type=task_type)['embedding']]
+        return self.gemini.embed_content(model=self.model, content=texts, task_type=task_type)['embedding']
+
+    def metrics(self) -> Dict:
+        return {**super().metrics(), "gemini": self.gemini.metrics().get(self.model)}
+
+
+class FastEmbedProvider(EmbeddingProvider):
+    """Modelo ONNX en CPU (fastembed); multilingüe por defecto porque el corpus está en español"""
+    provider = "fastembed"
+
+    def __init__(self, model: Optional[str] = None, batch_size: int = 64, max_workers: int = 1, threads: Optional[int] = None):
+        try:
+            from fastembed import TextEmbedding
+        except ImportError as e:
+            raise ImportError("EMBEDDING_PROVIDER=fastembed requiere 'pip install fastembed'") from e
+
+        model = model or 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
+        # ONNX Runtime ya paraleliza cada lote en `threads` hilos
+        self.engine = TextEmbedding(model_name=model, threads=threads or os.cpu_count())
+        dim = len(next(iter(self.engine.embed(["dim"]))))
+        super().__init__(model, dim, batch_size, max_workers)
+
+    def _embed_batch(self, texts: List[str], task_type: str) -> List[List[float]]:
+        if task_type == "retrieval_query":
+            vectors = self.engine.query_embed(texts)
+        else:
+            vectors = self.engine.passage_embed(texts, batch_size=self.batch_size)
+        return [vector.tolist() for vector in vectors]
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """Feature hashing de palabras y bigramas: determinista, sin modelo, textos parecidos → vectores cercanos"""
+    provider = "hashing"
+
+    def __init__(self, dim: int = 768, batch_size: int = 256, max_workers: int = 4):
+        super().__init__(f"words-bigrams-{dim}", dim, batch_size, max_workers)
+
+    def _vector(self, text: str) -> np.ndarray:
+        words = re.findall(r'\w+', text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in features:
+            h = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+            # Signo aleatorio: las colisiones se cancelan en media
+            vector[h % self.dim] += 1.0 if (h >> 63) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _embed_batch(self, texts: List[str], task_type: str) -> List[List[float]]:
+        return [self._vector(text).tolist() for text in texts]
+
+
+PROVIDERS = {
+    "gemini": GeminiEmbeddingProvider,
+    "fastembed": FastEmbedProvider,
+    "hashing": HashingEmbeddingProvider,
+}
+
+_providers: Dict[str, EmbeddingProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def provider_name() -> str:
+    return os.getenv('EMBEDDING_PROVIDER', 'gemini')
+
+
+def create_embedding_provider(name: Optional[str] = None, **kwargs) -> EmbeddingProvider:
+    """Proveedor nuevo (kwargs: p.ej. gemini=cliente con FakeGeminiBackend)"""
+    name = name or provider_name()
+    if name not in PROVIDERS:
+        raise ValueError(f"Proveedor de embeddings desconocido: {name} (opciones: {', '.join(PROVIDERS)})")
+    if os.getenv('EMBEDDING_MODEL') and name != "hashing":
+        kwargs.setdefault("model", os.getenv('EMBEDDING_MODEL'))
+    return PROVIDERS[name](**kwargs)
+
+
+def get_embedding_provider(name: Optional[str] = None) -> EmbeddingProvider:
+    """Instancia única por proceso y proveedor (EMBEDDING_PROVIDER / EMBEDDING_MODEL)"""
+    name = name or provider_name()
+    if name not in _providers:
+        with _providers_lock:
+            if name not in _providers:
+                _providers[name] = create_embedding_provider(name)
+    return _providers[name]
+
+
+def check_identity(expected: Optional[Dict], actual: Dict, where: str):
+    """Error si el proveedor no es el que generó la colección (None = colección sin registro)"""
+    if not expected:
+        return
+    mismatched = [key for key in ("provider", "model", "dim") if expected.get(key) != actual.get(key)]
+    if mismatched:
+        raise ValueError(
+            f"{where} se generó con {expected['provider']}:{expected['model']} ({expected['dim']}d) "
+            f"pero el proveedor actual es {actual['provider']}:{actual['model']} ({actual['dim']}d). "
+            f"Ajusta EMBEDDING_PROVIDER/EMBEDDING_MODEL o vuelve a generar embeddings y cargar"
+        )
@@ -0,0 +1,74 @@
+# src/infrastructure/file_lock.py
+"""
+Lock exclusivo entre procesos de la misma máquina (flock sobre un fichero).
+
+Varios workers del API tienen cada uno su cola de ingesta: un
+threading.Lock no basta para que dos cargas del mismo documento (o dos
+primeras cargas que crean la colección) no se pisen.
+
+flock también excluye entre threads del mismo proceso (cada FileLock abre
+su propio descriptor). Sin fcntl (Windows) el lock es solo del proceso.
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_local_locks: Dict[str, threading.Lock] = {}
+_local_guard = threading.Lock()
+
+
+class LockTimeoutError(TimeoutError):
+    """Otro proceso mantiene el lock más tiempo del permitido"""
+
+
+class FileLock:
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        """timeout: segundos de espera como mucho (None = esperar lo que haga falta)"""
+        self.path = path
+        self.timeout = timeout
+        self._fd = None
+        self._local = None
+
+    def acquire(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        if fcntl is None:
+            with _local_guard:
+                self._local = _local_locks.setdefault(os.path.abspath(self.path), threading.Lock())
+            if not self._local.acquire(timeout=-1 if self.timeout is None else self.timeout):
+                raise LockTimeoutError(f"Lock '{self.path}' ocupado")
+            return
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        start = time.monotonic()
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if self.timeout is not None and time.monotonic() - start > self.timeout:
+                    os.close(fd)
+                    raise LockTimeoutError(f"Lock '{self.path}' ocupado más de {self.timeout:.0f}s")
+                time.sleep(0.1)
+        self._fd = fd
+
+    def release(self):
+        if self._local is not None:
+            self._local.release()
+            self._local = None
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
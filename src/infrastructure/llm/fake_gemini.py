@@ -0,0 +1,116 @@
+# src/infrastructure/llm/fake_gemini.py
+"""
+Backend falso de Gemini para pruebas locales y benchmarks (sin red ni cuota).
+
+Simula latencia y una cuota por ventana (por defecto, por minuto): por
+encima de ella responde 429 como la API real. Los embeddings son deterministas (hash de la entrada).
+"""
+import hashlib
+import math
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class FakeResourceExhausted(Exception):
+    """Equivalente local de google.api_core.exceptions.ResourceExhausted"""
+    code = 429
+
+
+class FakeNotFound(Exception):
+    """Equivalente local de google.api_core.exceptions.NotFound"""
+    code = 404
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeFile:
+    def __init__(self, path: str):
+        self.name = f"files/{hashlib.sha1(path.encode()).hexdigest()[:12]}"
+        self.uri = f"https://fake.local/{self.name}"
+        self.display_name = path
+
+
+def fake_embedding(text: str, dim: int = 768) -> List[float]:
+    """Vector determinista y normalizado a partir del texto"""
+    rng = random.Random(hashlib.sha256(text.encode('utf-8')).digest())
+    vector = [rng.gauss(0, 1) for _ in range(dim)]
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class FakeGeminiBackend:
+    def __init__(self,
+                 rpm_quota: Optional[Dict[str, float]] = None,
+                 latency_s: float = 0.05,
+                 latency_jitter_s: float = 0.0,
+                 slow_probability: float = 0.0,
+                 slow_latency_s: float = 2.0,
+                 dim: int = 768,
+                 window_s: float = 60.0):
+        # Cuota por modelo (peticiones por ventana de window_s); None = sin límite
+        self.rpm_quota = rpm_quota or {}
+        self.window_s = window_s
+        self.latency_s = latency_s
+        self.latency_jitter_s = latency_jitter_s
+        # Peticiones lentas ocasionales para estudiar la latencia de cola
+        self.slow_probability = slow_probability
+        self.slow_latency_s = slow_latency_s
+        self.dim = dim
+        self.calls = deque()
+        self.lock = threading.Lock()
+        self.stats = {"accepted": 0, "throttled": 0}
+        # Ficheros subidos (como la Files API, solo existen tras upload_file)
+        self.files: Dict[str, FakeFile] = {}
+
+    def _admit(self, model: str):
+        quota = self.rpm_quota.get(model, self.rpm_quota.get("default"))
+        with self.lock:
+            now = time.monotonic()
+            while self.calls and now - self.calls[0][0] > self.window_s:
+                self.calls.popleft()
+            if quota is not None and sum(1 for _, m in self.calls if m == model) >= quota:
+                self.stats["throttled"] += 1
+                raise FakeResourceExhausted(f"429 Resource exhausted for {model}")
+            self.calls.append((now, model))
+            self.stats["accepted"] += 1
+
+    def _sleep(self):
+        latency = self.latency_s + random.uniform(0, self.latency_jitter_s)
+        if self.slow_probability and random.random() < self.slow_probability:
+            latency = self.slow_latency_s
+        if latency > 0:
+            time.sleep(latency)
+
+    def embed_content(self, model: str, content, task_type: str, **kwargs) -> Dict:
+        self._admit(model)
+        self._sleep()
+        if isinstance(content, list):
+            return {"embedding": [fake_embedding(c, self.dim) for c in content]}
+        return {"embedding": fake_embedding(content, self.dim)}
+
+    def generate_content(self, model_name: str, contents, **kwargs):
+        self._admit(model_name)
+        self._sleep()
+        prompt = contents if isinstance(contents, str) else str(contents[-1])
+        text = f"[fake:{model_name}] Respuesta basada en el contexto ({len(prompt)} caracteres de prompt)."
+        if kwargs.get("stream"):
+            # Un fragmento por palabra, como el iterador de stream=True
+            return [FakeResponse(word + " ") for word in text.split(" ")]
+        return FakeResponse(text)
+
+    def upload_file(self, path: str, **kwargs):
+        self._admit("upload_file")
+        uploaded = FakeFile(path)
+        self.files[uploaded.name] = uploaded
+        return uploaded
+
+    def get_file(self, name: str):
+        if name not in self.files:
+            raise FakeNotFound(f"404 File {name} not found")
+        return self.files[name]
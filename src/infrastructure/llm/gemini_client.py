@@ -0,0 +1,365 @@
+# src/infrastructure/llm/gemini_client.py
+"""
+Cliente Gemini compartido por todas las etapas (ingesta y consultas).
+
+- Token bucket por modelo (peticiones por minuto)
+- Adaptativo: cada 429 reduce el ritmo del bucket y a la mitad la
+  concurrencia (AIMD); los éxitos los recuperan poco a poco hasta el límite
+- Reintentos con backoff exponencial y jitter para 429/5xx/timeouts
+- Esperas acotadas: cuota, concurrencia y backoff no pasan del plazo de la
+  llamada (deadline) ni de GEMINI_MAX_WAIT_S
+- Métricas por modelo (get_gemini_client().metrics())
+
+Los límites por defecto se pueden sobrescribir con GEMINI_LIMITS, p.ej.
+GEMINI_LIMITS='{"gemini-2.5-pro": {"rpm": 5, "concurrency": 2}}'
+"""
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from src.infrastructure.resilience import DeadlineExceededError, RequestCancelledError
+
+load_dotenv()
+
+DEFAULT_LIMITS = {
+    "models/text-embedding-004": {"rpm": 1500, "concurrency": 16},
+    "gemini-2.0-flash-exp": {"rpm": 10, "concurrency": 4},
+    "gemini-1.5-flash": {"rpm": 15, "concurrency": 4},
+    "gemini-2.5-pro": {"rpm": 5, "concurrency": 2},
+    "upload_file": {"rpm": 60, "concurrency": 4},
+    "default": {"rpm": 60, "concurrency": 4}
+}
+
+# Errores que indican cuota agotada (se reduce la concurrencia)
+THROTTLE_CODES = {429}
+THROTTLE_ERRORS = {"ResourceExhausted", "TooManyRequests"}
+# Errores transitorios (se reintenta sin penalizar la concurrencia)
+TRANSIENT_CODES = {500, 502, 503, 504}
+TRANSIENT_ERRORS = {"ServiceUnavailable", "InternalServerError", "DeadlineExceeded",
+                    "GatewayTimeout", "BadGateway", "ConnectionError", "TimeoutError"}
+
+
+class GeminiRetryError(Exception):
+    """Se agotaron los reintentos contra Gemini"""
+
+
+class GeminiWaitTimeoutError(GeminiRetryError):
+    """Se agotó max_wait_s esperando cuota, un hueco de concurrencia o el siguiente reintento"""
+
+
+class GeminiDeadlineExceededError(DeadlineExceededError):
+    """El plazo de la petición venció esperando cuota o el siguiente reintento
+
+    Es un DeadlineExceededError: el guard no lo cuenta como fallo del backend
+    y el servicio puede responder en modo extractivo.
+    """
+
+
+def _error_code(error: Exception) -> Optional[int]:
+    code = getattr(error, 'code', None)
+    try:
+        return int(code) if code is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_throttle_error(error: Exception) -> bool:
+    return _error_code(error) in THROTTLE_CODES or type(error).__name__ in THROTTLE_ERRORS
+
+
+def is_transient_error(error: Exception) -> bool:
+    return _error_code(error) in TRANSIENT_CODES or type(error).__name__ in TRANSIENT_ERRORS
+
+
+class TokenBucket:
+    """Limita peticiones por segundo con ráfagas de hasta `capacity`"""
+
+    def __init__(self, rate_per_second: float, capacity: Optional[float] = None):
+        self.rate = rate_per_second
+        self.capacity = capacity or max(1.0, rate_per_second)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """False si no hay tokens dentro de `timeout` segundos (None = esperar lo necesario)"""
+        stop_at = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return True
+                wait = (tokens - self.tokens) / self.rate
+            if stop_at is not None and now + wait > stop_at:
+                return False
+            time.sleep(wait)
+
+
+class AdaptiveLimiter:
+    """Límite de concurrencia AIMD (additive increase, multiplicative decrease)"""
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: Optional[int] = None):
+        self.limit = float(initial)
+        self.minimum = minimum
+        # Nunca por encima de la concurrencia configurada: los éxitos solo recuperan lo recortado
+        self.maximum = min(maximum, initial) if maximum else initial
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """False si no queda hueco dentro de `timeout` segundos (None = esperar lo necesario)"""
+        stop_at = time.monotonic() + timeout if timeout is not None else None
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                if stop_at is None:
+                    self.condition.wait()
+                    continue
+                remaining = stop_at - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def on_success(self):
+        with self.condition:
+            self.limit = min(self.maximum, self.limit + 1.0 / max(self.limit, 1.0))
+            self.condition.notify_all()
+
+    def on_throttle(self):
+        with self.condition:
+            self.limit = max(self.minimum, self.limit / 2)
+
+
+class GenaiBackend:
+    """Backend real: google.generativeai (import diferido)"""
+
+    def __init__(self, api_key: Optional[str] = None):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key or os.getenv('GEMINI_API_KEY'))
+        self.genai = genai
+        self.models = {}
+
+    def embed_content(self, model: str, content, task_type: str, **kwargs) -> Dict:
+        return self.genai.embed_content(model=model, content=content, task_type=task_type, **kwargs)
+
+    def generate_content(self, model_name: str, contents, **kwargs):
+        if model_name not in self.models:
+            self.models[model_name] = self.genai.GenerativeModel(model_name)
+        return self.models[model_name].generate_content(contents, **kwargs)
+
+    def upload_file(self, path: str, **kwargs):
+        return self.genai.upload_file(path, **kwargs)
+
+    def get_file(self, name: str):
+        return self.genai.get_file(name)
+
+
+class _ModelState:
+    def __init__(self, rpm: float, concurrency: int):
+        self.max_rate = rpm / 60.0
+        # Ráfagas de como mucho ~1s de cuota
+        self.bucket = TokenBucket(self.max_rate, capacity=max(1.0, self.max_rate))
+        self.limiter = AdaptiveLimiter(concurrency)
+        self.lock = threading.Lock()
+        self.last_cut = 0.0
+        self.metrics = {
+            "requests": 0,
+            "successes": 0,
+            "throttled": 0,
+            "transient_errors": 0,
+            "retries": 0,
+            "failures": 0,
+            "wait_timeouts": 0,
+            "total_latency_s": 0.0
+        }
+
+    def count(self, field: str, value: float = 1):
+        with self.lock:
+            self.metrics[field] += value
+
+    def on_success(self):
+        self.limiter.on_success()
+        with self.bucket.lock:
+            self.bucket.rate = min(self.max_rate, self.bucket.rate + self.max_rate * 0.01)
+
+    def on_throttle(self):
+        # Una sola reducción por ventana de congestión: varios 429 de la misma
+        # ráfaga no deben hundir el ritmo
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_cut < 1.0:
+                return
+            self.last_cut = now
+        self.limiter.on_throttle()
+        with self.bucket.lock:
+            self.bucket.rate = max(self.max_rate * 0.05, self.bucket.rate * 0.8)
+
+
+class GeminiClient:
+    def __init__(self,
+                 backend=None,
+                 limits: Optional[Dict[str, Dict]] = None,
+                 max_retries: int = 6,
+                 base_delay: float = 1.0,
+                 max_delay: float = 60.0,
+                 max_wait_s: Optional[float] = None):
+        """max_wait_s: espera máxima de una llamada (cuota + reintentos); None = sin límite"""
+        self.backend = backend
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_wait_s = max_wait_s
+        self._states: Dict[str, _ModelState] = {}
+        self._lock = threading.Lock()
+
+    def _backend(self):
+        # Import perezoso de google.generativeai en el primer uso
+        if self.backend is None:
+            with self._lock:
+                if self.backend is None:
+                    self.backend = GenaiBackend()
+        return self.backend
+
+    def _state(self, model: str) -> _ModelState:
+        with self._lock:
+            if model not in self._states:
+                limits = self.limits.get(model, self.limits["default"])
+                self._states[model] = _ModelState(limits["rpm"], limits["concurrency"])
+            return self._states[model]
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniforme en [0, min(max_delay, base * 2^attempt)]
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, model: str, fn: Callable[[], Any], deadline=None) -> Any:
+        """Ejecuta fn respetando el rate limit de `model`, con reintentos
+
+        deadline: plazo de la petición (resilience.Deadline); con max_wait_s,
+        acota las esperas de cuota y de backoff. Un guard que abandona la
+        llamada por timeout no deja su thread bloqueado para siempre.
+        """
+        state = self._state(model)
+        last_error = None
+        stop_at = time.monotonic() + self.max_wait_s if self.max_wait_s else None
+        # El plazo del cliente manda si vence antes que max_wait_s
+        client_bound = False
+        if deadline is not None and deadline.expires_at is not None:
+            if stop_at is None or deadline.expires_at <= stop_at:
+                stop_at = deadline.expires_at
+                client_bound = True
+
+        def remaining() -> Optional[float]:
+            if deadline is not None and deadline.cancelled:
+                return 0.0
+            return None if stop_at is None else max(0.0, stop_at - time.monotonic())
+
+        def wait_expired(message: str) -> Exception:
+            # Plazo del cliente (o desconexión): no es un fallo de Gemini
+            state.count("wait_timeouts")
+            if deadline is not None and deadline.cancelled:
+                return RequestCancelledError(f"{model}: cliente desconectado ({message})")
+            if client_bound:
+                return GeminiDeadlineExceededError(f"{model}: plazo de la petición agotado {message}")
+            return GeminiWaitTimeoutError(f"{model}: GEMINI_MAX_WAIT_S agotado {message}")
+
+        for attempt in range(self.max_retries + 1):
+            if not state.bucket.acquire(timeout=remaining()) or not state.limiter.acquire(timeout=remaining()):
+                raise wait_expired(f"esperando cuota (intento {attempt + 1})")
+            state.count("requests")
+            start = time.monotonic()
+            try:
+                result = fn()
+            except Exception as e:
+                last_error = e
+                if is_throttle_error(e):
+                    state.count("throttled")
+                    state.on_throttle()
+                elif is_transient_error(e):
+                    state.count("transient_errors")
+                else:
+                    state.count("failures")
+                    raise
+            else:
+                state.count("successes")
+                state.count("total_latency_s", time.monotonic() - start)
+                state.on_success()
+                return result
+            finally:
+                state.limiter.release()
+
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt)
+                left = remaining()
+                if left is not None and delay >= left:
+                    # El siguiente intento ya no llegaría a tiempo
+                    raise wait_expired(f"tras {attempt + 1} intentos: {last_error}") from last_error
+                state.count("retries")
+                time.sleep(delay)
+
+        state.count("failures")
+        raise GeminiRetryError(f"{model}: reintentos agotados ({self.max_retries}): {last_error}") from last_error
+
+    def embed_content(self, model: str, content, task_type: str, deadline=None, **kwargs) -> Dict:
+        return self.call(model, lambda: self._backend().embed_content(model, content, task_type, **kwargs),
+                         deadline=deadline)
+
+    def generate_content(self, model_name: str, contents, deadline=None, **kwargs):
+        return self.call(model_name, lambda: self._backend().generate_content(model_name, contents, **kwargs),
+                         deadline=deadline)
+
+    def upload_file(self, path: str, **kwargs):
+        return self.call("upload_file", lambda: self._backend().upload_file(path, **kwargs))
+
+    def get_file(self, name: str):
+        return self.call("upload_file", lambda: self._backend().get_file(name))
+
+    def metrics(self) -> Dict[str, Dict]:
+        with self._lock:
+            states = dict(self._states)
+        report = {}
+        for model, state in states.items():
+            with state.lock:
+                m = dict(state.metrics)
+            m["avg_latency_s"] = round(m.pop("total_latency_s") / m["successes"], 4) if m["successes"] else None
+            m["concurrency_limit"] = round(state.limiter.limit, 2)
+            m["rate_rpm"] = round(state.bucket.rate * 60, 1)
+            m["in_flight"] = state.limiter.in_flight
+            report[model] = m
+        return report
+
+
+_client: Optional[GeminiClient] = None
+_client_lock = threading.Lock()
+
+
+def get_gemini_client() -> GeminiClient:
+    """Instancia única por proceso, compartida por todas las etapas"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                limits = json.loads(os.getenv('GEMINI_LIMITS', '{}'))
+                max_wait = float(os.getenv('GEMINI_MAX_WAIT_S', '300'))
+                _client = GeminiClient(limits=limits, max_wait_s=max_wait or None)
+    return _client
+
+
+def set_gemini_client(client: Optional[GeminiClient]):
+    """Permite inyectar otro cliente (p.ej. con FakeGeminiBackend)"""
+    global _client
+    _client = client
@@ -0,0 +1,143 @@
+# src/infrastructure/llm/upload_registry.py
+"""
+Registro de ficheros subidos a Gemini (Files API), por hash del contenido.
+
+La Files API conserva cada fichero 48h. Volver a subir el mismo PDF (o el
+mismo tramo de páginas) dentro de ese plazo reutiliza el fichero ya
+subido: el registro guarda clave → nombre, URI y caducidad en
+output/gemini_uploads.json, que sobrevive a reinicios y reintentos.
+
+GEMINI_UPLOAD_TTL_S sustituye la vigencia (47h por defecto: margen frente
+a las 48h de la API para no usar un fichero a punto de caducar).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from src.infrastructure.llm.gemini_client import get_gemini_client
+
+UPLOADS_PATH = os.getenv('GEMINI_UPLOADS_PATH', 'output/gemini_uploads.json')
+DEFAULT_TTL_S = float(os.getenv('GEMINI_UPLOAD_TTL_S', 47 * 3600))
+
+
+def content_hash(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class UploadRegistry:
+    def __init__(self, client=None, path: Optional[str] = None, ttl_s: Optional[float] = None):
+        # Cliente compartido: subidas y consultas con rate limit + reintentos
+        self.client = client or get_gemini_client()
+        self.path = path or UPLOADS_PATH
+        self.ttl_s = DEFAULT_TTL_S if ttl_s is None else ttl_s
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._metrics = {"uploads": 0, "reused": 0, "expired": 0, "missing": 0}
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _record(self, key: str, entry: Optional[Dict]):
+        # Lectura-modificación-escritura bajo el lock del proceso; entre procesos
+        # gana la última escritura (en el peor caso se repite una subida)
+        with self._lock:
+            entries = self._load()
+            now = time.time()
+            entries = {k: e for k, e in entries.items() if e.get("expires_at", 0) > now}
+            if entry is None:
+                entries.pop(key, None)
+            else:
+                entries[key] = entry
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _count(self, field: str):
+        with self._lock:
+            self._metrics[field] += 1
+
+    def _expires_at(self, uploaded) -> float:
+        expires_at = time.time() + self.ttl_s
+        # El fichero real trae su caducidad: no fiarse de un TTL mayor
+        expiration = getattr(uploaded, 'expiration_time', None)
+        if isinstance(expiration, datetime):
+            expires_at = min(expires_at, expiration.timestamp() - 3600)
+        return expires_at
+
+    def get_or_upload(self, path: str, key: Optional[str] = None):
+        """Fichero subido con este contenido si sigue vigente; si no, lo sube
+
+        key: clave del registro (por defecto, sha256 del fichero)
+        """
+        key = key or content_hash(path)
+        # Una sola subida por clave aunque varios threads la pidan a la vez
+        with self._key_lock(key):
+            entry = self._load().get(key)
+            if entry and entry["expires_at"] > time.time():
+                try:
+                    uploaded = self.client.get_file(entry["name"])
+                    self._count("reused")
+                    return uploaded
+                except Exception as e:
+                    # Borrado o caducado antes de tiempo: se vuelve a subir
+                    print(f"   ⚠️ {entry['name']} ya no está disponible ({e}); se sube de nuevo")
+                    self._count("missing")
+            elif entry:
+                self._count("expired")
+
+            uploaded = self.client.upload_file(path)
+            self._count("uploads")
+            self._record(key, {
+                "name": uploaded.name,
+                "uri": getattr(uploaded, 'uri', None),
+                "path": path,
+                "bytes": os.path.getsize(path),
+                "uploaded_at": datetime.now().isoformat(timespec="seconds"),
+                "expires_at": self._expires_at(uploaded)
+            })
+            return uploaded
+
+    def forget(self, key: str):
+        self._record(key, None)
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return dict(self._metrics)
+
+
+_registry: Optional[UploadRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_upload_registry() -> UploadRegistry:
+    """Instancia única por proceso (usa el cliente Gemini compartido)"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = UploadRegistry()
+    return _registry
+
+
+def set_upload_registry(registry: Optional[UploadRegistry]):
+    """Permite inyectar otro registro (p.ej. con otro cliente o fichero)"""
+    global _registry
+    _registry = registry
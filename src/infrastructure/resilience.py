@@ -0,0 +1,332 @@
+# src/infrastructure/resilience.py
+"""
+Control de latencia de cola para las etapas de una consulta.
+
+StageGuard envuelve una llamada bloqueante (Gemini, Qdrant) con:
+- timeout por etapa
+- hedging opcional: si la llamada supera el percentil configurado de su
+  latencia histórica, se lanza un duplicado y gana el primero que responda
+- circuit breaker: tras N fallos seguidos falla rápido durante un tiempo
+- plazo de la petición (Deadline): cada etapa espera como mucho lo que le
+  queda al cliente, y si el plazo se agota o el cliente se desconecta las
+  etapas siguientes ya no se ejecutan; Deadline.child() reserva un margen
+  para responder de otra forma (p.ej. en modo extractivo)
+
+Los threads de Python no se pueden cancelar: una llamada que supera su
+timeout (o pierde el hedge) termina en segundo plano y su resultado se
+descarta.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Optional
+
+# Pool compartido por todas las etapas (incluye margen para llamadas colgadas)
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('RESILIENCE_MAX_THREADS', '64')),
+    thread_name_prefix='stage'
+)
+
+
+class StageTimeoutError(TimeoutError):
+    """La etapa no respondió dentro de su timeout"""
+
+
+class DeadlineExceededError(StageTimeoutError):
+    """Se agotó el plazo que dio el cliente (no es un fallo del backend)"""
+
+
+class RequestCancelledError(Exception):
+    """El cliente abandonó la petición (desconexión)"""
+
+
+class Deadline:
+    """Plazo de una petición, compartido por todas sus etapas
+
+    timeout_s: presupuesto desde ahora (None = sin plazo)
+    """
+
+    def __init__(self, timeout_s: Optional[float] = None):
+        self.timeout_s = timeout_s
+        self.expires_at = time.monotonic() + timeout_s if timeout_s else None
+        self._cancelled = threading.Event()
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def child(self, reserve_s: float) -> 'Deadline':
+        """Plazo que vence reserve_s antes (misma cancelación): deja margen para un plan B"""
+        child = Deadline()
+        child._cancelled = self._cancelled
+        if self.expires_at is not None:
+            child.expires_at = self.expires_at - reserve_s
+            child.timeout_s = max(0.0, self.timeout_s - reserve_s)
+        return child
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check(self, stage: str):
+        """Antes de empezar una etapa: no gastar backend en una respuesta que nadie espera"""
+        if self.cancelled:
+            raise RequestCancelledError(f"Cliente desconectado antes de '{stage}'")
+        if self.expires_at is not None and time.monotonic() >= self.expires_at:
+            raise DeadlineExceededError(f"Plazo de {self.timeout_s * 1000:.0f}ms agotado antes de '{stage}'")
+
+
+class CircuitOpenError(Exception):
+    """El backend está marcado como no saludable: se falla rápido"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuito '{name}' abierto; reintentar en {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class LatencyTracker:
+    """Ventana deslizante de latencias (segundos) para calcular percentiles"""
+
+    def __init__(self, window: int = 500):
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def count(self) -> int:
+        return len(self.samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self.lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+class CircuitBreaker:
+    """closed → open tras `failure_threshold` fallos seguidos → half_open tras `reset_timeout`
+
+    En half_open pasa una sola llamada de prueba; el resto se rechaza hasta
+    que la prueba cierre o vuelva a abrir el circuito.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """Admite la llamada o lanza CircuitOpenError; True si es la llamada de prueba"""
+        with self.lock:
+            if self.state == "open":
+                elapsed = time.monotonic() - self.opened_at
+                if elapsed < self.reset_timeout:
+                    raise CircuitOpenError(self.name, self.reset_timeout - elapsed)
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self.probing:
+                    # Ya hay una prueba en vuelo
+                    raise CircuitOpenError(self.name, 1.0)
+                self.probing = True
+                return True
+            return False
+
+    def release_probe(self):
+        """La prueba terminó sin veredicto (plazo del cliente, cancelación): otra puede probar"""
+        with self.lock:
+            self.probing = False
+
+    def record_success(self):
+        with self.lock:
+            self.state = "closed"
+            self.failures = 0
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.probing = False
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"🔌 Circuito '{self.name}' abierto tras {self.failures} fallos")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class StageGuard:
+    def __init__(self,
+                 name: str,
+                 timeout_s: Optional[float] = None,
+                 hedge_percentile: Optional[float] = None,
+                 hedge_min_samples: int = 20,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30.0):
+        self.name = name
+        self.timeout_s = timeout_s
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latency = LatencyTracker()
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.counters = {"calls": 0, "timeouts": 0, "errors": 0, "hedges": 0, "hedge_wins": 0, "rejected": 0,
+                         "deadline_exceeded": 0, "cancelled": 0}
+        # call() corre a la vez en los threads de todas las peticiones
+        self._counters_lock = threading.Lock()
+
+    def count(self, field: str):
+        with self._counters_lock:
+            self.counters[field] += 1
+
+    def hedge_delay(self) -> Optional[float]:
+        if not self.hedge_percentile or self.latency.count() < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(self.hedge_percentile)
+
+    def expected_latency(self, p: float = 50) -> Optional[float]:
+        """Latencia típica de la etapa (None hasta tener muestras suficientes)"""
+        if self.latency.count() < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(p)
+
+    def call(self, fn: Callable[[], Any], timeout_s: Optional[float] = None,
+             deadline: Optional[Deadline] = None) -> Any:
+        """Ejecuta fn con timeout, hedging y circuit breaker
+
+        deadline: plazo de la petición; la etapa espera como mucho lo que le queda
+        """
+        if deadline is not None:
+            try:
+                deadline.check(self.name)
+            except DeadlineExceededError:
+                self.count("deadline_exceeded")
+                raise
+            except RequestCancelledError:
+                self.count("cancelled")
+                raise
+        try:
+            probe = self.breaker.before_call()
+        except CircuitOpenError:
+            self.count("rejected")
+            raise
+
+        self.count("calls")
+        timeout_s = timeout_s if timeout_s is not None else self.timeout_s
+        start = time.monotonic()
+        stop_at = start + timeout_s if timeout_s else None
+        # El plazo del cliente recorta el de la etapa
+        client_bound = False
+        if deadline is not None and deadline.expires_at is not None:
+            if stop_at is None or deadline.expires_at < stop_at:
+                stop_at = deadline.expires_at
+                client_bound = True
+
+        primary = _executor.submit(fn)
+        futures = {primary}
+
+        # Hedge: duplicado si la primaria supera el percentil histórico
+        delay = self.hedge_delay()
+        if delay is not None and (stop_at is None or start + delay < stop_at):
+            done, _ = wait(futures, timeout=delay)
+            if not done:
+                self.count("hedges")
+                futures.add(_executor.submit(fn))
+
+        try:
+            while futures:
+                remaining = None if stop_at is None else max(0.0, stop_at - time.monotonic())
+                if deadline is not None:
+                    # Esperas cortas para enterarse de una desconexión del cliente
+                    remaining = 0.1 if remaining is None else min(remaining, 0.1)
+                done, pending = wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+                if not done:
+                    if deadline is not None and deadline.cancelled:
+                        self.count("cancelled")
+                        raise RequestCancelledError(f"Cliente desconectado durante '{self.name}'")
+                    if stop_at is None or time.monotonic() < stop_at:
+                        continue
+                    if client_bound:
+                        # Se agotó el plazo del cliente, no el de la etapa: no penaliza el circuito
+                        self.count("deadline_exceeded")
+                        raise DeadlineExceededError(
+                            f"Plazo de {deadline.timeout_s * 1000:.0f}ms agotado durante '{self.name}'"
+                        )
+                    self.count("timeouts")
+                    self.breaker.record_failure()
+                    raise StageTimeoutError(f"Etapa '{self.name}' superó {timeout_s:.1f}s")
+
+                for future in done:
+                    futures.discard(future)
+                    if future.exception() is None:
+                        self.latency.record(time.monotonic() - start)
+                        self.breaker.record_success()
+                        if future is not primary:
+                            self.count("hedge_wins")
+                        return future.result()
+                    error = future.exception()
+
+            # Todas las copias fallaron
+            if isinstance(error, RequestCancelledError):
+                self.count("cancelled")
+                raise error
+            if isinstance(error, DeadlineExceededError):
+                # El plazo del cliente venció dentro de la llamada: no penaliza el circuito
+                self.count("deadline_exceeded")
+                raise error
+            self.count("errors")
+            self.breaker.record_failure()
+            raise error
+        finally:
+            if probe:
+                self.breaker.release_probe()
+            for future in futures:
+                future.cancel()
+
+    def stats(self) -> Dict:
+        def ms(value):
+            return round(value * 1000, 1) if value is not None else None
+
+        with self._counters_lock:
+            counters = dict(self.counters)
+        return {
+            **counters,
+            "timeout_s": self.timeout_s,
+            "hedge_percentile": self.hedge_percentile,
+            "p50_ms": ms(self.latency.percentile(50)),
+            "p95_ms": ms(self.latency.percentile(95)),
+            "p99_ms": ms(self.latency.percentile(99)),
+            "circuit": self.breaker.state
+        }
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    value = float(value)
+    return value if value > 0 else None
+
+
+def build_stage_guards() -> Dict[str, StageGuard]:
+    """Guards de una consulta RAG, configurables por entorno (0 desactiva)"""
+    hedge = _env_float('HEDGE_PERCENTILE', 95)
+    return {
+        "embed": StageGuard("embed", _env_float('EMBED_TIMEOUT_S', 5), hedge),
+        "search": StageGuard("search", _env_float('SEARCH_TIMEOUT_S', 3), hedge),
+        "images": StageGuard("images", _env_float('IMAGES_TIMEOUT_S', 2), hedge),
+        # Generar es caro: sin hedge salvo que se pida explícitamente
+        "generate": StageGuard("generate", _env_float('GENERATE_TIMEOUT_S', 30),
+                               _env_float('HEDGE_GENERATION_PERCENTILE', None)),
+    }
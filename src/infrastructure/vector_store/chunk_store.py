@@ -0,0 +1,153 @@
+# src/infrastructure/vector_store/chunk_store.py
+"""
+Almacén local de contenido de chunks (SQLite en modo WAL).
+
+Qdrant solo guarda los campos filtrables; el texto completo y los campos
+pesados (rutas y descripciones de imágenes) viven aquí, indexados por
+(colección, id de punto). Cada versión de colección tiene sus propias
+filas, así que un reindexado no pisa la versión servida.
+
+La tabla collections guarda, por versión, con qué modelo de embeddings
+se generaron sus vectores (ver embeddings/providers.py).
+"""
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional
+
+CHUNK_STORE_PATH = os.getenv('CHUNK_STORE_PATH', 'output/chunk_store.sqlite')
+
+
+class ChunkStore:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or CHUNK_STORE_PATH
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Una conexión por (proceso, thread), como SharedCache
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and getattr(self._local, 'pid', None) == os.getpid():
+            return conn
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS chunks ('
+            ' collection TEXT NOT NULL,'
+            ' point_id TEXT NOT NULL,'
+            ' doc_id TEXT,'
+            ' content TEXT NOT NULL,'
+            ' extra TEXT,'
+            ' PRIMARY KEY (collection, point_id))'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS chunks_doc ON chunks (collection, doc_id)')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS collections ('
+            ' collection TEXT PRIMARY KEY,'
+            ' embedding_model TEXT NOT NULL)'
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def put_many(self, collection: str, rows: Iterable[Dict]):
+        """rows: {'point_id', 'doc_id', 'content', 'extra'}"""
+        conn = self._connection()
+        with conn:
+            conn.execute('BEGIN')
+            conn.executemany(
+                'INSERT OR REPLACE INTO chunks (collection, point_id, doc_id, content, extra) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [
+                    (collection, str(row['point_id']), row.get('doc_id'), row['content'],
+                     json.dumps(row['extra'], ensure_ascii=False) if row.get('extra') else None)
+                    for row in rows
+                ]
+            )
+
+    def update_extra(self, collection: str, point_id: str, extra: Dict):
+        """Fusiona campos pesados adicionales en un chunk existente"""
+        conn = self._connection()
+        row = conn.execute(
+            'SELECT extra FROM chunks WHERE collection = ? AND point_id = ?',
+            (collection, str(point_id))
+        ).fetchone()
+        if row is None:
+            return
+        merged = {**(json.loads(row[0]) if row[0] else {}), **extra}
+        conn.execute(
+            'UPDATE chunks SET extra = ? WHERE collection = ? AND point_id = ?',
+            (json.dumps(merged, ensure_ascii=False), collection, str(point_id))
+        )
+
+    def get_many(self, collection: str, point_ids: List[str]) -> Dict[str, Dict]:
+        """Lectura en bloque: point_id → {'content', **extra}"""
+        if not point_ids:
+            return {}
+        placeholders = ','.join('?' * len(point_ids))
+        rows = self._connection().execute(
+            f'SELECT point_id, content, extra FROM chunks '
+            f'WHERE collection = ? AND point_id IN ({placeholders})',
+            [collection, *[str(pid) for pid in point_ids]]
+        ).fetchall()
+        return {
+            point_id: {'content': content, **(json.loads(extra) if extra else {})}
+            for point_id, content, extra in rows
+        }
+
+    def iter_collection(self, collection: str, batch_size: int = 1000) -> Iterator[List[Dict]]:
+        """Filas de una versión por lotes, en el formato de put_many (exportación)"""
+        last_id = ''
+        while True:
+            rows = self._connection().execute(
+                'SELECT point_id, doc_id, content, extra FROM chunks '
+                'WHERE collection = ? AND point_id > ? ORDER BY point_id LIMIT ?',
+                (collection, last_id, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            yield [
+                {'point_id': point_id, 'doc_id': doc_id, 'content': content,
+                 'extra': json.loads(extra) if extra else None}
+                for point_id, doc_id, content, extra in rows
+            ]
+            last_id = rows[-1][0]
+
+    def delete_document(self, collection: str, doc_id: str):
+        self._connection().execute(
+            'DELETE FROM chunks WHERE collection = ? AND doc_id = ?', (collection, doc_id)
+        )
+
+    def delete_points(self, collection: str, point_ids: List[str]):
+        if not point_ids:
+            return
+        placeholders = ','.join('?' * len(point_ids))
+        self._connection().execute(
+            f'DELETE FROM chunks WHERE collection = ? AND point_id IN ({placeholders})',
+            [collection, *[str(pid) for pid in point_ids]]
+        )
+
+    def delete_collection(self, collection: str):
+        conn = self._connection()
+        conn.execute('DELETE FROM chunks WHERE collection = ?', (collection,))
+        conn.execute('DELETE FROM collections WHERE collection = ?', (collection,))
+
+    def set_embedding_model(self, collection: str, identity: Dict):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO collections (collection, embedding_model) VALUES (?, ?)',
+            (collection, json.dumps(identity))
+        )
+
+    def get_embedding_model(self, collection: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            'SELECT embedding_model FROM collections WHERE collection = ?', (collection,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def count(self, collection: str) -> int:
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM chunks WHERE collection = ?', (collection,)
+        ).fetchone()[0]
@@ -0,0 +1,138 @@
+# src/infrastructure/vector_store/fake_store.py
+"""
+Vector store en memoria con la misma interfaz que QdrantOptimizedStore,
+para benchmarks y pruebas locales sin Qdrant. Simula latencia y, con
+`slow_probability`, búsquedas lentas ocasionales.
+"""
+import json
+import math
+import random
+import time
+from typing import Dict, List, Optional
+
+from src.infrastructure.llm.fake_gemini import fake_embedding
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class FakeVectorStore:
+    def __init__(self,
+                 chunks: Optional[List[Dict]] = None,
+                 images: Optional[List[Dict]] = None,
+                 latency_s: float = 0.005,
+                 slow_probability: float = 0.0,
+                 slow_latency_s: float = 1.0,
+                 dim: int = 768):
+        self.collection_name = "fake_rag"
+        self.images_collection_name = "fake_rag_images"
+        self.latency_s = latency_s
+        self.slow_probability = slow_probability
+        self.slow_latency_s = slow_latency_s
+        self.dim = dim
+        self.chunks = []
+        self.images = []
+        for i, chunk in enumerate(chunks or self.sample_chunks()):
+            chunk_id = chunk.get("chunk_id", chunk.get("id", i))
+            self.chunks.append({
+                **chunk,
+                # Mismo payload que scripts/load_to_qdrant.py: los filtros se comportan igual que en Qdrant
+                "chunk_id": chunk_id,
+                "page": chunk.get("page", chunk_id // 3 + 1),
+                "type": chunk.get("type", "text"),
+                "has_image": chunk.get("has_image", False),
+                "embedding": chunk.get("embedding") or fake_embedding(chunk["content"], dim)
+            })
+        for img in images or []:
+            self.images.append({**img, "embedding": img.get("embedding") or fake_embedding(img.get("description", ""), dim)})
+
+    @staticmethod
+    def sample_chunks(count: int = 50) -> List[Dict]:
+        return [
+            {"id": i, "content": f"Fragmento {i} del documento de prueba sobre IDP, Bedrock y Lambda.", "page": i // 3 + 1}
+            for i in range(count)
+        ]
+
+    @classmethod
+    def from_chunks_file(cls, path: str = 'output/chunks_with_embeddings.json', **kwargs) -> "FakeVectorStore":
+        try:
+            with open(path, 'r') as f:
+                chunks = json.load(f)
+        except OSError:
+            chunks = None
+        return cls(chunks=chunks, **kwargs)
+
+    def _sleep(self):
+        latency = self.latency_s
+        if self.slow_probability and random.random() < self.slow_probability:
+            latency = self.slow_latency_s
+        if latency > 0:
+            time.sleep(latency)
+
+    def hybrid_search(self,
+                      query_embedding: List[float],
+                      query_text: str,
+                      top_k: int = 5,
+                      filters: Optional[Dict] = None,
+                      text_weight: float = 0.2,
+                      search_params=None,
+                      collection_name: Optional[str] = None) -> List[Dict]:
+        self._sleep()
+        keywords = query_text.lower().split() if query_text else []
+        results = []
+        for chunk in self.chunks:
+            if not self._matches(chunk, filters or {}):
+                continue
+            vector_score = _cosine(query_embedding, chunk["embedding"])
+            content = chunk["content"].lower()
+            text_score = sum(1 for kw in keywords if kw in content) / len(keywords) if keywords else 0
+            payload = {k: v for k, v in chunk.items() if k != "embedding"}
+            results.append({
+                "id": str(chunk["chunk_id"]),
+                "score": vector_score * (1 - text_weight) + text_score * text_weight,
+                "vector_score": vector_score,
+                "text_score": text_score,
+                "text": chunk["content"][:500],
+                "metadata": payload
+            })
+        results.sort(key=lambda r: r["score"], reverse=True)
+        return results[:top_k]
+
+    @staticmethod
+    def _matches(chunk: Dict, filters: Dict) -> bool:
+        for key in ("type", "has_image", "doc_id", "source", "chunk_id", "page"):
+            if filters.get(key) is None:
+                continue
+            allowed = filters[key] if isinstance(filters[key], (list, tuple, set)) else [filters[key]]
+            if chunk.get(key) not in allowed:
+                return False
+        page = chunk.get("page", 0)
+        if filters.get("page_from") is not None and page < filters["page_from"]:
+            return False
+        if filters.get("page_to") is not None and page > filters["page_to"]:
+            return False
+        return True
+
+    def search_images(self, query_embedding: List[float], top_k: int = 2, score_threshold: float = 0.3) -> List[Dict]:
+        self._sleep()
+        scored = [
+            {**{k: v for k, v in img.items() if k != "embedding"}, "score": _cosine(query_embedding, img["embedding"])}
+            for img in self.images
+        ]
+        scored = [img for img in scored if img["score"] >= score_threshold]
+        scored.sort(key=lambda img: img["score"], reverse=True)
+        return scored[:top_k]
+
+    def resolve_collection(self, alias: Optional[str] = None, strict: bool = False) -> str:
+        return alias or self.collection_name
+
+    def get_statistics(self) -> Dict:
+        return {
+            "collection_version": self.collection_name,
+            "total_vectors": len(self.chunks),
+            "points_count": len(self.chunks),
+            "status": "green"
+        }
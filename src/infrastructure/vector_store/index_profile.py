@@ -0,0 +1,178 @@
+# src/infrastructure/vector_store/index_profile.py
+"""
+Perfil de índice (HNSW + quantización + parámetros de búsqueda).
+Lo genera scripts/tune_index.py y lo leen tanto la creación de la
+colección como hybrid_search.
+"""
+import copy
+import json
+import os
+from typing import Dict, Optional
+
+from qdrant_client.models import (
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    BinaryQuantization, BinaryQuantizationConfig,
+    ProductQuantization, ProductQuantizationConfig, CompressionRatio,
+    SearchParams, QuantizationSearchParams
+)
+
+PROFILE_PATH = os.getenv('INDEX_PROFILE_PATH', 'output/index_profile.json')
+
+# Valores históricos de initialize_collection_pro
+DEFAULT_PROFILE = {
+    "hnsw": {
+        "m": 32,
+        "ef_construct": 200,
+        "full_scan_threshold": 10000
+    },
+    "quantization": {
+        "type": "scalar",
+        "quantile": 0.99,
+        "always_ram": True
+    },
+    "optimizers": {
+        "memmap_threshold": 50000,
+        "indexing_threshold": 10000,
+        "flush_interval_sec": 5
+    },
+    "search": {
+        "hnsw_ef": None,
+        "rescore": True,
+        "oversampling": None
+    },
+    # Partición por documento:
+    #  - "tenant_index": índice de payload doc_id con is_tenant + grafos HNSW por
+    #    documento (payload_m). Funciona en Qdrant de un solo nodo.
+    #  - "shard_keys": un shard key por documento (requiere Qdrant en modo cluster)
+    "partitioning": {
+        "mode": "tenant_index",
+        "payload_m": 16
+    },
+    # Recuperación en dos etapas (ver scripts/benchmark_two_stage.py):
+    # HNSW sobre un vector "coarse" con las primeras coarse_dim componentes del
+    # embedding y rescoring de candidates_factor × limit candidatos con el
+    # vector completo, que puede vivir en disco y no tiene grafo HNSW
+    "two_stage": {
+        "enabled": False,
+        "coarse_dim": 256,
+        "candidates_factor": 4,
+        "full_on_disk": True
+    }
+}
+
+
+def load_index_profile(path: Optional[str] = None) -> Dict:
+    """Carga el perfil guardado; si no existe usa DEFAULT_PROFILE"""
+    profile = copy.deepcopy(DEFAULT_PROFILE)
+    try:
+        with open(path or PROFILE_PATH, 'r') as f:
+            saved = json.load(f)
+        for section in profile:
+            if isinstance(saved.get(section), dict):
+                profile[section].update(saved[section])
+        # "quantization": null en el fichero desactiva la quantización
+        if "quantization" in saved and saved["quantization"] is None:
+            profile["quantization"] = None
+        if "tuning" in saved:
+            profile["tuning"] = saved["tuning"]
+    except (OSError, json.JSONDecodeError):
+        pass
+    return profile
+
+
+def save_index_profile(profile: Dict, path: Optional[str] = None):
+    path = path or PROFILE_PATH
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2)
+
+
+def build_quantization_config(quantization: Optional[Dict]):
+    """Traduce la sección 'quantization' del perfil a la config de Qdrant"""
+    if not quantization:
+        return None
+
+    q_type = quantization.get("type")
+    always_ram = quantization.get("always_ram", True)
+
+    if q_type == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=quantization.get("quantile", 0.99),
+                always_ram=always_ram
+            )
+        )
+    if q_type == "binary":
+        return BinaryQuantization(
+            binary=BinaryQuantizationConfig(always_ram=always_ram)
+        )
+    if q_type == "product":
+        return ProductQuantization(
+            product=ProductQuantizationConfig(
+                compression=CompressionRatio(quantization.get("compression", "x16")),
+                always_ram=always_ram
+            )
+        )
+    raise ValueError(f"Tipo de quantización desconocido: {q_type}")
+
+
+def build_search_params(search: Optional[Dict], exact: bool = False) -> Optional[SearchParams]:
+    """Parámetros de búsqueda (hnsw_ef, rescoring, oversampling)"""
+    search = search or {}
+    if exact:
+        # Exacta de verdad: sobre los vectores originales, no los quantizados
+        return SearchParams(exact=True, quantization=QuantizationSearchParams(ignore=True))
+
+    quantization = None
+    if search.get("rescore") is not None or search.get("oversampling"):
+        quantization = QuantizationSearchParams(
+            rescore=search.get("rescore"),
+            oversampling=search.get("oversampling")
+        )
+
+    if search.get("hnsw_ef") is None and quantization is None:
+        return None
+
+    return SearchParams(hnsw_ef=search.get("hnsw_ef"), quantization=quantization)
+
+
+def estimate_memory_bytes(profile: Dict, num_vectors: int, vector_size: int) -> Dict:
+    """Estimación de RAM del índice: vectores originales, quantizados y grafo HNSW
+
+    Con two_stage el grafo y la quantización son del vector coarse; el
+    vector completo solo suma a la RAM si no está en disco.
+    """
+    two_stage = profile.get("two_stage") or {}
+    full_vectors = 0
+    if two_stage.get("enabled"):
+        full_vectors = num_vectors * vector_size * 4
+        vector_size = min(vector_size, two_stage["coarse_dim"])
+
+    original = num_vectors * vector_size * 4
+    quantization = profile.get("quantization") or {}
+    q_type = quantization.get("type")
+
+    if q_type == "scalar":
+        quantized = num_vectors * vector_size
+    elif q_type == "binary":
+        quantized = num_vectors * vector_size // 8
+    elif q_type == "product":
+        ratio = int(str(quantization.get("compression", "x16")).lstrip("x"))
+        quantized = original // ratio
+    else:
+        quantized = 0
+
+    m = profile["hnsw"]["m"]
+    # Capa 0 con 2*m enlaces de 4 bytes por nodo
+    hnsw = num_vectors * m * 2 * 4
+
+    return {
+        "original_vectors": original,
+        "quantized_vectors": quantized,
+        "hnsw_graph": hnsw,
+        "full_vectors": full_vectors,
+        # Con quantización en RAM los originales pueden vivir en disco
+        "ram_total": (quantized if quantized else original) + hnsw
+                     + (0 if two_stage.get("full_on_disk", True) else full_vectors)
+    }
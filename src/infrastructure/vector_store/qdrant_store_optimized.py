@@ -2,98 +2,192 @@
 from qdrant_client import QdrantClient
 from qdrant_client.models import (
     Distance, VectorParams, PointStruct,
-    Filter, FieldCondition, MatchValue,
-    OptimizersConfigDiff, HnswConfigDiff
+    Filter, FieldCondition, MatchValue, MatchAny, Range,
+    OptimizersConfigDiff, HnswConfigDiff, CollectionStatus,
+    KeywordIndexParams, ShardingMethod, FilterSelector, PointIdsList, SearchParams, Prefetch,
+    CreateAliasOperation, CreateAlias, DeleteAliasOperation, DeleteAlias
 )
+import re
+import time
 import uuid
+from datetime import datetime
+from pathlib import Path
 from typing import List, Dict, Optional
 
+from src.infrastructure.vector_store.index_profile import (
+    load_index_profile, build_quantization_config, build_search_params
+)
+from src.infrastructure.vector_store.chunk_store import ChunkStore
+from src.infrastructure.embeddings.providers import check_identity
+
+# Campos filtrables con índice de payload (filtered HNSW en Qdrant)
+PAYLOAD_INDEXES = {
+    "page": "integer",
+    "type": "keyword",
+    "has_image": "bool",
+    "source": "keyword",
+    "doc_id": "keyword",
+    "chunk_id": "integer"
+}
+
+# Lo único que devuelve hybrid_search desde Qdrant; el contenido sale del ChunkStore
+SEARCH_PAYLOAD_FIELDS = list(PAYLOAD_INDEXES) + ["char_count"]
+
+# Campos de metadata que van al ChunkStore en lugar del payload
+HEAVY_FIELDS = ("image_path", "image_paths", "image_descriptions", "duplicates")
+
+# Vectores con nombre de las colecciones en dos etapas (perfil "two_stage")
+FULL_VECTOR = "full"
+COARSE_VECTOR = "coarse"
+
+
+def make_doc_id(source: str) -> str:
+    """ID estable de documento a partir de su ruta: data/RAG Challenge.pdf → rag-challenge"""
+    stem = Path(source).stem.lower()
+    return re.sub(r'[^a-z0-9]+', '-', stem).strip('-') or "unknown"
+
+
+def _shard_key_missing(error: Exception) -> bool:
+    """Qdrant rechazó la operación porque el shard key ya no existe"""
+    message = str(error).lower()
+    return "shard" in message and ("not found" in message or "does not exist" in message)
+
+
+def coarse_vector(embedding: List[float], dim: int) -> List[float]:
+    """Primeras `dim` componentes del embedding
+
+    text-embedding-004 está entrenado con Matryoshka: truncar equivale a
+    pedir output_dimensionality=dim. Con distancia coseno Qdrant normaliza.
+    """
+    return list(embedding[:dim])
+
 
 class QdrantOptimizedStore:
-    def __init__(self, host="localhost", port=6333):
+    def __init__(self,
+                 host="localhost",
+                 port=6333,
+                 profile: Optional[Dict] = None,
+                 chunk_store: Optional[ChunkStore] = None):
         self.client = QdrantClient(host=host, port=port)
+        # API REST (snapshots en streaming, ver application/snapshot_bundle.py)
+        self.url = f"http://{host}:{port}"
+        # Contenido completo de los chunks (fuera de Qdrant)
+        self.chunk_store = chunk_store or ChunkStore()
         self.collection_name = "indra_rag_optimized"
+        # Perfil de índice/búsqueda (ver scripts/tune_index.py)
+        self.profile = profile or load_index_profile()
+        # Colección separada para las descripciones de imágenes
+        self.images_collection_name = "indra_rag_images"
+        # Colección → usa shard keys; (colección, doc_id) con shard key creado
+        self._sharding_cache: Dict[str, bool] = {}
+        self._shard_keys = set()
+        # Colección → tamaño de su vector coarse, None si es de una etapa (ver coarse_size)
+        self._two_stage_cache: Dict[str, Optional[int]] = {}
+
+    def initialize_collection_pro(self,
+                                  vector_size: int = 768,
+                                  collection_name: Optional[str] = None,
+                                  defer_indexing: bool = False,
+                                  replace: bool = False):
+        """Configuración PROFESIONAL - VERSIÓN CORREGIDA
+
+        collection_name: colección destino (por defecto self.collection_name).
+        Para reindexar sin caída usar rebuild_collection(), que crea una
+        versión nueva y cambia el alias.
+        defer_indexing: no construir HNSW hasta finalize_collection()
+        replace: borrar la colección si ya existe (solo colecciones temporales:
+        afinado, benchmarks). Sin él, un nombre existente es un error
+        """
+        collection_name = collection_name or self.collection_name
+        self._claim_collection_name(collection_name, replace)
+
+        hnsw = self.profile["hnsw"]
+        optimizers = self.profile["optimizers"]
+        partitioning = self.profile["partitioning"]
+        two_stage = self.profile["two_stage"]
+
+        indexed_vector = VectorParams(
+            size=min(vector_size, two_stage["coarse_dim"]) if two_stage["enabled"] else vector_size,
+            distance=Distance.COSINE,
+            hnsw_config=HnswConfigDiff(
+                m=hnsw["m"],
+                ef_construct=hnsw["ef_construct"],
+                full_scan_threshold=hnsw["full_scan_threshold"],
+                # Subgrafos HNSW por documento para búsquedas filtradas por doc_id
+                payload_m=partitioning.get("payload_m")
+            ),
+            quantization_config=build_quantization_config(self.profile["quantization"])
+        )
+        if two_stage["enabled"]:
+            # HNSW solo sobre el vector coarse; el completo se lee para el rescoring
+            vectors_config = {
+                COARSE_VECTOR: indexed_vector,
+                FULL_VECTOR: VectorParams(
+                    size=vector_size,
+                    distance=Distance.COSINE,
+                    hnsw_config=HnswConfigDiff(m=0, payload_m=0),
+                    on_disk=two_stage.get("full_on_disk", True)
+                )
+            }
+        else:
+            vectors_config = indexed_vector
 
-    def initialize_collection_pro(self, vector_size: int = 768):
-        """Configuración PROFESIONAL - VERSIÓN CORREGIDA"""
-
-        # Eliminar colección vieja si existe
-        try:
-            self.client.delete_collection(self.collection_name)
-            print(f"🗑️ Colección anterior eliminada")
-        except:
-            pass
-
-        # Crear colección OPTIMIZADA - SINTAXIS CORREGIDA
+        # Crear colección con el perfil de índice (afinado o por defecto)
         self.client.create_collection(
-            collection_name=self.collection_name,
-            vectors_config=VectorParams(
-                size=vector_size,
-                distance=Distance.COSINE,
-                # HNSW optimizado para mejor accuracy
-                hnsw_config=HnswConfigDiff(
-                    m=32,  # Más conexiones = mejor accuracy
-                    ef_construct=200,  # Más esfuerzo en construcción
-                    full_scan_threshold=10000
-                ),
-                # Quantización - SINTAXIS CORREGIDA
-                quantization_config={
-                    "scalar": {
-                        "type": "int8",
-                        "quantile": 0.99,
-                        "always_ram": True
-                    }
-                }
-            ),
-            # Optimizadores para Mac M1
+            collection_name=collection_name,
+            vectors_config=vectors_config,
             optimizers_config=OptimizersConfigDiff(
-                memmap_threshold=50000,
-                indexing_threshold=10000,
-                flush_interval_sec=5
-            )
+                memmap_threshold=optimizers["memmap_threshold"],
+                # 0 desactiva la indexación durante la carga masiva
+                indexing_threshold=0 if defer_indexing else optimizers["indexing_threshold"],
+                flush_interval_sec=optimizers["flush_interval_sec"]
+            ),
+            sharding_method=ShardingMethod.CUSTOM if partitioning["mode"] == "shard_keys" else None
         )
 
-        print(f"✅ Colección '{self.collection_name}' creada con configuración ÓPTIMA")
-        print(f"   - HNSW con m=32 para máxima accuracy")
-        print(f"   - Quantización int8 para velocidad")
-        print(f"   - Optimizada para Apple M1")
+        self._sharding_cache.pop(collection_name, None)
+        self._two_stage_cache.pop(collection_name, None)
+        self.chunk_store.delete_collection(collection_name)
+
+        quantization = self.profile["quantization"]
+        print(f"✅ Colección '{collection_name}' creada")
+        if defer_indexing:
+            print(f"   - Indexación HNSW diferida hasta el final de la carga")
+        print(f"   - HNSW m={hnsw['m']}, ef_construct={hnsw['ef_construct']}")
+        print(f"   - Quantización: {quantization['type'] if quantization else 'ninguna'}")
+        print(f"   - Partición por documento: {partitioning['mode']}")
+        if two_stage["enabled"]:
+            print(f"   - Dos etapas: HNSW sobre {indexed_vector.size}d, rescoring con {vector_size}d")
+        if "tuning" in self.profile:
+            print(f"   - Perfil afinado: recall@k={self.profile['tuning'].get('recall')}")
 
         # Crear índices después de crear la colección
-        try:
-            # Índice para página
-            self.client.create_payload_index(
-                collection_name=self.collection_name,
-                field_name="page",
-                field_schema="integer"
-            )
-            print(f"   ✅ Índice 'page' creado")
-
-            # Índice para tipo
-            self.client.create_payload_index(
-                collection_name=self.collection_name,
-                field_name="type",
-                field_schema="keyword"
-            )
-            print(f"   ✅ Índice 'type' creado")
-
-            # Índice para has_image
-            self.client.create_payload_index(
-                collection_name=self.collection_name,
-                field_name="has_image",
-                field_schema="bool"
-            )
-            print(f"   ✅ Índice 'has_image' creado")
-
-        except Exception as e:
-            print(f"   ⚠️ Índices no creados (no crítico): {e}")
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            if field_name == "doc_id":
+                # Índice tenant: Qdrant agrupa en disco los puntos de cada documento
+                field_schema = KeywordIndexParams(type="keyword", is_tenant=True)
+            try:
+                self.client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field_name,
+                    field_schema=field_schema
+                )
+                print(f"   ✅ Índice '{field_name}' creado")
+            except Exception as e:
+                print(f"   ⚠️ Índice '{field_name}' no creado (no crítico): {e}")
 
     def add_documents_batch(self,
                             texts: List[str],
                             embeddings: List[List[float]],
                             metadata: List[Dict],
-                            batch_size: int = 100) -> List[str]:
+                            batch_size: int = 100,
+                            collection_name: Optional[str] = None) -> List[str]:
         """Inserción optimizada en batches"""
 
+        # Alias resuelto: el ChunkStore indexa por versión, como fetch_contents
+        collection_name = collection_name or self.resolve_collection()
+        # El tamaño coarse es el de la colección, no el del perfil actual
+        coarse_dim = self.coarse_size(collection_name)
         all_ids = []
         total = len(texts)
 
@@ -104,36 +198,45 @@ class QdrantOptimizedStore:
 
             points = []
             batch_ids = []
+            rows = []
 
             for text, embedding, meta in zip(batch_texts, batch_embeddings, batch_metadata):
-                point_id = str(uuid.uuid4())
+                doc_id = meta.get("doc_id") or make_doc_id(meta.get("source", "unknown"))
+                # ID determinista: recargar un documento sobrescribe sus puntos
+                point_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{doc_id}:{meta.get('chunk_id', 0)}"))
                 batch_ids.append(point_id)
 
-                # Payload enriquecido
+                # Payload mínimo: solo campos filtrables
                 payload = {
-                    "content": text,
-                    "text": text[:500],  # Preview
                     "page": meta.get("page", 0),
                     "type": meta.get("type", "text"),
                     "has_image": meta.get("has_image", False),
-                    "image_path": meta.get("image_path"),
                     "chunk_id": meta.get("chunk_id", 0),
                     "char_count": len(text),
-                    "source": meta.get("source", "unknown")
+                    "source": meta.get("source", "unknown"),
+                    "doc_id": doc_id
                 }
 
+                if coarse_dim:
+                    vector = {FULL_VECTOR: embedding, COARSE_VECTOR: coarse_vector(embedding, coarse_dim)}
+                else:
+                    vector = embedding
+
                 points.append(PointStruct(
                     id=point_id,
-                    vector=embedding,
+                    vector=vector,
                     payload=payload
                 ))
+                rows.append({
+                    "point_id": point_id,
+                    "doc_id": doc_id,
+                    "content": text,
+                    "extra": {field: meta[field] for field in HEAVY_FIELDS if meta.get(field)}
+                })
 
-            # Insertar batch
-            self.client.upsert(
-                collection_name=self.collection_name,
-                points=points,
-                wait=True
-            )
+            # Contenido primero: un punto visible en Qdrant siempre tiene su texto
+            self.chunk_store.put_many(collection_name, rows)
+            self._upsert_partitioned(collection_name, points)
 
             all_ids.extend(batch_ids)
             print(f"   📦 Batch {i // batch_size + 1}: {len(batch_ids)} documentos agregados")
@@ -141,67 +244,571 @@ class QdrantOptimizedStore:
         print(f"✅ Total: {len(all_ids)} documentos indexados")
         return all_ids
 
-    def hybrid_search(self,
+    # ------------------------------------------------------------------
+    # Partición por documento
+    # ------------------------------------------------------------------
+
+    def uses_shard_keys(self, collection_name: Optional[str] = None) -> bool:
+        """La colección (resuelta tras el alias) usa un shard key por documento"""
+        return self._uses_shard_keys(self.resolve_collection(collection_name))
+
+    def _uses_shard_keys(self, collection: str) -> bool:
+        """uses_shard_keys() de una colección ya resuelta (sin consultar los alias)"""
+        cache = self._sharding_cache
+        if collection not in cache:
+            try:
+                info = self.client.get_collection(collection)
+            except Exception:
+                # Error transitorio: no se cachea, se vuelve a preguntar en la siguiente llamada
+                return False
+            cache[collection] = info.config.params.sharding_method == ShardingMethod.CUSTOM
+        return cache[collection]
+
+    def coarse_size(self, collection_name: Optional[str] = None) -> Optional[int]:
+        """Dimensión del vector coarse de la colección (None si es de una etapa)
+
+        Se lee de la configuración de la colección: el perfil puede haber
+        cambiado (benchmark_two_stage --save) después de crearla.
+        """
+        return self._coarse_size(self.resolve_collection(collection_name))
+
+    def _coarse_size(self, collection: str) -> Optional[int]:
+        """coarse_size() de una colección ya resuelta (sin consultar los alias)"""
+        cache = self._two_stage_cache
+        if collection not in cache:
+            try:
+                vectors = self.client.get_collection(collection).config.params.vectors
+            except Exception:
+                # Error transitorio: no se cachea, se vuelve a preguntar en la siguiente llamada
+                return None
+            cache[collection] = (vectors[COARSE_VECTOR].size
+                                 if isinstance(vectors, dict) and COARSE_VECTOR in vectors else None)
+        return cache[collection]
+
+    def uses_two_stage(self, collection_name: Optional[str] = None) -> bool:
+        """La colección tiene vectores coarse/full (creada con two_stage activado)"""
+        return self.coarse_size(collection_name) is not None
+
+    def _ensure_shard_key(self, collection_name: str, doc_id: str):
+        known = self._shard_keys
+        if (collection_name, doc_id) in known:
+            return
+        try:
+            self.client.create_shard_key(collection_name, doc_id)
+        except Exception as e:
+            # Ya existe
+            if "already exists" not in str(e).lower():
+                raise
+        known.add((collection_name, doc_id))
+
+    def _upsert_partitioned(self, collection_name: str, points: List[PointStruct]):
+        if not self._uses_shard_keys(collection_name):
+            self.client.upsert(collection_name=collection_name, points=points, wait=True)
+            return
+
+        # Un upsert por documento, dirigido a su shard
+        by_doc = {}
+        for point in points:
+            by_doc.setdefault(point.payload["doc_id"], []).append(point)
+        for doc_id, doc_points in by_doc.items():
+            self._ensure_shard_key(collection_name, doc_id)
+            try:
+                self._upsert_shard(collection_name, doc_id, doc_points)
+            except Exception as e:
+                if not _shard_key_missing(e):
+                    raise
+                # Otro proceso borró el shard key (delete_document): la caché estaba obsoleta
+                self._shard_keys.discard((collection_name, doc_id))
+                self._ensure_shard_key(collection_name, doc_id)
+                self._upsert_shard(collection_name, doc_id, doc_points)
+
+    def _upsert_shard(self, collection_name: str, doc_id: str, points: List[PointStruct]):
+        self.client.upsert(
+            collection_name=collection_name,
+            points=points,
+            wait=True,
+            shard_key_selector=doc_id
+        )
+
+    def _shard_selector(self, collection: str, filters: Optional[Dict]):
+        """Enruta la búsqueda al shard del documento si el filtro lo fija"""
+        doc_id = (filters or {}).get("doc_id")
+        if doc_id and self._uses_shard_keys(collection):
+            return list(doc_id) if isinstance(doc_id, (list, tuple, set)) else doc_id
+        return None
+
+    def delete_document(self, doc_id: str, collection_name: Optional[str] = None):
+        """Elimina todos los puntos de un documento (barato: índice tenant o shard)"""
+        collection_name = self.resolve_collection(collection_name or self.collection_name)
+
+        if self._uses_shard_keys(collection_name):
+            self.client.delete_shard_key(collection_name, doc_id)
+            self._shard_keys.discard((collection_name, doc_id))
+        else:
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=FilterSelector(filter=self.build_filter({"doc_id": doc_id})),
+                wait=True
+            )
+        self.chunk_store.delete_document(collection_name, doc_id)
+        print(f"🗑️ Documento '{doc_id}' eliminado de '{collection_name}'")
+
+    def replace_document(self,
+                         doc_id: str,
+                         texts: List[str],
+                         embeddings: List[List[float]],
+                         metadata: List[Dict],
+                         embedding_model: Optional[Dict] = None) -> List[str]:
+        """Recarga un documento en la colección servida sin reconstruir el resto
+
+        Primero se escriben los puntos nuevos (los ids son deterministas: los
+        chunks que siguen existiendo se sobrescriben) y después se borran por id
+        los que ya no están; una búsqueda concurrente nunca ve el documento vacío.
+
+        embedding_model: identidad del proveedor que generó `embeddings`;
+        se rechaza si la colección se cargó con otro modelo
+        """
+        collection_name = self.resolve_collection()
+        if embedding_model:
+            self.check_embedding_model(embedding_model, collection_name)
+        previous = self._document_point_ids(collection_name, doc_id)
+        metadata = [{**meta, "doc_id": doc_id} for meta in metadata]
+        point_ids = self.add_documents_batch(texts, embeddings, metadata, collection_name=collection_name)
+
+        stale = sorted(set(previous) - set(point_ids))
+        if stale:
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=PointIdsList(points=stale),
+                wait=True,
+                shard_key_selector=doc_id if self._uses_shard_keys(collection_name) else None
+            )
+            self.chunk_store.delete_points(collection_name, stale)
+        print(f"♻️ Documento '{doc_id}' recargado en '{collection_name}' ({len(stale)} chunks obsoletos borrados)")
+        return point_ids
+
+    def _document_point_ids(self, collection_name: str, doc_id: str) -> List[str]:
+        """Ids de los puntos de un documento (scroll sin payload ni vectores)"""
+        point_ids = []
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=collection_name,
+                scroll_filter=self.build_filter({"doc_id": doc_id}),
+                limit=1000,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
+            )
+            point_ids.extend(str(point.id) for point in points)
+            if offset is None:
+                return point_ids
+
+    def list_documents(self, limit: int = 1000) -> Dict[str, int]:
+        """doc_id → número de chunks en la colección servida"""
+        response = self.client.facet(
+            collection_name=self.collection_name,
+            key="doc_id",
+            limit=limit,
+            exact=True
+        )
+        return {str(hit.value): hit.count for hit in response.hits}
+
+    # ------------------------------------------------------------------
+    # Modelo de embeddings de cada versión
+    # ------------------------------------------------------------------
+
+    def record_embedding_model(self, identity: Dict, collection_name: Optional[str] = None):
+        """Guarda proveedor/modelo/dimensión con la versión (en el ChunkStore)"""
+        self.chunk_store.set_embedding_model(collection_name or self.resolve_collection(), identity)
+
+    def embedding_model(self, collection_name: Optional[str] = None) -> Optional[Dict]:
+        """Identidad registrada para la colección servida (None si es anterior al registro)"""
+        return self.chunk_store.get_embedding_model(self.resolve_collection(collection_name))
+
+    def ensure_collection(self, vector_size: int, embedding_model: Optional[Dict] = None) -> str:
+        """Crea una versión vacía tras el alias si aún no se sirve ninguna colección"""
+        collection = self.resolve_collection()
+        if self.client.collection_exists(collection):
+            return collection
+
+        collection = self.new_version_name()
+        self.initialize_collection_pro(vector_size=vector_size, collection_name=collection)
+        if embedding_model:
+            self.record_embedding_model(embedding_model, collection)
+        self.swap_alias(collection)
+        return collection
+
+    def check_embedding_model(self, identity: Dict, collection_name: Optional[str] = None):
+        """ValueError si la colección se generó con otro modelo o dimensión"""
+        collection = self.resolve_collection(collection_name)
+        check_identity(self.chunk_store.get_embedding_model(collection), identity, f"La colección '{collection}'")
+
+    def check_chunk_store(self, collection_name: Optional[str] = None):
+        """RuntimeError si la colección tiene puntos pero su contenido no está en ningún sitio
+
+        El texto de los puntos nuevos solo vive en el ChunkStore local: un
+        worker con otro CHUNK_STORE_PATH (u otra máquina sin restaurar el
+        fichero) serviría chunks vacíos. Los puntos cargados antes del
+        ChunkStore llevan el texto en el payload y siguen valiendo.
+        """
+        collection = self.resolve_collection(collection_name)
+        if self.chunk_store.count(collection) > 0:
+            return
+        points, _ = self.client.scroll(collection_name=collection, limit=1, with_payload=["content"])
+        if points and not (points[0].payload or {}).get("content"):
+            raise RuntimeError(
+                f"La colección '{collection}' tiene puntos pero el ChunkStore ({self.chunk_store.path}) "
+                f"no tiene su contenido: restaura el fichero o reindexa"
+            )
+
+    # ------------------------------------------------------------------
+    # Reindexado sin caída: colecciones versionadas + alias
+    # ------------------------------------------------------------------
+
+    def new_version_name(self, alias: Optional[str] = None) -> str:
+        """indra_rag_optimized → indra_rag_optimized_v20250901120000123_1a2b3c
+
+        Milisegundos + sufijo aleatorio: dos cargas en el mismo instante (varios
+        workers de ingesta) no chocan; el orden por nombre sigue siendo cronológico.
+        """
+        alias = alias or self.collection_name
+        return f"{alias}_v{datetime.now().strftime('%Y%m%d%H%M%S%f')[:17]}_{uuid.uuid4().hex[:6]}"
+
+    def _claim_collection_name(self, collection_name: str, replace: bool):
+        """Nunca reutilizar en silencio un nombre existente: podría ser la versión servida"""
+        if not self.client.collection_exists(collection_name):
+            return
+        if not replace:
+            raise ValueError(f"La colección '{collection_name}' ya existe; no se sobrescribe")
+        self.client.delete_collection(collection_name)
+        print(f"🗑️ Colección anterior '{collection_name}' eliminada")
+
+    def get_alias_target(self, alias: Optional[str] = None) -> Optional[str]:
+        """Colección real a la que apunta el alias (None si no hay alias)"""
+        alias = alias or self.collection_name
+        for item in self.client.get_aliases().aliases:
+            if item.alias_name == alias:
+                return item.collection_name
+        return None
+
+    def resolve_collection(self, alias: Optional[str] = None, strict: bool = False) -> str:
+        """Nombre de la colección que se está sirviendo (alias resuelto)
+
+        strict: propagar los errores de Qdrant en vez de devolver el propio alias
+        """
+        alias = alias or self.collection_name
+        try:
+            return self.get_alias_target(alias) or alias
+        except Exception:
+            if strict:
+                raise
+            return alias
+
+    def list_versions(self, alias: Optional[str] = None) -> List[str]:
+        """Versiones existentes de una colección, de más antigua a más nueva"""
+        prefix = f"{alias or self.collection_name}_v"
+        names = [c.name for c in self.client.get_collections().collections]
+        return sorted(n for n in names if n.startswith(prefix))
+
+    def finalize_collection(self, collection_name: str, timeout: float = 600) -> bool:
+        """Reactiva la indexación HNSW tras la carga masiva y espera a que termine"""
+        self.client.update_collection(
+            collection_name=collection_name,
+            optimizers_config=OptimizersConfigDiff(
+                indexing_threshold=self.profile["optimizers"]["indexing_threshold"]
+            )
+        )
+
+        # Esperar dos lecturas seguidas en verde: el optimizador tarda en arrancar
+        start = time.time()
+        green_reads = 0
+        while time.time() - start < timeout:
+            info = self.client.get_collection(collection_name)
+            green_reads = green_reads + 1 if info.status == CollectionStatus.GREEN else 0
+            if green_reads >= 2:
+                print(f"   ✅ '{collection_name}' optimizada ({time.time() - start:.1f}s)")
+                return True
+            time.sleep(1)
+
+        print(f"   ⚠️ '{collection_name}' no terminó de optimizarse en {timeout}s")
+        return False
+
+    def swap_alias(self, new_collection: str, alias: Optional[str] = None) -> Optional[str]:
+        """Apunta el alias a new_collection de forma atómica. Devuelve la versión anterior"""
+        alias = alias or self.collection_name
+        return self.swap_aliases({alias: new_collection})[alias]
+
+    def swap_aliases(self, targets: Dict[str, str]) -> Dict[str, Optional[str]]:
+        """Cambia varios alias (alias → colección) en una sola operación atómica
+
+        Chunks e imágenes de un mismo bundle pasan a servirse a la vez.
+        Devuelve la versión anterior de cada alias.
+        """
+        previous = {alias: self.get_alias_target(alias) for alias in targets}
+        for alias, new_collection in targets.items():
+            # Validar todo antes de tocar nada
+            if not self.client.collection_exists(new_collection):
+                raise ValueError(f"'{new_collection}' no existe; el alias '{alias}' no se ha cambiado")
+
+        # Migración única: existía una colección real con el nombre del alias.
+        # Qdrant no puede borrarla en la misma operación que crea el alias: se
+        # borra antes y el alias solo se crea si el borrado se confirma.
+        legacy = [alias for alias in targets
+                  if previous[alias] is None and self.client.collection_exists(alias)]
+        for alias in legacy:
+            points = self.client.count(alias, exact=True).count
+            print(f"   ⚠️ '{alias}' es una colección real ({points} puntos); se elimina para crear el alias")
+            self.client.delete_collection(alias)
+            if self.client.collection_exists(alias):
+                raise RuntimeError(f"No se pudo eliminar la colección '{alias}'; los alias no se han cambiado")
+
+        operations = []
+        for alias, new_collection in targets.items():
+            if previous[alias] is not None:
+                operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+            operations.append(CreateAliasOperation(
+                create_alias=CreateAlias(collection_name=new_collection, alias_name=alias)
+            ))
+
+        # Borrar + crear en la misma petición: Qdrant lo aplica de forma atómica
+        try:
+            self.client.update_collection_aliases(change_aliases_operations=operations)
+        except Exception:
+            if legacy:
+                print(f"   ❌ Colecciones {legacy} eliminadas pero sus alias no se crearon: "
+                      f"repetir el cambio de alias ({targets}) para volver a servir")
+            raise
+        for alias, new_collection in targets.items():
+            print(f"🔀 Alias '{alias}' → '{new_collection}' (antes: {previous[alias]})")
+        return previous
+
+    def garbage_collect_versions(self, alias: Optional[str] = None, keep: int = 2) -> List[str]:
+        """Borra versiones antiguas; conserva las `keep` más nuevas y la servida"""
+        alias = alias or self.collection_name
+        live = self.get_alias_target(alias)
+        versions = self.list_versions(alias)
+        to_keep = set(versions[-keep:]) if keep > 0 else set()
+        to_keep.add(live)
+
+        deleted = []
+        for name in versions:
+            if name not in to_keep:
+                self.client.delete_collection(name)
+                self.chunk_store.delete_collection(name)
+                deleted.append(name)
+
+        if deleted:
+            print(f"🧹 Versiones eliminadas: {deleted}")
+        return deleted
+
+    def rebuild_collection(self,
+                           texts: List[str],
+                           embeddings: List[List[float]],
+                           metadata: List[Dict],
+                           vector_size: int = 768,
+                           keep_versions: int = 2,
+                           embedding_model: Optional[Dict] = None) -> str:
+        """Reindexado sin caída: versión nueva → carga → HNSW → swap de alias → GC
+
+        embedding_model: identidad del proveedor de embeddings, se registra con la versión
+        """
+        new_collection = self.new_version_name()
+        print(f"🏗️ Reconstruyendo en '{new_collection}' (el alias sigue sirviendo la versión actual)")
+
+        self.initialize_collection_pro(
+            vector_size=vector_size,
+            collection_name=new_collection,
+            defer_indexing=True
+        )
+        if embedding_model:
+            self.record_embedding_model(embedding_model, new_collection)
+        self.add_documents_batch(texts, embeddings, metadata, collection_name=new_collection)
+        if not self.finalize_collection(new_collection):
+            # Una versión a medio indexar no se sirve: el alias sigue en la actual
+            self.client.delete_collection(new_collection)
+            self.chunk_store.delete_collection(new_collection)
+            raise RuntimeError(f"'{new_collection}' no terminó de optimizarse; el alias no se ha cambiado")
+        self.swap_alias(new_collection)
+        self.garbage_collect_versions(keep=keep_versions)
+        return new_collection
+
+    def initialize_images_collection(self,
+                                     vector_size: int = 768,
+                                     collection_name: Optional[str] = None,
+                                     replace: bool = False):
+        """Colección de imágenes: una descripción embebida por punto"""
+
+        collection_name = collection_name or self.images_collection_name
+        self._claim_collection_name(collection_name, replace)
+
+        # Pocas imágenes por documento: HNSW por defecto, sin quantización
+        self.client.create_collection(
+            collection_name=collection_name,
+            vectors_config=VectorParams(
+                size=vector_size,
+                distance=Distance.COSINE
+            )
+        )
+
+        try:
+            self.client.create_payload_index(
+                collection_name=collection_name,
+                field_name="page",
+                field_schema="integer"
+            )
+        except Exception as e:
+            print(f"   ⚠️ Índice 'page' no creado (no crítico): {e}")
+
+        print(f"✅ Colección '{collection_name}' creada")
+
+    def add_images_batch(self,
+                         images: List[Dict],
+                         embeddings: List[List[float]],
+                         collection_name: Optional[str] = None) -> List[str]:
+        """Indexa imágenes (metadata de ImageAnalyzer) con el embedding de su descripción"""
+
+        points = []
+        ids = []
+
+        for img, embedding in zip(images, embeddings):
+            # ID determinista: re-indexar la misma imagen la sobrescribe
+            point_id = str(uuid.uuid5(uuid.NAMESPACE_URL, img.get("path") or img.get("filename", "")))
+            ids.append(point_id)
+
+            points.append(PointStruct(
+                id=point_id,
+                vector=embedding,
+                payload={
+                    "filename": img.get("filename", ""),
+                    "path": img.get("path", ""),
+                    "page": img.get("page", 0),
+                    "image_index": img.get("image_index", 0),
+                    "description": img.get("description", ""),
+                    "width": img.get("width"),
+                    "height": img.get("height")
+                }
+            ))
+
+        if points:
+            self.client.upsert(
+                collection_name=collection_name or self.images_collection_name,
+                points=points,
+                wait=True
+            )
+
+        print(f"✅ Total: {len(ids)} imágenes indexadas")
+        return ids
+
+    def search_images(self,
                       query_embedding: List[float],
-                      query_text: str,
-                      top_k: int = 5,
-                      filters: Optional[Dict] = None) -> List[Dict]:
-        """Búsqueda híbrida: vectorial + filtros + scoring mejorado"""
+                      top_k: int = 2,
+                      score_threshold: float = 0.3) -> List[Dict]:
+        """Búsqueda vectorial directa sobre las descripciones de imágenes"""
+
+        response = self.client.query_points(
+            collection_name=self.images_collection_name,
+            query=query_embedding,
+            limit=top_k,
+            with_payload=True,
+            score_threshold=score_threshold
+        )
+
+        return [
+            {**point.payload, "score": point.score}
+            for point in response.points
+        ]
+
+    def build_filter(self, filters: Optional[Dict]) -> Optional[Filter]:
+        """Traduce filtros de la API a un Filter de Qdrant
+
+        type, has_image, doc_id, source, chunk_id: valor exacto o lista (cualquiera)
+        page: página exacta; page_from / page_to: rango inclusivo
+        """
+        if not filters:
+            return None
 
-        # Construir filtros
         must_conditions = []
 
-        if filters:
-            if "type" in filters:
-                must_conditions.append(
-                    FieldCondition(
-                        key="type",
-                        match=MatchValue(value=filters["type"])
-                    )
-                )
-            if "has_image" in filters:
-                must_conditions.append(
-                    FieldCondition(
-                        key="has_image",
-                        match=MatchValue(value=filters["has_image"])
-                    )
+        for key in ("type", "has_image", "doc_id", "source", "chunk_id", "page"):
+            value = filters.get(key)
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                match = MatchAny(any=list(value))
+            else:
+                match = MatchValue(value=value)
+            must_conditions.append(FieldCondition(key=key, match=match))
+
+        if filters.get("page_from") is not None or filters.get("page_to") is not None:
+            must_conditions.append(
+                FieldCondition(
+                    key="page",
+                    range=Range(gte=filters.get("page_from"), lte=filters.get("page_to"))
                 )
+            )
 
-        # Búsqueda vectorial con filtros
-        vector_results = self.client.search(
-            collection_name=self.collection_name,
-            query_vector=query_embedding,
-            query_filter=Filter(must=must_conditions) if must_conditions else None,
+        return Filter(must=must_conditions) if must_conditions else None
+
+    def hybrid_search(self,
+                      query_embedding: List[float],
+                      query_text: str,
+                      top_k: int = 5,
+                      filters: Optional[Dict] = None,
+                      text_weight: float = 0.2,
+                      search_params: Optional[SearchParams] = None,
+                      collection_name: Optional[str] = None) -> List[Dict]:
+        """Búsqueda híbrida: vectorial + filtros + scoring mejorado
+
+        text_weight: peso del score de texto (0 = solo vectorial)
+        search_params: sustituye los del perfil (p.ej. búsqueda exacta en evaluación)
+        collection_name: versión concreta; por defecto se resuelve el alias una
+        vez y búsqueda y contenidos salen de esa misma versión
+        """
+        collection = self.resolve_collection(collection_name)
+
+        # Búsqueda vectorial con filtros (solo los campos ligeros del payload)
+        vector_results = self.vector_search(
+            query_embedding,
             limit=top_k * 2,  # Buscar más para luego filtrar
-            with_payload=True,
-            score_threshold=0.3
+            filters=filters,
+            search_params=search_params,
+            with_payload=SEARCH_PAYLOAD_FIELDS,
+            score_threshold=0.3,
+            collection_name=collection
         )
 
+        # Contenido de los candidatos en una sola lectura local
+        contents = self.fetch_contents([result.id for result in vector_results], collection_name=collection)
+
         # Re-scoring con texto
         final_results = []
         keywords = query_text.lower().split() if query_text else []
 
         for result in vector_results:
+            stored = contents.get(str(result.id), {})
+            content = stored.get("content", "")
+
             # Score vectorial
             vector_score = result.score
 
             # Score de texto
             text_score = 0
             if keywords:
-                content = result.payload.get("content", "").lower()
-                matches = sum(1 for kw in keywords if kw in content)
+                content_lower = content.lower()
+                matches = sum(1 for kw in keywords if kw in content_lower)
                 text_score = matches / len(keywords) if keywords else 0
 
             # Score combinado
-            combined_score = (vector_score * 0.8) + (text_score * 0.2)
+            combined_score = (vector_score * (1 - text_weight)) + (text_score * text_weight)
 
             final_results.append({
                 "id": str(result.id),
                 "score": combined_score,
                 "vector_score": vector_score,
                 "text_score": text_score,
-                "text": result.payload.get("text", ""),
-                "metadata": result.payload
+                "text": content[:500],
+                "metadata": {**result.payload, **stored}
             })
 
         # Ordenar por score combinado
@@ -209,22 +816,106 @@ class QdrantOptimizedStore:
 
         return final_results[:top_k]
 
+    def vector_search(self,
+                      query_embedding: List[float],
+                      limit: int,
+                      filters: Optional[Dict] = None,
+                      search_params: Optional[SearchParams] = None,
+                      with_payload=True,
+                      score_threshold: Optional[float] = None,
+                      collection_name: Optional[str] = None):
+        """Búsqueda vectorial en la colección servida (filtros dentro de HNSW)
+
+        En colecciones de dos etapas HNSW recorre el vector coarse y los
+        candidatos (candidates_factor × limit) se reordenan con el completo;
+        score_threshold se aplica al score final.
+        """
+        # Construir filtros (se aplican dentro de la búsqueda HNSW)
+        query_filter = self.build_filter(filters)
+        search_params = search_params or build_search_params(self.profile["search"])
+        collection = self.resolve_collection(collection_name)
+        shard_key_selector = self._shard_selector(collection, filters)
+
+        coarse_dim = self._coarse_size(collection)
+        if coarse_dim is None:
+            return self.client.search(
+                collection_name=collection,
+                query_vector=query_embedding,
+                query_filter=query_filter,
+                search_params=search_params,
+                shard_key_selector=shard_key_selector,
+                limit=limit,
+                with_payload=with_payload,
+                score_threshold=score_threshold
+            )
+
+        two_stage = self.profile["two_stage"]
+        response = self.client.query_points(
+            collection_name=collection,
+            prefetch=Prefetch(
+                query=coarse_vector(query_embedding, coarse_dim),
+                using=COARSE_VECTOR,
+                filter=query_filter,
+                params=search_params,
+                limit=limit * two_stage["candidates_factor"]
+            ),
+            query=query_embedding,
+            using=FULL_VECTOR,
+            shard_key_selector=shard_key_selector,
+            limit=limit,
+            with_payload=with_payload,
+            score_threshold=score_threshold
+        )
+        return response.points
+
+    def fetch_contents(self, point_ids: List, collection_name: Optional[str] = None) -> Dict[str, Dict]:
+        """Contenido completo de varios chunks de la colección servida
+
+        Los puntos cargados antes del ChunkStore aún llevan el texto en el
+        payload: para esos se pide a Qdrant solo 'content' y los campos pesados.
+        """
+        collection = self.resolve_collection(collection_name)
+        contents = self.chunk_store.get_many(collection, [str(pid) for pid in point_ids])
+
+        missing = [pid for pid in point_ids if str(pid) not in contents]
+        if missing:
+            for point in self.client.retrieve(
+                collection_name=collection,
+                ids=missing,
+                with_payload=["content", *HEAVY_FIELDS]
+            ):
+                contents[str(point.id)] = {"content": "", **(point.payload or {})}
+        return contents
+
     def get_statistics(self) -> Dict:
         """Obtener estadísticas detalladas"""
         try:
-            info = self.client.get_collection(self.collection_name)
+            collection = self.resolve_collection()
+            info = self.client.get_collection(collection)
 
             return {
+                "collection_version": collection,
                 "total_vectors": info.vectors_count,
                 "indexed_vectors": info.indexed_vectors_count,
                 "points_count": info.points_count,
                 "segments_count": info.segments_count,
                 "status": info.status,
                 "optimizer_status": info.optimizer_status,
-                "config": {
-                    "vector_size": info.config.params.vectors.size,
-                    "distance": str(info.config.params.vectors.distance)
-                }
+                "config": self._vectors_summary(info.config.params.vectors)
             }
         except Exception as e:
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
+
+    @staticmethod
+    def _vectors_summary(vectors) -> Dict:
+        if isinstance(vectors, dict):
+            return {
+                "two_stage": True,
+                "vector_size": vectors[FULL_VECTOR].size,
+                "coarse_size": vectors[COARSE_VECTOR].size,
+                "distance": str(vectors[FULL_VECTOR].distance)
+            }
+        return {
+            "vector_size": vectors.size,
+            "distance": str(vectors.distance)
+        }
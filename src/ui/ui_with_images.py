@@ -1,54 +1,101 @@
 # src/ui/ui_with_images.py
+import json
+import os
+from typing import Optional
+
 import gradio as gr
-import requests
-import base64
-from PIL import Image
-import io
+import httpx
 
+# URL del API para el servidor de la UI y, para las imágenes, la que ve el navegador
+API_URL = os.getenv("RAG_API_URL", "http://localhost:8000")
+PUBLIC_API_URL = os.getenv("RAG_PUBLIC_API_URL", API_URL)
 
-def query_and_show_images(question):
-    """Consulta al backend y devuelve texto + imágenes"""
-    try:
-        response = requests.post(
-            "http://localhost:8000/query",
-            json={"question": question}
+# Cliente HTTP persistente (keep-alive) compartido por todas las consultas
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=API_URL,
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
         )
+    return _client
+
+
+def _gallery(images):
+    """Miniaturas por URL: el navegador las descarga, la UI no toca los bytes"""
+    return [
+        (f"{PUBLIC_API_URL}{img['thumbnail_url']}",
+         f"Página {img.get('page', '?')}: {img.get('description', '')[:120]}")
+        for img in images
+    ]
+
+
+def _cite(passage):
+    """Cita de un pasaje extractivo: documento, chunk, página y score"""
+    cite = f"chunk {passage['chunk_id']}"
+    if passage.get('doc_id'):
+        cite = f"{passage['doc_id']} · {cite}"
+    if passage.get('page') is not None:
+        cite += f", pág. {passage['page']}"
+    return f"{cite} ({passage.get('score', 0):.2f})"
+
 
-        if response.status_code == 200:
-            data = response.json()
-
-            # Preparar texto
-            text_output = f"### Respuesta:\n{data['answer']}\n\n"
-            text_output += f"**Fuentes:** {', '.join(data['sources'])}\n"
-
-            # Procesar imágenes si existen
-            images = []
-            if data.get('images'):
-                for img_data in data['images']:
-                    try:
-                        # Decodificar base64 a imagen
-                        img_bytes = base64.b64decode(img_data['data'])
-                        img = Image.open(io.BytesIO(img_bytes))
-                        images.append(img)
-                    except Exception as e:
-                        print(f"Error procesando imagen: {e}")
-
-            # Devolver texto y primera imagen (si existe)
-            if images:
-                return text_output, images[0]
-            else:
-                # Crear imagen placeholder si no hay imágenes
-                placeholder = Image.new('RGB', (400, 100), color='white')
-                return text_output, placeholder
-
-        else:
-            return f"Error: {response.status_code}", None
-
-    except Exception as e:
-        return f"Error: {str(e)}", None
-
-
-# Interfaz con imagen
+async def query_and_show_images(question):
+    """Consulta al backend en streaming y va mostrando la respuesta + galería"""
+    if not question or not question.strip():
+        yield "Escribe una pregunta.", []
+        return
+
+    answer, sources, gallery, passages, notice = "", [], [], [], ""
+
+    def render():
+        text_output = f"### Respuesta:\n{answer}\n\n"
+        if notice:
+            text_output += f"_{notice}_\n\n"
+        if sources:
+            text_output += f"**Fuentes:** {', '.join(sources)}\n"
+        if passages:
+            text_output += f"\n**Pasajes citados:** {'; '.join(_cite(p) for p in passages)}\n"
+        return text_output
+
+    try:
+        async with get_client().stream("POST", "/query/stream", json={"question": question}) as response:
+            if response.status_code != 200:
+                await response.aread()
+                yield f"Error: {response.status_code} {response.text}", []
+                return
+
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    answer += "\n\n⚠️ Error: respuesta del servidor ilegible, se corta el stream"
+                    yield render(), gallery
+                    return
+                if event["type"] == "meta":
+                    sources = event.get("sources", [])
+                    gallery = _gallery(event.get("images", []))
+                elif event["type"] == "token":
+                    answer += event["text"]
+                elif event["type"] == "done":
+                    passages = event.get("passages", [])
+                    if event.get("degraded"):
+                        notice = "Respuesta extractiva: el modelo generativo no estaba disponible"
+                elif event["type"] == "error":
+                    answer += f"\n\n⚠️ Error: {event.get('detail')}"
+                yield render(), gallery
+
+    except httpx.HTTPError as e:
+        yield f"Error: {str(e)}", gallery
+
+
+# Interfaz con galería de imágenes
 with gr.Blocks(title="RAG Multimodal") as demo:
     gr.Markdown("# 🤖 RAG Multimodal - Reto Indra")
     gr.Markdown("Sistema de Q&A con soporte de imágenes del documento AWS GenAI IDP")
@@ -74,21 +121,18 @@ with gr.Blocks(title="RAG Multimodal") as demo:
 
     with gr.Row():
         with gr.Column():
-            output_text = gr.Textbox(
-                label="Respuesta",
-                lines=10,
-                max_lines=20
-            )
-            output_image = gr.Image(
-                label="Imagen relacionada (si existe)",
-                type="pil"
+            output_text = gr.Markdown(label="Respuesta")
+            output_gallery = gr.Gallery(
+                label="Imágenes relacionadas",
+                columns=3,
+                height="auto"
             )
 
     submit.click(
         query_and_show_images,
         inputs=input_text,
-        outputs=[output_text, output_image]
+        outputs=[output_text, output_gallery]
     )
 
 if __name__ == "__main__":
-    demo.launch(share=True)
\ No newline at end of file
+    demo.queue().launch(share=True)